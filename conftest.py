@@ -0,0 +1 @@
+# Makes `import datatools` work when the tests are run with a bare `pytest` from the repository root
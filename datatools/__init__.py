@@ -0,0 +1,26 @@
+from .db import get_engine, sales_table, table_versions
+from .query_builder import build_query, compile_query, apply_query, run_query
+from .async_db import AsyncDatabase
+from .ingest import IngestionService, IngestClient, IngestionError
+from .query_cache import QueryCache
+from .sql_profiler import QueryProfiler
+from .row_loops import find_row_loops, check_row_loops, vectorize_function
+from .frame_memory import optimize_frame, restore_frame, memory_summary
+from .chunked_groupby import chunked_agg, iter_chunks
+from .partitioned import PartitionedExecutor, run_partitioned, partition_frame
+from .joins import join_frames, choose_join_strategy, check_key_dtypes
+from .incremental import IncrementalStats, OrderStatistics
+from .resampler import StreamingResampler, resample_stream
+from .cube import PivotCube
+from .expressions import compile_expression, filter_frame, assign_columns
+from .frame_builder import FrameBuilder, build_frame, replicate_frame
+from .array_store import ArrayStore, reduce_blocks
+from .array_stats import fused_stats
+from .lazy_array import LazyArray, BufferPool, lazy
+from .datagen import DataGenerator
+from .grouped_array import GroupedArray
+from .worker_pool import WorkerPool, parallel_map
+from .task_runner import TaskError, TaskHandle, TaskRunner, task
+from .pipeline import Pipeline, PipelineError, Stage
+from .rate_limit import AdaptiveLimiter, KeyedLimiter, LeakyBucket, TokenBucket, bounded_gather, rate_limited
+from .parallel_writer import write_parallel
@@ -0,0 +1,159 @@
+# Fused, blocked and multi-threaded array statistics (section 5 of 04_DATA/Numpy.py in one pass):
+# - data.sum(), data.mean(), data.std(), data.min() and data.max() are five full scans of the array
+#   (std is two), each on a single core
+# - fused_stats() splits the array into cache-sized blocks; every block is scanned while it is in cache and
+#   reduced to (count, sum, mean, M2, min, max), so the array itself is read from memory once
+# - Blocks run on a thread pool (NumPy releases the GIL inside reductions) and are merged in block order
+#   with Chan's parallel form of Welford's update, so results do not depend on the number of workers:
+#       delta = mean_b - mean_a;  M2 = M2_a + M2_b + delta^2 * n_a * n_b / n
+# - axis=None reduces everything, axis=k gives per-axis arrays exactly like data.std(axis=k)
+#
+# Example:
+#   stats = fused_stats(data, ['sum', 'mean', 'std', 'min', 'max'])
+#   per_column = fused_stats(data, ['mean', 'std'], axis=0, workers=8)
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+ARRAY_STATISTICS = ('count', 'sum', 'mean', 'var', 'std', 'min', 'max')
+BLOCK_ELEMENTS = 1 << 18  # 256K elements (2 MB of float64) per block: stays in cache between the block's scans
+
+
+def _block_moments(block, axis, wanted):
+    # One block reduced along `axis`; the scans after the first hit the cache
+    count = block.shape[axis]
+    moments = {'count': count, 'sum': block.sum(axis=axis)}
+    if wanted & {'mean', 'var', 'std'}:
+        moments['mean'] = np.true_divide(moments['sum'], count, dtype=np.float64)
+        if wanted & {'var', 'std'}:
+            deviations = block - np.expand_dims(moments['mean'], axis)
+            np.square(deviations, out=deviations)
+            moments['m2'] = deviations.sum(axis=axis)
+    if 'min' in wanted:
+        moments['min'] = block.min(axis=axis)
+    if 'max' in wanted:
+        moments['max'] = block.max(axis=axis)
+    return moments
+
+
+def _merge_moments(a, b):
+    """Chan et al. pairwise update of two blocks' moments"""
+    count = a['count'] + b['count']
+    merged = {'count': count, 'sum': a['sum'] + b['sum']}
+    if 'mean' in a:
+        delta = b['mean'] - a['mean']
+        merged['mean'] = a['mean'] + delta * (b['count'] / count)
+        if 'm2' in a:
+            merged['m2'] = a['m2'] + b['m2'] + delta ** 2 * (a['count'] * b['count'] / count)
+    if 'min' in a:
+        merged['min'] = np.minimum(a['min'], b['min'])
+    if 'max' in a:
+        merged['max'] = np.maximum(a['max'], b['max'])
+    return merged
+
+
+def _blocks(array, split):
+    # Views of about BLOCK_ELEMENTS elements each, cut along axis `split`
+    slice_elements = max(array.size // max(array.shape[split], 1), 1)
+    step = max(BLOCK_ELEMENTS // slice_elements, 1)
+    index = [slice(None)] * array.ndim
+    for start in range(0, array.shape[split], step):
+        index[split] = slice(start, start + step)
+        yield array[tuple(index)]
+
+
+def _finish(moments, statistics, ddof):
+    count = moments['count']
+    result = {}
+    for name in statistics:
+        if name == 'count':
+            result[name] = count
+        elif name == 'mean':
+            result[name] = np.true_divide(moments['sum'], count, dtype=np.float64)
+        elif name in ('var', 'std'):
+            variance = moments['m2'] / (count - ddof) if count > ddof else np.full_like(moments['m2'], np.nan)
+            result[name] = np.sqrt(variance) if name == 'std' else variance
+        else:
+            result[name] = moments[name]
+    return result
+
+
+def fused_stats(array, statistics=('sum', 'mean', 'std', 'min', 'max'), axis=None, ddof=0, workers=None):
+    """
+    {statistic: value} for count/sum/mean/var/std/min/max, computed in one blocked pass.
+    Matches data.<statistic>(axis=axis) (and ddof for var/std); workers defaults to the number of CPUs.
+    """
+    statistics = [statistics] if isinstance(statistics, str) else list(statistics)
+    unsupported = set(statistics) - set(ARRAY_STATISTICS)
+    if unsupported:
+        raise ValueError(f"Unsupported statistics: {sorted(unsupported)} (use {ARRAY_STATISTICS})")
+    array = np.asanyarray(array)
+    if axis is None:
+        # Contiguous arrays are reduced as one flat array; others are raveled block by block
+        array = array.reshape(-1) if array.flags.c_contiguous or array.ndim <= 1 else array
+        if array.ndim > 1:
+            flat_blocks = (block.reshape(-1) for block in _blocks(array, 0))
+            return _reduce(flat_blocks, 0, 'merge', statistics, ddof, workers)
+        axis = 0
+    if not -array.ndim <= axis < array.ndim:
+        raise np.AxisError(axis, array.ndim)
+    axis %= array.ndim
+    if array.shape[axis] == 0:
+        raise ValueError("Cannot compute statistics over an empty axis")
+
+    # Cut along the reduced axis and merge the blocks, unless the first axis is long enough to
+    # hand every thread independent rows (their results are then concatenated)
+    if axis != 0 and array.shape[0] >= 2 * (workers or os.cpu_count() or 1):
+        return _reduce(_blocks(array, 0), axis, 'concat', statistics, ddof, workers)
+    return _reduce(_blocks(array, axis), axis, 'merge', statistics, ddof, workers)
+
+
+def _reduce(blocks, axis, combine, statistics, ddof, workers):
+    wanted = set(statistics)
+
+    def reduce_block(block):
+        return _block_moments(block, axis, wanted)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fused-stats') as pool:
+            parts = list(pool.map(reduce_block, blocks))
+    else:
+        parts = [reduce_block(block) for block in blocks]
+    if not parts:
+        raise ValueError("Cannot compute statistics of an empty array")
+
+    if combine == 'concat':
+        # Independent rows: each block already holds final moments for its part of the output
+        results = [_finish(part, statistics, ddof) for part in parts]
+        return {name: (results[0][name] if name == 'count' else np.concatenate([r[name] for r in results]))
+                for name in statistics}
+    moments = parts[0]
+    for part in parts[1:]:
+        moments = _merge_moments(moments, part)
+    return _finish(moments, statistics, ddof)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    data = rng.normal(50, 10, size=100_000_000)
+    names = ['sum', 'mean', 'std', 'min', 'max']
+
+    start = time.perf_counter()
+    expected = {name: getattr(data, name)() for name in names}
+    print(f"Five numpy passes:        {time.perf_counter() - start:.2f} s")
+    for workers in (1, os.cpu_count()):
+        start = time.perf_counter()
+        fused = fused_stats(data, names, workers=workers)
+        same = all(np.isclose(fused[name], expected[name]) for name in names)
+        print(f"fused_stats ({workers:>2} workers): {time.perf_counter() - start:.2f} s, same: {same}")
+
+    matrix = data.reshape(-1, 4)
+    start = time.perf_counter()
+    per_column = fused_stats(matrix, ['mean', 'std'], axis=0)
+    print(f"\nPer column (axis=0): {time.perf_counter() - start:.2f} s, "
+          f"same: {np.allclose(per_column['std'], matrix.std(axis=0))}")
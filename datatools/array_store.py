@@ -0,0 +1,233 @@
+# Memory-mapped NumPy array store for large numeric columns (the in-RAM arrays of 04_DATA/Numpy.py, on disk):
+# - Every named array is one .npy file; catalog.json records its dtype, shape and timestamps
+# - open() maps the file lazily with mmap_mode='r': nothing is read until it is sliced, and all processes
+#   that open the same array share the operating system's page cache instead of holding private copies
+# - read() copies a slice into memory, append() adds rows at the end of axis 0 in place
+#   (the .npy header is rewritten with the new shape, the existing data is never copied)
+# - reduce() aggregates a mapped array block by block (sum/mean/min/max/count per axis), so memory use is
+#   one block regardless of the array size
+#
+# Example:
+#   store = ArrayStore('feature_store')
+#   store.save('prices', np.random.rand(100_000_000))
+#   prices = store.open('prices')              # np.memmap, read-only
+#   store.append('prices', new_prices)
+#   store.reduce('prices', 'mean')
+
+import io
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+CATALOG_FILE = 'catalog.json'
+BLOCK_BYTES = 64 * 1024**2
+STORE_REDUCTIONS = ('sum', 'mean', 'min', 'max', 'count')
+
+
+class ArrayStore:
+    """Directory of named .npy arrays opened as read-only memory maps (see module header)"""
+
+    def __init__(self, directory):
+        self.directory = os.fspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()  # one writer per process; the catalog file is replaced atomically
+
+    def __getstate__(self):
+        # Only the directory travels to worker processes; they map the same files (and share the page cache)
+        return {'directory': self.directory}
+
+    def __setstate__(self, state):
+        self.__init__(state['directory'])
+
+    # 1. CATALOG
+    # ----------------------------------------------------------------------------------------------------
+    def _catalog_path(self):
+        return os.path.join(self.directory, CATALOG_FILE)
+
+    def catalog(self):
+        """{name: {'file', 'dtype', 'shape', 'created', 'updated'}} for every stored array"""
+        try:
+            with open(self._catalog_path()) as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def _write_catalog(self, catalog):
+        temporary = self._catalog_path() + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(catalog, file, indent=2)
+        os.replace(temporary, self._catalog_path())
+
+    def _record(self, name, array_shape, dtype):
+        catalog = self.catalog()
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        entry = catalog.get(name, {'file': f'{name}.npy', 'created': now})
+        entry.update(dtype=np.dtype(dtype).str, shape=list(array_shape), updated=now)
+        catalog[name] = entry
+        self._write_catalog(catalog)
+
+    def _path(self, name):
+        entry = self.catalog().get(name)
+        if entry is None:
+            raise KeyError(f"No array named {name!r} in {self.directory}")
+        return os.path.join(self.directory, entry['file'])
+
+    def names(self):
+        return sorted(self.catalog())
+
+    def __contains__(self, name):
+        return name in self.catalog()
+
+    # 2. WRITING
+    # ----------------------------------------------------------------------------------------------------
+    def save(self, name, array, overwrite=False):
+        """Writes an array (any array-like, including another memmap) block by block"""
+        if not name.replace('_', '').replace('-', '').isalnum():
+            raise ValueError(f"Array names may only contain letters, digits, '_' and '-': {name!r}")
+        array = np.asanyarray(array)
+        with self._lock:
+            if name in self and not overwrite:
+                raise FileExistsError(f"Array {name!r} already exists (use overwrite=True or append())")
+            path = os.path.join(self.directory, f'{name}.npy')
+            target = np.lib.format.open_memmap(path, mode='w+', dtype=array.dtype, shape=array.shape)
+            for rows in _row_blocks(array):
+                target[rows] = array[rows]
+            target.flush()
+            del target
+            self._record(name, array.shape, array.dtype)
+
+    def append(self, name, rows):
+        """Adds rows at the end of axis 0 (same dtype and trailing shape as the stored array)"""
+        with self._lock:
+            path = self._path(name)
+            with open(path, 'r+b') as file:
+                version = np.lib.format.read_magic(file)
+                shape, fortran_order, dtype = _read_header(file, version)
+                header_length = file.tell()
+                rows = np.ascontiguousarray(rows, dtype=dtype)
+                if fortran_order or rows.shape[1:] != tuple(shape[1:]):
+                    raise ValueError(f"Cannot append rows of shape {rows.shape} to {name!r} with shape {shape}")
+                new_shape = (shape[0] + rows.shape[0],) + tuple(shape[1:])
+
+                header = _header_bytes(new_shape, dtype, version)
+                if len(header) != header_length:
+                    # The header cannot grow in place (only happens for files written by old numpy versions)
+                    raise ValueError(f"The header of {path} has no room for the new shape; re-save the array")
+                file.seek(0, os.SEEK_END)
+                file.write(rows.tobytes())
+                file.seek(0)
+                file.write(header)
+            self._record(name, new_shape, dtype)
+
+    def delete(self, name):
+        with self._lock:
+            path = self._path(name)
+            catalog = self.catalog()
+            del catalog[name]
+            self._write_catalog(catalog)
+            os.remove(path)
+
+    # 3. READING
+    # ----------------------------------------------------------------------------------------------------
+    def open(self, name):
+        """Read-only np.memmap of the whole array (pages are loaded on access)"""
+        return np.load(self._path(name), mmap_mode='r')
+
+    def read(self, name, index=slice(None)):
+        """Copies array[index] into memory, e.g. read('prices', slice(1_000, 2_000))"""
+        return np.array(self.open(name)[index])
+
+    def reduce(self, name, how='sum', axis=None, block_bytes=BLOCK_BYTES):
+        """Block-wise sum/mean/min/max/count of a stored array over axis None, 0 or 1"""
+        return reduce_blocks(self.open(name), how=how, axis=axis, block_bytes=block_bytes)
+
+
+def _read_header(file, version):
+    if version == (1, 0):
+        return np.lib.format.read_array_header_1_0(file)
+    return np.lib.format.read_array_header_2_0(file)
+
+
+def _header_bytes(shape, dtype, version):
+    buffer = io.BytesIO()
+    header = {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': shape}
+    if version == (1, 0):
+        np.lib.format.write_array_header_1_0(buffer, header)
+    else:
+        np.lib.format.write_array_header_2_0(buffer, header)
+    return buffer.getvalue()
+
+
+def _row_blocks(array, block_bytes=BLOCK_BYTES):
+    # Slices of axis 0 that hold about block_bytes each
+    if array.ndim == 0:
+        yield ()
+        return
+    row_bytes = max(array.itemsize * int(np.prod(array.shape[1:], dtype=np.int64)), 1)
+    step = max(block_bytes // row_bytes, 1)
+    for start in range(0, array.shape[0], step):
+        yield slice(start, start + step)
+
+
+def reduce_blocks(array, how='sum', axis=None, block_bytes=BLOCK_BYTES):
+    """Reduces any array (typically a memmap) one block of rows at a time"""
+    if how not in STORE_REDUCTIONS:
+        raise ValueError(f"Unsupported reduction {how!r} (use {STORE_REDUCTIONS})")
+    if axis is not None:
+        if not -max(array.ndim, 1) <= axis < max(array.ndim, 1):
+            raise ValueError(f"axis {axis} is out of bounds for a {array.ndim}-d array")
+        axis %= max(array.ndim, 1)  # a negative axis counts from the end, as in numpy
+
+    if axis not in (None, 0):
+        # Each block reduces to its own rows: compute them block by block and concatenate
+        parts = []
+        for rows in _row_blocks(array, block_bytes):
+            block = np.asarray(array[rows])
+            parts.append(np.full(block.shape[:axis] + block.shape[axis + 1:], block.shape[axis])
+                         if how == 'count' else getattr(block, how)(axis=axis))
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    total = count = None
+    for rows in _row_blocks(array, block_bytes):
+        block = np.asarray(array[rows])
+        block_count = block.shape[0] if axis == 0 else block.size
+        if how in ('sum', 'mean'):
+            partial = block.sum(axis=axis, dtype=np.float64 if how == 'mean' else None)
+            total = partial if total is None else total + partial
+        elif how in ('min', 'max'):
+            partial = block.min(axis=axis) if how == 'min' else block.max(axis=axis)
+            total = partial if total is None else (np.minimum if how == 'min' else np.maximum)(total, partial)
+        count = block_count if count is None else count + block_count
+
+    if how == 'count':
+        return count or 0
+    if total is None:
+        raise ValueError(f"Cannot compute {how} of an empty array")
+    return total / count if how == 'mean' else total
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArrayStore(directory)
+        features = np.random.default_rng(42).random((20_000_000, 4))  # ~640 MB
+        start = time.perf_counter()
+        store.save('features', features)
+        print(f"save: {time.perf_counter() - start:.2f} s")
+
+        store.append('features', np.ones((1_000, 4)))
+        mapped = store.open('features')
+        print("catalog:", store.catalog()['features'])
+        print("mapped:", type(mapped).__name__, mapped.shape, "rows 5-7:", store.read('features', slice(5, 7)))
+
+        start = time.perf_counter()
+        blocked = store.reduce('features', 'sum', axis=0)
+        print(f"blocked sum(axis=0): {time.perf_counter() - start:.2f} s")
+        expected = np.concatenate([features, np.ones((1_000, 4))]).sum(axis=0)
+        print("same as numpy:", np.allclose(blocked, expected))
+        del mapped
@@ -0,0 +1,181 @@
+# Async database access for asyncio pipelines:
+# - SQLite/SQLAlchemy calls are blocking, so calling them inside a coroutine stalls the event loop
+# - AsyncDatabase runs every write on ONE dedicated writer thread (its task queue keeps writes ordered
+#   and avoids SQLite writer contention) and reads on a small reader thread pool
+# - Coroutines await the results, so the event loop keeps downloading API pages while earlier pages are loaded
+#
+# Example:
+#   async with AsyncDatabase('sqlite:///sales_data.db') as db:
+#       db.submit_write(page_df, 'sales')          # fire and forget, returns an awaitable
+#       df = await db.read_sql('SELECT * FROM sales')
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+from sqlalchemy import text
+
+from .db import DEFAULT_DB_URL, get_engine, table_versions
+
+
+class _WriteFuture(asyncio.Future):
+    """Outcome of a queued write: once the caller takes it (await, result(), exception()), flush() skips it"""
+
+    def __init__(self, database):
+        super().__init__()
+        self._database = database
+
+    def _taken(self):
+        if self in self._database._failed:
+            self._database._failed.remove(self)
+
+    def result(self):
+        self._taken()
+        return super().result()
+
+    def exception(self):
+        self._taken()
+        return super().exception()
+
+    def __await__(self):
+        try:
+            return (yield from super().__await__())
+        finally:
+            self._taken()
+
+    __iter__ = __await__
+
+
+class AsyncDatabase:
+    """Asyncio front-end for a SQLAlchemy engine backed by a writer thread and a reader pool"""
+
+    def __init__(self, url=DEFAULT_DB_URL, readers=4, engine=None):
+        self.engine = engine if engine is not None else get_engine(url)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-writer')
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix='db-reader')
+        self._pending = set()  # write futures not finished yet
+        self._failed = []      # failed write futures whose error nobody has taken, raised by flush()
+
+    # 1. BLOCKING WORKERS (run on the executor threads)
+    # ----------------------------------------------------------------------------------------------------
+    def _write_frame(self, df, table, if_exists):
+        # One transaction per frame: either the whole page is stored or none of it
+        with self.engine.begin() as conn:
+            df.to_sql(table, con=conn, if_exists=if_exists, index=False)
+        table_versions.bump(table)
+        return len(df)
+
+    def _execute(self, statement, params, tables):
+        with self.engine.begin() as conn:
+            result = conn.execute(text(statement) if isinstance(statement, str) else statement, params or {})
+        for table in tables:
+            table_versions.bump(table)
+        return result.rowcount
+
+    def _read_sql(self, query, params):
+        with self.engine.connect() as conn:
+            return pd.read_sql(text(query) if isinstance(query, str) else query, conn, params=params)
+
+    # 2. ASYNC API
+    # ----------------------------------------------------------------------------------------------------
+    def _run(self, executor, func, *args):
+        return asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    def _queue_write(self, func, *args):
+        write = _WriteFuture(self)
+        self._pending.add(write)
+        self._run(self._writer, func, *args).add_done_callback(functools.partial(self._write_done, write))
+        return write
+
+    def _write_done(self, write, future):
+        # Passes the writer thread's outcome to the caller's future; a failure waits in _failed until taken
+        self._pending.discard(write)
+        if write.cancelled():
+            return
+        if future.cancelled():
+            write.cancel()
+        elif future.exception() is not None:
+            self._failed.append(write)
+            write.set_exception(future.exception())
+        else:
+            write.set_result(future.result())
+
+    def submit_write(self, df, table, if_exists='append'):
+        """
+        Queues a DataFrame write without waiting for it and returns a future with the row count.
+        Writes run in submission order; use flush() to wait for all of them. An error taken from the future
+        (by awaiting it, or with result()/exception()) is not raised again by flush().
+        """
+        return self._queue_write(self._write_frame, df, table, if_exists)
+
+    async def write_frame(self, df, table, if_exists='append'):
+        """Writes a DataFrame to `table` and waits until it is committed"""
+        return await self.submit_write(df, table, if_exists)
+
+    async def execute(self, statement, params=None, tables=()):
+        """
+        Runs an INSERT/UPDATE/DELETE/DDL statement on the writer thread.
+        Pass the modified `tables` so cached query results for them are invalidated.
+        """
+        return await self._queue_write(self._execute, statement, params, tables)
+
+    async def read_sql(self, query, params=None):
+        """Runs a SELECT on the reader pool and returns a DataFrame"""
+        return await self._run(self._readers, self._read_sql, query, params)
+
+    async def flush(self):
+        """
+        Waits for every queued write; re-raises the first error that no caller has taken from its future,
+        including writes that failed before flush() was called.
+        """
+        if self._pending:
+            await asyncio.wait(list(self._pending))
+        if self._failed:
+            failed, self._failed = self._failed, []
+            errors = [write.exception() for write in failed]  # retrieved, so asyncio does not log the others
+            raise errors[0]
+
+    async def close(self):
+        """Flushes pending writes and shuts down the worker threads"""
+        try:
+            await self.flush()
+        finally:
+            self._writer.shutdown(wait=True)
+            self._readers.shutdown(wait=True)
+            self.engine.dispose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+
+if __name__ == "__main__":
+    import time
+
+    async def fetch_page(page):
+        # Simulates an API call (see 04_DATA/APIs.py) that returns one page of sales rows
+        await asyncio.sleep(0.2)
+        return pd.DataFrame({
+            'customer_id': [page * 10 + i for i in range(3)],
+            'name': [f'customer_{page}_{i}' for i in range(3)],
+            'sales': [100.0 * (i + 1) for i in range(3)],
+            'region': ['North', 'South', 'East'],
+        })
+
+    async def main():
+        start = time.perf_counter()
+        async with AsyncDatabase('sqlite:///async_demo.db') as db:
+            await db.execute('DROP TABLE IF EXISTS sales', tables=['sales'])
+            for page in range(5):
+                df = await fetch_page(page)
+                db.submit_write(df, 'sales')  # loading overlaps with the next download
+            await db.flush()
+            result = await db.read_sql('SELECT region, SUM(sales) AS total_sales FROM sales GROUP BY region')
+        print(result)
+        print(f"Fetched and loaded 5 pages in {time.perf_counter() - start:.2f} seconds")
+
+    asyncio.run(main())
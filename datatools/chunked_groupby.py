@@ -0,0 +1,335 @@
+# Out-of-core groupby/agg engine for the named-aggregation spec used in 04_DATA/Pandas.py:
+#   chunked_agg('big_sales.csv', by='region',
+#               total_sales=('sales', 'sum'), avg_sales=('sales', 'mean'), count=('customer_id', 'count'))
+# - The input is read in chunks; each chunk is reduced to small mergeable partial states per group
+#   (sum, count, min/max, Welford-style n/mean/M2 for var and std, first/last, ...)
+# - Partial states are merged as chunks arrive, so memory depends on the number of groups, not rows
+# - Chunks can be reduced in parallel worker processes (workers=N)
+# - approximate=True replaces exact median/nunique (which keep values) with mergeable sketches:
+#   a log-bucket quantile sketch (relative error ~ relative_accuracy) and HyperLogLog for distinct counts
+
+import math
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# 1. AGGREGATION STATES
+# --------------------------------------------------------------------------------------------------------
+# Every aggregation implements:
+#   partial(chunk, by) -> state for one chunk
+#   merge(a, b)        -> state for both inputs
+#   finalize(state)    -> Series indexed by the group keys
+
+
+class _Simple:
+    """sum, count, size, min, max, prod, first, last: the partial result merges with another aggregation"""
+
+    MERGE = {'count': 'sum', 'size': 'sum'}
+
+    def __init__(self, column, how):
+        self.column = column
+        self.how = how
+
+    def partial(self, chunk, by):
+        grouped = chunk.groupby(by)
+        return grouped.size() if self.how == 'size' else grouped[self.column].agg(self.how)
+
+    def merge(self, a, b):
+        merged = pd.concat([a, b])  # a is always the earlier input, which keeps first/last correct
+        return merged.groupby(level=list(range(merged.index.nlevels))).agg(self.MERGE.get(self.how, self.how))
+
+    def finalize(self, state):
+        return state
+
+
+class _Mean:
+    def __init__(self, column, how='mean'):
+        self.column = column
+
+    def partial(self, chunk, by):
+        return chunk.groupby(by)[self.column].agg(['sum', 'count'])
+
+    def merge(self, a, b):
+        merged = pd.concat([a, b])
+        return merged.groupby(level=list(range(merged.index.nlevels))).sum()
+
+    def finalize(self, state):
+        return state['sum'] / state['count'].where(state['count'] > 0)
+
+
+class _Variance:
+    """Sample variance/std (ddof=1, like pandas) from mergeable count/mean/M2 states (Chan et al.)"""
+
+    def __init__(self, column, how):
+        self.column = column
+        self.how = how
+
+    def partial(self, chunk, by):
+        state = chunk.groupby(by)[self.column].agg(['count', 'mean', 'var'])
+        state.columns = ['n', 'mean', 'm2']
+        state['m2'] = state['m2'].fillna(0) * (state['n'] - 1).clip(lower=0)
+        return state
+
+    def merge(self, a, b):
+        merged = pd.concat([a, b])
+        levels = list(range(merged.index.nlevels))
+        total = merged.groupby(level=levels)[['n']].sum()
+        weighted = (merged['mean'].fillna(0) * merged['n']).groupby(level=levels).sum()
+        total['mean'] = weighted / total['n'].where(total['n'] > 0)
+        # M2 = sum of M2_i + sum of n_i * (mean_i - mean)^2
+        spread = merged['n'] * (merged['mean'] - total['mean'].reindex(merged.index)) ** 2
+        total['m2'] = merged['m2'].groupby(level=levels).sum() + spread.fillna(0).groupby(level=levels).sum()
+        return total
+
+    def finalize(self, state):
+        variance = state['m2'] / (state['n'] - 1).where(state['n'] > 1)
+        return np.sqrt(variance) if self.how == 'std' else variance
+
+
+class _ExactNUnique:
+    """Keeps the distinct (group, value) pairs: memory grows with the number of distinct values"""
+
+    def __init__(self, column, how='nunique'):
+        self.column = column
+
+    def partial(self, chunk, by):
+        return chunk[list(by) + [self.column]].dropna().drop_duplicates()
+
+    def merge(self, a, b):
+        return pd.concat([a, b], ignore_index=True).drop_duplicates()
+
+    def finalize(self, state):
+        by = [c for c in state.columns if c != self.column]
+        return state.groupby(by)[self.column].nunique()
+
+
+class _ExactMedian:
+    """Keeps the values of the column: only suitable when that column fits in memory"""
+
+    def __init__(self, column, how='median'):
+        self.column = column
+
+    def partial(self, chunk, by):
+        return chunk[list(by) + [self.column]]
+
+    def merge(self, a, b):
+        return pd.concat([a, b], ignore_index=True)
+
+    def finalize(self, state):
+        by = [c for c in state.columns if c != self.column]
+        return state.groupby(by)[self.column].median()
+
+
+class _HyperLogLog:
+    """Approximate distinct count: per group, 2**precision registers keep the max leading-zero rank"""
+
+    def __init__(self, column, how='nunique', precision=12):
+        self.column = column
+        self.precision = precision
+
+    def partial(self, chunk, by):
+        values = chunk[list(by) + [self.column]].dropna()
+        hashes = pd.util.hash_pandas_object(values[self.column], index=False).to_numpy(dtype=np.uint64)
+        p = self.precision
+        register = (hashes >> np.uint64(64 - p)).astype(np.int64)
+        rest = hashes & np.uint64((1 << (64 - p)) - 1)
+        bits = np.where(rest > 0, np.floor(np.log2(np.maximum(rest, 1).astype(np.float64))) + 1, 0)
+        rank = (64 - p) - bits.astype(np.int64) + 1
+        keys = values[list(by)].assign(_register=register, _rank=rank)
+        return keys.groupby(list(by) + ['_register'])['_rank'].max()
+
+    def merge(self, a, b):
+        merged = pd.concat([a, b])
+        return merged.groupby(level=list(range(merged.index.nlevels))).max()
+
+    def finalize(self, state):
+        m = 1 << self.precision
+        alpha = 0.7213 / (1 + 1.079 / m)
+        levels = list(range(state.index.nlevels - 1))
+        inverse_sum = (2.0 ** -state).groupby(level=levels).sum()
+        used = state.groupby(level=levels).size()
+        zeros = m - used
+        inverse_sum = inverse_sum + zeros  # empty registers contribute 2**0
+        estimate = alpha * m * m / inverse_sum
+        # Small-range correction (linear counting) while many registers are still empty
+        linear = m * np.log(m / zeros.where(zeros > 0))
+        return np.round(estimate.where((estimate > 2.5 * m) | (zeros == 0), linear)).astype('int64')
+
+
+class _QuantileSketch:
+    """
+    Approximate median with log-spaced buckets (DDSketch-style): every value x lands in bucket
+    ceil(log_gamma |x|), so the returned value is within `relative_accuracy` of a true value at that rank.
+    """
+
+    OFFSET = 1 << 20  # keeps positive buckets > 0 > negative buckets
+
+    def __init__(self, column, how='median', relative_accuracy=0.01):
+        self.column = column
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+
+    def partial(self, chunk, by):
+        values = chunk[list(by) + [self.column]].dropna()
+        x = values[self.column].to_numpy(dtype=np.float64)
+        magnitude = np.ceil(np.log(np.where(x != 0, np.abs(x), 1.0)) / math.log(self.gamma)).astype(np.int64)
+        bucket = np.where(x > 0, magnitude + self.OFFSET, np.where(x < 0, -(magnitude + self.OFFSET), 0))
+        return values[list(by)].assign(_bucket=bucket).groupby(list(by) + ['_bucket']).size()
+
+    def merge(self, a, b):
+        merged = pd.concat([a, b])
+        return merged.groupby(level=list(range(merged.index.nlevels))).sum()
+
+    def _value(self, bucket):
+        magnitude = np.abs(bucket) - self.OFFSET
+        representative = 2 * self.gamma ** magnitude / (self.gamma + 1)
+        return np.where(bucket == 0, 0.0, np.sign(bucket) * representative)
+
+    def finalize(self, state):
+        levels = list(range(state.index.nlevels - 1))
+        counts = state.sort_index()
+        buckets = counts.index.get_level_values(-1).to_numpy()
+        group = counts.groupby(level=levels)
+        upper = group.cumsum()
+        lower = upper - counts
+        total = group.transform('sum')
+        # pandas' median averages the two middle values when the count is even
+        picks = []
+        for rank in ((total - 1) // 2, total // 2):
+            hit = (lower <= rank) & (rank < upper)
+            picks.append(pd.Series(self._value(buckets[hit.to_numpy()]),
+                                   index=counts.index[hit.to_numpy()].droplevel(-1)))
+        return (picks[0] + picks[1]) / 2
+
+
+def _make_aggregation(column, how, approximate, relative_accuracy, hll_precision):
+    if how in ('sum', 'count', 'size', 'min', 'max', 'prod', 'first', 'last'):
+        return _Simple(column, how)
+    if how == 'mean':
+        return _Mean(column)
+    if how in ('var', 'std'):
+        return _Variance(column, how)
+    if how == 'nunique':
+        return _HyperLogLog(column, precision=hll_precision) if approximate else _ExactNUnique(column)
+    if how == 'median':
+        return _QuantileSketch(column, relative_accuracy=relative_accuracy) if approximate else _ExactMedian(column)
+    raise ValueError(f"Aggregation {how!r} cannot be computed chunk by chunk")
+
+
+# 2. CHUNK SOURCES
+# --------------------------------------------------------------------------------------------------------
+def iter_chunks(source, chunksize=1_000_000, columns=None):
+    """Yields DataFrames from a CSV / JSON-lines / Parquet path, or passes an iterable of DataFrames through"""
+    if isinstance(source, pd.DataFrame):
+        for start in range(0, len(source), chunksize):
+            yield source.iloc[start:start + chunksize]
+        return
+    if not isinstance(source, (str, os.PathLike)):
+        yield from source
+        return
+
+    extension = os.path.splitext(str(source))[1].lower()
+    if extension == '.csv':
+        yield from pd.read_csv(source, chunksize=chunksize, usecols=columns)
+    elif extension in ('.json', '.jsonl'):
+        for chunk in pd.read_json(source, lines=True, chunksize=chunksize):
+            yield chunk if columns is None else chunk[columns]
+    elif extension == '.parquet':
+        import pyarrow.parquet as pq  # pip install pyarrow
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(f"Unsupported file type: {extension!r}")
+
+
+# 3. ENGINE
+# --------------------------------------------------------------------------------------------------------
+def _partial_states(chunk, by, aggregations):
+    # Runs in the worker processes: one partial state per aggregation
+    return [aggregation.partial(chunk, by) for aggregation in aggregations]
+
+
+def _merge_states(states, partials, aggregations):
+    if states is None:
+        return partials
+    return [aggregation.merge(a, b) for aggregation, a, b in zip(aggregations, states, partials)]
+
+
+def chunked_agg(source, by, approximate=False, workers=1, chunksize=1_000_000,
+                relative_accuracy=0.01, hll_precision=12, **named_aggs):
+    """
+    groupby(by).agg(**named_aggs) over chunked input, returned with the group keys as columns.
+    source: DataFrame, iterable of DataFrames, or CSV/JSON-lines/Parquet path.
+    workers: number of processes reducing chunks in parallel (1 = in this process).
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    if not named_aggs:
+        raise ValueError("At least one named aggregation is required, e.g. total=('sales', 'sum')")
+    labels = list(named_aggs)
+    aggregations = [_make_aggregation(column, how, approximate, relative_accuracy, hll_precision)
+                    for column, how in named_aggs.values()]
+    columns = list(dict.fromkeys(by + [column for column, _ in named_aggs.values()]))
+    chunks = iter_chunks(source, chunksize=chunksize, columns=columns)
+
+    states = None
+    groups = None
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(_partial_states, chunk, by, aggregations + [_Simple(None, 'size')]))
+                # Bounded window: merge the oldest result in order before reading too far ahead
+                if len(in_flight) >= 2 * workers:
+                    *partials, sizes = in_flight.popleft().result()
+                    states = _merge_states(states, partials, aggregations)
+                    groups = sizes if groups is None else _Simple(None, 'size').merge(groups, sizes)
+            while in_flight:
+                *partials, sizes = in_flight.popleft().result()
+                states = _merge_states(states, partials, aggregations)
+                groups = sizes if groups is None else _Simple(None, 'size').merge(groups, sizes)
+    else:
+        for chunk in chunks:
+            *partials, sizes = _partial_states(chunk, by, aggregations + [_Simple(None, 'size')])
+            states = _merge_states(states, partials, aggregations)
+            groups = sizes if groups is None else _Simple(None, 'size').merge(groups, sizes)
+
+    if states is None:
+        return pd.DataFrame(columns=by + labels)
+
+    # Every group gets a row, even when an aggregation saw only missing values in it
+    index = groups.sort_index().index
+    result = pd.DataFrame({label: aggregation.finalize(state).reindex(index)
+                           for label, aggregation, state in zip(labels, aggregations, states)}, index=index)
+    for label, (column, how) in named_aggs.items():
+        if how in ('count', 'size', 'nunique'):
+            result[label] = result[label].fillna(0).astype('int64')
+    return result.reset_index()
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    n = 2_000_000
+    sales = pd.DataFrame({
+        'region': rng.choice(['North', 'South', 'East', 'West'], size=n),
+        'customer_id': rng.integers(1, 200_000, size=n),
+        'sales': rng.gamma(2.0, 100.0, size=n).round(2),
+    })
+    spec = dict(total_sales=('sales', 'sum'), avg_sales=('sales', 'mean'), sales_std=('sales', 'std'),
+                median_sales=('sales', 'median'), unique_customers=('customer_id', 'nunique'),
+                count=('customer_id', 'count'))
+
+    start = time.perf_counter()
+    expected = sales.groupby('region').agg(**spec).reset_index()
+    print(f"pandas (all in memory): {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    result = chunked_agg(sales, by='region', approximate=True, workers=4, chunksize=250_000, **spec)
+    print(f"chunked_agg (approximate, 4 workers): {time.perf_counter() - start:.2f} s")
+    pd.set_option('display.width', 160)
+    print(result)
+    print("\nExact pandas result:")
+    print(expected)
@@ -0,0 +1,181 @@
+# Pivot-table engine on a precomputed cube (sections 6 and 8.6 of 04_DATA/Pandas.py):
+#   df.pivot_table(index=['region', 'month'], values='sales', aggfunc=['sum', 'mean', 'count'])
+# - PivotCube.build scans the raw rows once (in chunks for files) and stores sum, count, min and max of every
+#   measure for each combination of the declared dimensions (one "cell" per combination)
+# - Cells are indexed by the dimensions (each distinct value stored once), so the cube is usually orders of
+#   magnitude smaller than the rows
+# - Any pivot or roll-up over a subset of the dimensions is answered from the cells: sums and counts add up,
+#   min/max of mins/maxes, mean = sum / count
+# - pivot() returns the same frame as pd.pivot_table on the raw rows (float sums up to rounding);
+#   slice() filters cells before a pivot. `values` is required: pivot_table's values=None aggregates every
+#   other column of the raw rows, which the cube does not have
+#
+# Example:
+#   cube = PivotCube.build(df, dimensions=['region', 'month', 'customer_id'], measures=['sales'])
+#   cube.pivot(index=['region', 'month'], values='sales', aggfunc=['sum', 'mean', 'count'])
+#   cube.slice(region='North').pivot(index='month', columns='customer_id', values='sales', aggfunc='sum')
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from .chunked_groupby import iter_chunks
+
+CUBE_AGGREGATIONS = ('sum', 'mean', 'count', 'min', 'max')
+
+# Statistics stored per measure, and how cells are merged when dimensions are rolled up
+_CELL_STATISTICS = ('sum', 'count', 'min', 'max')
+_MERGE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def _cells(chunk, dimensions, measures):
+    return chunk.groupby(dimensions, dropna=False, observed=True)[measures].agg(list(_CELL_STATISTICS))
+
+
+def _merge_cells(cells):
+    merged = pd.concat(cells)
+    if len(cells) == 1:
+        return merged
+    return merged.groupby(level=list(range(merged.index.nlevels)), dropna=False).agg(
+        {key: _MERGE[key[1]] for key in merged.columns})
+
+
+class PivotCube:
+    """Precomputed sum/count/min/max of `measures` per combination of `dimensions` (see module header)"""
+
+    def __init__(self, cells, dimensions, measures):
+        # One row per cell: indexed by the dimensions (the index levels store each distinct value once),
+        # one (measure, statistic) column per stored statistic
+        self.cells = cells
+        self.dimensions = dimensions
+        self.measures = measures
+
+    @classmethod
+    def build(cls, source, dimensions, measures, chunksize=1_000_000):
+        """Scans `source` (DataFrame, iterable of DataFrames or CSV/JSON-lines/Parquet path) once"""
+        dimensions = [dimensions] if isinstance(dimensions, str) else list(dimensions)
+        measures = [measures] if isinstance(measures, str) else list(measures)
+        partials = []
+        for chunk in iter_chunks(source, chunksize=chunksize, columns=dimensions + measures):
+            partials.append(_cells(chunk, dimensions, measures))
+            if len(partials) >= 8:  # keep the partial cells small while reading
+                partials = [_merge_cells(partials)]
+        if not partials:
+            raise ValueError("The source has no rows")
+        return cls(_merge_cells(partials), dimensions, measures)
+
+    @property
+    def nbytes(self):
+        return int(self.cells.memory_usage(index=True, deep=True).sum())
+
+    def __len__(self):
+        return len(self.cells)
+
+    # 1. SLICING
+    # ----------------------------------------------------------------------------------------------------
+    def slice(self, **conditions):
+        """Keeps the cells where each dimension equals a value (or is in a list of values)"""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dimension, value in conditions.items():
+            if dimension not in self.dimensions:
+                raise KeyError(f"{dimension!r} is not a dimension of the cube ({self.dimensions})")
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            mask &= self.cells.index.get_level_values(dimension).isin(values)
+        return PivotCube(self.cells[mask], self.dimensions, self.measures)
+
+    # 2. ROLL-UPS
+    # ----------------------------------------------------------------------------------------------------
+    def rollup(self, by, values=None, aggfunc=('sum', 'count'), dropna=True):
+        """Same as raw_df.groupby(by, dropna=dropna)[values].agg(aggfunc), computed from the cells"""
+        by = [by] if isinstance(by, str) else list(by)
+        values = self.measures if values is None else [values] if isinstance(values, str) else list(values)
+        aggfunc = [aggfunc] if isinstance(aggfunc, str) else list(aggfunc)
+        unknown = set(by) - set(self.dimensions)
+        if unknown:
+            raise KeyError(f"Not dimensions of the cube: {sorted(unknown)} (cube has {self.dimensions})")
+        unsupported = set(aggfunc) - set(CUBE_AGGREGATIONS)
+        if unsupported:
+            raise ValueError(f"Unsupported aggregations: {sorted(unsupported)} (use {CUBE_AGGREGATIONS})")
+
+        statistics = [(value, statistic) for value in values for statistic in _CELL_STATISTICS]
+        merge = {key: _MERGE[key[1]] for key in statistics}
+        if by:
+            merged = self.cells[statistics].groupby(level=by, dropna=dropna, sort=True).agg(merge)
+        else:
+            merged = self.cells[statistics].agg(merge).to_frame().T
+
+        result = {}
+        for value in values:
+            for how in aggfunc:
+                if how == 'mean':
+                    count = merged[(value, 'count')]
+                    result[(value, how)] = merged[(value, 'sum')] / count.where(count > 0)
+                else:
+                    result[(value, how)] = merged[(value, how)]
+        return pd.DataFrame(result, index=merged.index)
+
+    def pivot(self, index, columns=None, values=None, aggfunc='mean', fill_value=None, dropna=True):
+        """Same as pd.pivot_table(raw_df, index, columns, values, aggfunc, fill_value, dropna), from the cells"""
+        if values is None:
+            raise ValueError(f"values is required (one or more of the measures {self.measures}): pivot_table "
+                             f"would also aggregate the other columns of the raw rows")
+        index = [index] if isinstance(index, str) else list(index)
+        column_keys = [] if columns is None else [columns] if isinstance(columns, str) else list(columns)
+        value_list = [values] if isinstance(values, str) else list(values)
+        functions = [aggfunc] if isinstance(aggfunc, str) else list(aggfunc)
+
+        rolled = self.rollup(index + column_keys, values=value_list, aggfunc=functions, dropna=dropna)
+        tables = []
+        for how in functions:
+            # One row per group: pivot_table only reshapes (fill_value, dropna, ordering stay pandas' own)
+            table = rolled.xs(how, axis=1, level=1).reset_index()
+            tables.append(pd.pivot_table(table, index=index, columns=columns, values=values, aggfunc='first',
+                                         fill_value=fill_value, dropna=dropna, observed=True))
+        if isinstance(aggfunc, str):
+            return tables[0]
+        return pd.concat(tables, keys=functions, axis=1)
+
+    # 3. PERSISTENCE
+    # ----------------------------------------------------------------------------------------------------
+    def save(self, path):
+        with open(path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            cube = pickle.load(file)
+        if not isinstance(cube, cls):
+            raise TypeError(f"{path} does not contain a saved {cls.__name__}")
+        return cube
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    n = 5_000_000
+    sales = pd.DataFrame({
+        'region': rng.choice(['North', 'South', 'East', 'West'], size=n),
+        'month': rng.integers(1, 13, size=n),
+        'customer_id': rng.integers(1, 200, size=n),
+        'sales': rng.uniform(50, 500, size=n).round(2),
+    })
+
+    start = time.perf_counter()
+    cube = PivotCube.build(sales, dimensions=['region', 'month', 'customer_id'], measures='sales')
+    print(f"Cube build: {time.perf_counter() - start:.2f} s, {len(cube):,} cells, {cube.nbytes / 1024**2:.2f} MB "
+          f"(raw rows: {sales.memory_usage(deep=True).sum() / 1024**2:.0f} MB)")
+
+    shapes = [dict(index=['region', 'month'], values='sales', aggfunc=['sum', 'mean', 'count'], fill_value=0),
+              dict(index='region', columns='month', values='sales', aggfunc='sum'),
+              dict(index='customer_id', columns='region', values='sales', aggfunc='max')]
+    for shape in shapes:
+        start = time.perf_counter()
+        expected = pd.pivot_table(sales, **shape)
+        raw_time = time.perf_counter() - start
+        start = time.perf_counter()
+        result = cube.pivot(**shape)
+        cube_time = time.perf_counter() - start
+        print(f"pivot_table {raw_time:.3f} s vs cube {cube_time:.3f} s, same: {np.allclose(result, expected)}")
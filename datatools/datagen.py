@@ -0,0 +1,255 @@
+# Reproducible synthetic sales data for benchmarks (the 7-row sales dict of 04_DATA/ETL.py, at any size):
+# - Three related tables: customers, orders and sales (the denormalised customer_id/name/sales/region
+#   layout of the `sales` table, plus order_id and order_date)
+# - Built on np.random.Generator: every block of `block_rows` rows has its own stream, spawned from one
+#   SeedSequence, so blocks are generated in parallel worker processes and the same seed and parameters
+#   always give the same rows, whatever the number of workers or the output format
+# - Configurable size, cardinality (customers, products, regions), skew (Zipf-like customer activity),
+#   null rate (missing amounts and names) and date range; order dates increase with order_id, like a log
+# - write() streams the blocks straight to CSV, JSON-lines, Parquet or SQLite without holding the table
+#
+# Example:
+#   generator = DataGenerator(seed=42, customers=100_000, skew=1.2, null_rate=0.01)
+#   generator.write('sales', rows=50_000_000, path='sales.parquet', workers=8)
+#   df = generator.frame('orders', rows=1_000_000)
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+GENERATED_TABLES = ('customers', 'orders', 'sales')
+FIRST_NAMES = ['Alice', 'Bob', 'Charlie', 'David', 'Eve', 'Frank', 'Grace', 'Heidi', 'Ivan', 'Judy',
+               'Mallory', 'Niaj', 'Olivia', 'Peggy', 'Rupert', 'Sybil', 'Trent', 'Victor', 'Walter', 'Zoe']
+LAST_NAMES = ['Smith', 'Jones', 'Garcia', 'Miller', 'Davis', 'Lopez', 'Wilson', 'Moore', 'Taylor', 'Clark']
+ORDER_STATUSES = ['completed', 'pending', 'cancelled', 'returned']
+STATUS_WEIGHTS = [0.85, 0.07, 0.05, 0.03]
+
+_customer_cache = {}  # per process: customer columns the sales blocks look names and regions up in
+
+
+class DataGenerator:
+    """Deterministic generator of the customers/orders/sales tables (see module header)"""
+
+    def __init__(self, seed=42, customers=10_000, products=1_000, regions=('North', 'South', 'East', 'West'),
+                 skew=1.1, null_rate=0.01, start='2024-01-01', days=730, block_rows=100_000):
+        self.seed = seed
+        self.customers = customers
+        self.products = products
+        self.regions = [f'Region {i}' for i in range(1, regions + 1)] if isinstance(regions, int) else list(regions)
+        self.skew = skew            # 0 = every customer equally active, higher = a few customers place most orders
+        self.null_rate = null_rate
+        self.start = pd.Timestamp(start)
+        self.days = days
+        self.block_rows = block_rows
+
+    def _key(self):
+        return (self.seed, self.customers, tuple(self.regions), self.null_rate, self.start, self.block_rows)
+
+    def _rng(self, table, block):
+        # Child stream `block` of the table's child of the root seed sequence (same as .spawn() would give)
+        sequence = np.random.SeedSequence(self.seed, spawn_key=(GENERATED_TABLES.index(table), block))
+        return np.random.default_rng(sequence)
+
+    # 1. TABLES
+    # ----------------------------------------------------------------------------------------------------
+    def _customers_block(self, rng, start, stop):
+        n = stop - start
+        names = (np.array(FIRST_NAMES, dtype=object)[rng.integers(0, len(FIRST_NAMES), n)] + ' '
+                 + np.array(LAST_NAMES, dtype=object)[rng.integers(0, len(LAST_NAMES), n)])
+        names[rng.random(n) < self.null_rate] = None
+        return pd.DataFrame({
+            'customer_id': np.arange(start + 1, stop + 1),
+            'name': names,
+            'region': np.array(self.regions, dtype=object)[rng.integers(0, len(self.regions), n)],
+            'signup_date': self.start - pd.to_timedelta(rng.integers(0, 3 * 365, n), unit='D'),
+            'segment': np.array(['consumer', 'business'], dtype=object)[(rng.random(n) < 0.2).astype(np.int8)],
+        })
+
+    def _customer_columns(self):
+        # The whole customers table, generated block by block exactly as write('customers') does
+        key = self._key()
+        if key not in _customer_cache:
+            blocks = [self.block('customers', block, self.customers) for block in range(self._blocks(self.customers))]
+            customers = pd.concat(blocks, ignore_index=True)
+            _customer_cache.clear()
+            _customer_cache[key] = (customers['name'].to_numpy(), customers['region'].to_numpy())
+        return _customer_cache[key]
+
+    def _customer_ids(self, rng, n):
+        # Zipf-like activity: customer k places orders with weight 1 / k ** skew
+        if not self.skew:
+            return rng.integers(1, self.customers + 1, n)
+        weights = 1.0 / np.arange(1, self.customers + 1) ** self.skew
+        cumulative = np.cumsum(weights)
+        return np.searchsorted(cumulative, rng.random(n) * cumulative[-1], side='right') + 1
+
+    def _orders_block(self, rng, start, stop, rows):
+        n = stop - start
+        # Order dates grow with the row number (jittered within the row's slot), spanning `days` for `rows` rows
+        slot = self.days * 86_400 / max(rows, 1)
+        seconds = (np.arange(start, stop) + rng.random(n)) * slot
+        quantity = rng.integers(1, 6, n)
+        unit_price = np.round(rng.lognormal(np.log(40), 0.8, n), 2)
+        return pd.DataFrame({
+            'order_id': np.arange(start + 1, stop + 1),
+            'customer_id': self._customer_ids(rng, n),
+            'order_date': self.start + pd.to_timedelta(seconds.astype(np.int64), unit='s'),
+            'product_id': rng.integers(1, self.products + 1, n),
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'status': np.array(ORDER_STATUSES, dtype=object)[rng.choice(len(ORDER_STATUSES), n, p=STATUS_WEIGHTS)],
+        })
+
+    def _sales_block(self, rng, start, stop, rows):
+        orders = self._orders_block(rng, start, stop, rows)
+        names, regions = self._customer_columns()
+        index = orders['customer_id'].to_numpy() - 1
+        amount = np.round(orders['quantity'] * orders['unit_price'], 2).to_numpy()
+        amount[rng.random(len(amount)) < self.null_rate] = np.nan
+        return pd.DataFrame({
+            'order_id': orders['order_id'],
+            'customer_id': orders['customer_id'],
+            'name': names[index],
+            'sales': amount,
+            'region': regions[index],
+            'order_date': orders['order_date'],
+        })
+
+    def _blocks(self, rows):
+        return -(-rows // self.block_rows)
+
+    def block(self, table, block, rows):
+        """Block number `block` of a `rows`-row table (the unit of parallelism and of reproducibility)"""
+        if table not in GENERATED_TABLES:
+            raise ValueError(f"Unknown table {table!r} (use {GENERATED_TABLES})")
+        start = block * self.block_rows
+        stop = min(start + self.block_rows, rows)
+        rng = self._rng(table, block)
+        if table == 'customers':
+            return self._customers_block(rng, start, stop)
+        if table == 'orders':
+            return self._orders_block(rng, start, stop, rows)
+        return self._sales_block(rng, start, stop, rows)
+
+    # 2. OUTPUT
+    # ----------------------------------------------------------------------------------------------------
+    def frames(self, table, rows=None, workers=1):
+        """
+        Yields the table block by block, in order (blocks are generated in `workers` processes).
+        The customers table always has `customers` rows.
+        """
+        rows = self.customers if table == 'customers' else rows
+        if rows is None:
+            raise ValueError(f"rows is required for the {table!r} table")
+        blocks = range(self._blocks(rows))
+        if workers and workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                # map() keeps the block order; chunksize hands each worker several blocks per message
+                yield from pool.map(_generate_block, [(self, table, block, rows) for block in blocks],
+                                    chunksize=max(len(blocks) // (4 * workers), 1))
+        else:
+            for block in blocks:
+                yield self.block(table, block, rows)
+
+    def frame(self, table, rows=None, workers=1):
+        """The whole table as one DataFrame"""
+        return pd.concat(self.frames(table, rows, workers), ignore_index=True)
+
+    def write(self, table, path, rows=None, workers=1, format=None, if_exists='replace'):
+        """
+        Streams the table to a file: CSV, JSON-lines, Parquet or SQLite (format from the extension:
+        .csv, .json/.jsonl, .parquet, .db/.sqlite; SQLite also accepts a sqlite:/// URL and uses `table` as name).
+        Returns the number of rows written.
+        """
+        path = os.fspath(path)
+        if format is None:
+            format = 'sqlite' if path.startswith('sqlite:') else _FORMATS.get(os.path.splitext(path)[1].lower())
+        if format not in _WRITERS:
+            raise ValueError(f"Unsupported output format for {path!r} (use csv, jsonl, parquet or sqlite)")
+        return _WRITERS[format](self.frames(table, rows, workers), path, table, if_exists)
+
+
+def _generate_block(arguments):
+    generator, table, block, rows = arguments
+    return generator.block(table, block, rows)
+
+
+# 3. WRITERS
+# --------------------------------------------------------------------------------------------------------
+def _write_csv(frames, path, table, if_exists):
+    written = 0
+    for frame in frames:
+        frame.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += len(frame)
+    return written
+
+
+def _write_jsonl(frames, path, table, if_exists):
+    written = 0
+    with open(path, 'w') as file:
+        for frame in frames:
+            file.write(frame.to_json(orient='records', lines=True, date_format='iso'))  # ends with a newline
+            written += len(frame)
+    return written
+
+
+def _write_parquet(frames, path, table, if_exists):
+    import pyarrow as pa  # pip install pyarrow
+    import pyarrow.parquet as pq
+
+    written = 0
+    writer = None
+    try:
+        for frame in frames:
+            batch = pa.Table.from_pandas(frame, schema=writer.schema if writer else None, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, batch.schema)
+            writer.write_table(batch)
+            written += len(frame)
+    finally:
+        if writer is not None:
+            writer.close()
+    return written
+
+
+def _write_sqlite(frames, path, table, if_exists):
+    from .db import get_engine, table_versions
+
+    engine = get_engine(path if path.startswith('sqlite:') else f'sqlite:///{path}')
+    written = 0
+    with engine.begin() as connection:  # one transaction for the whole table
+        for frame in frames:
+            frame.to_sql(table, con=connection, if_exists=if_exists if written == 0 else 'append', index=False)
+            written += len(frame)
+    engine.dispose()
+    table_versions.bump(table)
+    return written
+
+
+_FORMATS = {'.csv': 'csv', '.json': 'jsonl', '.jsonl': 'jsonl', '.parquet': 'parquet',
+            '.db': 'sqlite', '.sqlite': 'sqlite'}
+_WRITERS = {'csv': _write_csv, 'jsonl': _write_jsonl, 'parquet': _write_parquet, 'sqlite': _write_sqlite}
+
+
+if __name__ == "__main__":
+    import tempfile
+    import time
+
+    generator = DataGenerator(seed=42, customers=100_000, skew=1.2, null_rate=0.01)
+    for workers in (1, 4):
+        start = time.perf_counter()
+        sales = generator.frame('sales', rows=2_000_000, workers=workers)
+        print(f"2M sales rows with {workers} worker(s): {time.perf_counter() - start:.2f} s")
+    print(sales.head())
+    print("Reproducible:", sales.equals(DataGenerator(seed=42, customers=100_000, skew=1.2, null_rate=0.01)
+                                        .frame('sales', rows=2_000_000)))
+    top_share = sales['customer_id'].value_counts().head(100).sum() / len(sales)
+    print(f"Top 100 customers place {top_share:.0%} of the orders, missing amounts: {sales['sales'].isna().mean():.2%}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in ('sales.csv', 'sales.jsonl', 'sales.parquet', 'sales.db'):
+            start = time.perf_counter()
+            rows = generator.write('sales', os.path.join(directory, name), rows=500_000)
+            print(f"{name:<14} {rows:,} rows in {time.perf_counter() - start:.2f} s")
@@ -0,0 +1,62 @@
+# Shared database helpers used across the datatools package:
+# - The `sales` table definition from 04_DATA/Database Connections.py
+# - Engine creation for the local SQLite file (sales_data.db)
+# - Table reflection for any other table already stored in the database
+# - Per-table version counters that loaders bump on write (used to invalidate cached query results)
+
+import threading
+
+from sqlalchemy import create_engine, Table, Column, Integer, String, Float, MetaData
+
+DEFAULT_DB_URL = 'sqlite:///sales_data.db'
+
+metadata = MetaData()
+
+sales_table = Table('sales', metadata,
+                    Column('customer_id', Integer),
+                    Column('name', String),
+                    Column('sales', Float),
+                    Column('region', String)
+                )
+
+
+def get_engine(url=DEFAULT_DB_URL, echo=False):
+    """Creates a SQLAlchemy engine (echo=True shows SQL queries)"""
+    return create_engine(url, echo=echo)
+
+
+def get_table(engine, name):
+    """
+    Returns the Table object for `name`.
+    The known `sales` table is returned directly, any other table is reflected from the database.
+    """
+    if name == sales_table.name:
+        return sales_table
+    return Table(name, MetaData(), autoload_with=engine)
+
+
+class TableVersions:
+    """
+    Per-table version counters shared by loaders and caches.
+    Loaders call bump(table) after every write; caches compare versions to detect stale results.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, table):
+        return self._versions.get(table.lower(), 0)
+
+    def bump(self, table):
+        with self._lock:
+            key = table.lower()
+            self._versions[key] = self._versions.get(key, 0) + 1
+            return self._versions[key]
+
+    def snapshot(self, tables):
+        return {table.lower(): self.get(table) for table in tables}
+
+
+# Process-wide counters used by the datatools loaders (AsyncDatabase, IngestionService) and QueryCache
+table_versions = TableVersions()
@@ -0,0 +1,347 @@
+# Expression compiler for query/eval-style filters and derived columns (04_DATA/Pandas.py sections 7.4 and 8.3):
+#   df.query('sales > 200'),  df[(df['sales'] > 200) & (df['region'] == 'North')]
+# - The expression is parsed once into a small plan (column, constant, arithmetic, comparison, and/or/not, in)
+# - The plan is evaluated block by block (block_rows at a time), so every temporary array is block-sized
+#   and stays in cache instead of being allocated for the whole frame
+# - Pure numeric sub-expressions are fused into a single numexpr call per block when numexpr is installed
+# - Equality and `in` tests on category columns compare the integer codes, never the strings
+# - `and` skips the right-hand side for blocks where the left-hand side selected nothing
+#
+# Example:
+#   expression = compile_expression("sales > 200 and region == 'North'")
+#   north = filter_frame(df, expression)                  # same rows as df.query(...)
+#   df = assign_columns(df, sales_with_tax='sales * 1.21')
+
+import ast
+import operator
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    import numexpr
+except ImportError:  # pip install numexpr
+    numexpr = None
+
+BLOCK_ROWS = 65_536
+
+_ARITHMETIC = {ast.Add: ('+', operator.add), ast.Sub: ('-', operator.sub), ast.Mult: ('*', operator.mul),
+               ast.Div: ('/', operator.truediv), ast.FloorDiv: ('//', operator.floordiv),
+               ast.Mod: ('%', operator.mod), ast.Pow: ('**', operator.pow)}
+_COMPARISONS = {ast.Eq: ('==', operator.eq), ast.NotEq: ('!=', operator.ne), ast.Lt: ('<', operator.lt),
+                ast.LtE: ('<=', operator.le), ast.Gt: ('>', operator.gt), ast.GtE: ('>=', operator.ge)}
+_FLIPPED = {'==': '==', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+_FUNCTIONS = {'abs': np.abs, 'sqrt': np.sqrt, 'log': np.log, 'exp': np.exp}
+# A quoted string (kept as-is) or an `@name` variable reference outside quotes
+_VARIABLES = re.compile(r"""('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")|@(\w+)""")
+
+
+# 1. PARSING (expression text -> plan of nested tuples)
+# --------------------------------------------------------------------------------------------------------
+def _parse(node, variables):
+    if isinstance(node, ast.Expression):
+        return _parse(node.body, variables)
+    if isinstance(node, ast.Name):
+        if node.id.startswith('__var_'):
+            return ('const', variables[node.id[len('__var_'):]])
+        return ('column', node.id)
+    if isinstance(node, ast.Constant):
+        return ('const', node.value)
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        return ('const', [_constant(element, variables) for element in node.elts])
+    if isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+        return ('arith', _ARITHMETIC[type(node.op)][0], _parse(node.left, variables), _parse(node.right, variables))
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+        kind = 'and' if isinstance(node.op, ast.BitAnd) else 'or'
+        return (kind, [_parse(node.left, variables), _parse(node.right, variables)])
+    if isinstance(node, ast.BoolOp):
+        return ('and' if isinstance(node.op, ast.And) else 'or', [_parse(value, variables) for value in node.values])
+    if isinstance(node, ast.UnaryOp):
+        if isinstance(node.op, (ast.Not, ast.Invert)):
+            return ('not', _parse(node.operand, variables))
+        if isinstance(node.op, ast.USub):
+            return ('arith', '-', ('const', 0), _parse(node.operand, variables))
+        if isinstance(node.op, ast.UAdd):
+            return _parse(node.operand, variables)
+    if isinstance(node, ast.Compare):
+        # Chained comparisons (100 < sales <= 200) become an `and` of the pairs
+        parts = []
+        left = _parse(node.left, variables)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _parse(comparator, variables)
+            if isinstance(op, (ast.In, ast.NotIn)):
+                if right[0] != 'const':
+                    raise ValueError("`in` needs a list of constants on the right-hand side")
+                values = right[1] if isinstance(right[1], list) else [right[1]]
+                parts.append(('in', left, values, isinstance(op, ast.NotIn)))
+            elif type(op) in _COMPARISONS:
+                parts.append(('compare', _COMPARISONS[type(op)][0], left, right))
+            else:
+                raise ValueError(f"Unsupported comparison: {type(op).__name__}")
+            left = right
+        return parts[0] if len(parts) == 1 else ('and', parts)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in _FUNCTIONS:
+        return ('call', node.func.id, [_parse(argument, variables) for argument in node.args])
+    raise ValueError(f"Unsupported expression element: {ast.unparse(node)!r}")
+
+
+def _constant(node, variables):
+    parsed = _parse(node, variables)
+    if parsed[0] != 'const':
+        raise ValueError(f"Expected a constant, got {ast.unparse(node)!r}")
+    return parsed[1]
+
+
+class CompiledExpression:
+    """A parsed filter / derived-column expression; evaluate it on any frame with the referenced columns"""
+
+    def __init__(self, expression, variables=None):
+        self.expression = expression
+        # `@name` refers to a Python variable, like in DataFrame.query ('@' inside string literals is text)
+        source = _VARIABLES.sub(lambda m: m.group(1) or '__var_' + m.group(2), expression)
+        self.plan = _parse(ast.parse(source, mode='eval'), variables or {})
+
+    def __repr__(self):
+        return f"CompiledExpression({self.expression!r})"
+
+    @property
+    def columns(self):
+        """Column names the expression reads"""
+        found = []
+
+        def visit(node):
+            if node[0] == 'column':
+                found.append(node[1])
+            for child in node[1:]:
+                if isinstance(child, tuple):
+                    visit(child)
+                elif isinstance(child, list):
+                    for item in child:
+                        if isinstance(item, tuple):
+                            visit(item)
+        visit(self.plan)
+        return list(dict.fromkeys(found))
+
+    # 2. BINDING (plan + frame -> block evaluator)
+    # ----------------------------------------------------------------------------------------------------
+    def _bind(self, frame, use_numexpr):
+        missing = [name for name in self.columns if name not in frame.columns]
+        if missing:
+            raise KeyError(f"Columns {missing} used in {self.expression!r} are not in the frame")
+        return _Binder(frame, use_numexpr and numexpr is not None).bind(self.plan)
+
+    def evaluate(self, frame, block_rows=BLOCK_ROWS, use_numexpr=True):
+        """Value of the expression for every row, as a Series aligned with the frame"""
+        evaluator = self._bind(frame, use_numexpr)
+        out = None
+        for start in range(0, len(frame), block_rows):
+            stop = min(start + block_rows, len(frame))
+            block = np.broadcast_to(evaluator(start, stop), (stop - start,))
+            if out is None:
+                out = np.empty(len(frame), dtype=block.dtype)
+            elif block.dtype != out.dtype:  # e.g. int blocks followed by a float block
+                out = out.astype(np.result_type(out, block))
+            out[start:stop] = block
+        if out is None:
+            out = np.empty(0, dtype=bool)
+        return pd.Series(out, index=frame.index)
+
+    def mask(self, frame, block_rows=BLOCK_ROWS, use_numexpr=True):
+        """Boolean numpy mask of the rows the expression selects"""
+        evaluator = self._bind(frame, use_numexpr)
+        out = np.empty(len(frame), dtype=bool)
+        for start in range(0, len(frame), block_rows):
+            stop = min(start + block_rows, len(frame))
+            out[start:stop] = evaluator(start, stop)
+        return out
+
+
+class _Binder:
+    def __init__(self, frame, use_numexpr):
+        self.frame = frame
+        self.use_numexpr = use_numexpr
+        self.categoricals = {name for name in frame.columns
+                             if isinstance(frame[name].dtype, pd.CategoricalDtype)}
+        self._arrays = {}
+
+    def array(self, name):
+        # Column values as a numpy array (converted once, only when a plan node needs the values)
+        if name not in self._arrays:
+            series = self.frame[name]
+            if pd.api.types.is_extension_array_dtype(series.dtype) and name not in self.categoricals:
+                numeric = pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+                self._arrays[name] = (series.to_numpy(dtype=float, na_value=np.nan) if numeric
+                                      else series.to_numpy(dtype=object, na_value=None))
+            else:
+                self._arrays[name] = np.asarray(series)
+        return self._arrays[name]
+
+    def codes(self, name):
+        return self.frame[name].cat.codes.to_numpy(), self.frame[name].cat.categories
+
+    def bind(self, node):
+        if self.use_numexpr and node[0] not in ('column', 'const'):
+            text = self._numexpr_text(node)
+            if text is not None:
+                return self._bind_numexpr(text)
+
+        kind = node[0]
+        if kind == 'column':
+            array = self.array(node[1])
+            return lambda start, stop: array[start:stop]
+        if kind == 'const':
+            value = node[1]
+            return lambda start, stop: value
+        if kind == 'arith':
+            function = next(function for symbol, function in _ARITHMETIC.values() if symbol == node[1])
+            left, right = self.bind(node[2]), self.bind(node[3])
+            return lambda start, stop: function(left(start, stop), right(start, stop))
+        if kind == 'compare':
+            return self._bind_compare(*node[1:])
+        if kind == 'in':
+            return self._bind_in(*node[1:])
+        if kind == 'not':
+            operand = self.bind(node[1])
+            return lambda start, stop: ~np.asarray(operand(start, stop), dtype=bool)
+        if kind == 'and':
+            parts = [self.bind(part) for part in node[1]]
+
+            def evaluate_and(start, stop):
+                mask = np.array(parts[0](start, stop), dtype=bool)
+                for part in parts[1:]:
+                    if not mask.any():  # nothing left in this block: skip the remaining predicates
+                        break
+                    mask &= part(start, stop)
+                return mask
+            return evaluate_and
+        if kind == 'or':
+            parts = [self.bind(part) for part in node[1]]
+
+            def evaluate_or(start, stop):
+                mask = np.array(parts[0](start, stop), dtype=bool)
+                for part in parts[1:]:
+                    if mask.all():
+                        break
+                    mask |= part(start, stop)
+                return mask
+            return evaluate_or
+        if kind == 'call':
+            function = _FUNCTIONS[node[1]]
+            arguments = [self.bind(argument) for argument in node[2]]
+            return lambda start, stop: function(*(argument(start, stop) for argument in arguments))
+        raise ValueError(f"Unknown plan node {kind!r}")
+
+    # Comparisons: categorical codes, datetime constants, plain numpy
+    def _bind_compare(self, symbol, left, right):
+        if left[0] == 'const' and right[0] == 'column':
+            symbol, left, right = _FLIPPED[symbol], right, left
+        if left[0] == 'column' and right[0] == 'const':
+            name, value = left[1], right[1]
+            if name in self.categoricals and symbol in ('==', '!='):
+                codes, categories = self.codes(name)
+                code = categories.get_indexer([value])[0]
+                if code < 0:  # value is not a category: nothing is equal
+                    return lambda start, stop: np.full(stop - start, symbol == '!=')
+                compare = np.equal if symbol == '==' else np.not_equal
+                return lambda start, stop: compare(codes[start:stop], code)
+            if name not in self.categoricals and self.array(name).dtype.kind == 'M' and isinstance(value, str):
+                right = ('const', np.datetime64(pd.Timestamp(value)))
+        function = next(function for text, function in _COMPARISONS.values() if text == symbol)
+        left_values, right_values = self.bind(left), self.bind(right)
+        return lambda start, stop: function(left_values(start, stop), right_values(start, stop))
+
+    def _bind_in(self, operand, values, negate):
+        if operand[0] == 'column' and operand[1] in self.categoricals:
+            codes, categories = self.codes(operand[1])
+            wanted = categories.get_indexer(values)
+            wanted = wanted[wanted >= 0]
+            if any(pd.isna(value) for value in values):
+                wanted = np.append(wanted, -1)  # NaN is stored as code -1
+            return lambda start, stop: np.isin(codes[start:stop], wanted, invert=negate)
+        operand_values = self.bind(operand)
+        return lambda start, stop: pd.Series(operand_values(start, stop)).isin(values).to_numpy() ^ negate
+
+    # numexpr fusion of numeric sub-trees
+    def _numexpr_text(self, node):
+        kind = node[0]
+        if kind == 'column':
+            if node[1] in self.categoricals or self.array(node[1]).dtype.kind not in 'iuf':
+                return None
+            return node[1]
+        if kind == 'const':
+            value = node[1]
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return None
+            return repr(value)
+        if kind in ('arith', 'compare'):
+            if node[1] == '//':  # not available in numexpr
+                return None
+            left, right = self._numexpr_text(node[2]), self._numexpr_text(node[3])
+            return None if left is None or right is None else f'({left} {node[1]} {right})'
+        if kind in ('and', 'or'):
+            parts = [self._numexpr_text(part) for part in node[1]]
+            if any(part is None for part in parts):
+                return None
+            return '(' + (' & ' if kind == 'and' else ' | ').join(parts) + ')'
+        if kind == 'not' and node[1][0] in ('compare', 'and', 'or', 'not'):
+            operand = self._numexpr_text(node[1])
+            return None if operand is None else f'(~{operand})'
+        if kind == 'call':
+            arguments = [self._numexpr_text(argument) for argument in node[2]]
+            return None if None in arguments else f"{node[1]}({', '.join(arguments)})"
+        return None
+
+    def _bind_numexpr(self, text):
+        # numexpr caches the compiled program by text, so every block reuses it
+        names = {node.id for node in ast.walk(ast.parse(text, mode='eval')) if isinstance(node, ast.Name)}
+        arrays = {name: self.array(name) for name in names if name in self.frame.columns}
+        return lambda start, stop: numexpr.evaluate(
+            text, local_dict={name: array[start:stop] for name, array in arrays.items()})
+
+
+# 3. FRAME HELPERS
+# --------------------------------------------------------------------------------------------------------
+def compile_expression(expression, variables=None):
+    """Parses an expression once (variables: values for `@name` references)"""
+    return expression if isinstance(expression, CompiledExpression) else CompiledExpression(expression, variables)
+
+
+def filter_frame(frame, expression, variables=None, block_rows=BLOCK_ROWS):
+    """Same rows as frame.query(expression)"""
+    return frame[compile_expression(expression, variables).mask(frame, block_rows=block_rows)]
+
+
+def assign_columns(frame, variables=None, block_rows=BLOCK_ROWS, **expressions):
+    """Same as frame.assign(name=frame.eval(expression), ...), evaluated block by block"""
+    columns = {name: compile_expression(expression, variables).evaluate(frame, block_rows=block_rows)
+               for name, expression in expressions.items()}
+    return frame.assign(**columns)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    n = 10_000_000
+    df = pd.DataFrame({
+        'sales': rng.uniform(0, 500, size=n).round(2),
+        'quantity': rng.integers(1, 20, size=n),
+        'discount': rng.uniform(0, 0.3, size=n),
+        'region': pd.Categorical(rng.choice(['North', 'South', 'East', 'West'], size=n)),
+    })
+    text = "sales > 200 and quantity * (1 - discount) > 5 and region == 'North'"
+
+    start = time.perf_counter()
+    expected = df[(df['sales'] > 200) & (df['quantity'] * (1 - df['discount']) > 5) & (df['region'] == 'North')]
+    print(f"Boolean masks:  {time.perf_counter() - start:.3f} s")
+
+    start = time.perf_counter()
+    df.query(text)
+    print(f"DataFrame.query: {time.perf_counter() - start:.3f} s")
+
+    expression = compile_expression(text)
+    start = time.perf_counter()
+    result = filter_frame(df, expression)
+    print(f"Compiled ({'numexpr' if numexpr else 'numpy'} blocks): {time.perf_counter() - start:.3f} s")
+    print("Same rows:", result.equals(expected))
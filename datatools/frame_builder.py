@@ -0,0 +1,253 @@
+# Copy-free frame building (04_DATA/Pandas.py section 7.9 and the concat step of 04_DATA/ETL.py):
+# - pd.concat([df] * 1000) and `df = pd.concat([df, batch])` in a loop copy every block again;
+#   the loop version is quadratic in the number of batches
+# - FrameBuilder accumulates batches into preallocated column buffers that grow geometrically (amortised O(1)
+#   per row, a single allocation when the final size is known) and build() wraps the buffers without copying
+# - reserve() hands out writable views of the next rows, so producers fill the buffers in place (zero copy)
+# - backend='arrow' keeps the batches as Arrow record batches and materialises the frame once
+# - replicate_frame() is pd.concat([df] * times, ignore_index=True) with one allocation per column
+#
+# Example:
+#   builder = FrameBuilder(capacity=1_000_000)
+#   for batch in batches:
+#       builder.append(batch)
+#   df = builder.build()
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # pip install pyarrow
+    pa = None
+
+
+# 1. COLUMN BUFFERS
+# --------------------------------------------------------------------------------------------------------
+class _NumpyColumn:
+    """Growable numpy buffer (numbers, bools, naive datetimes, objects)"""
+
+    def __init__(self, dtype, capacity):
+        self.dtype = dtype
+        self.buffer = np.empty(capacity, dtype=dtype)
+
+    def reserve(self, length, needed):
+        if needed > len(self.buffer):
+            grown = np.empty(max(needed, 2 * len(self.buffer)), dtype=self.dtype)
+            grown[:length] = self.buffer[:length]
+            self.buffer = grown
+
+    def write(self, series, start):
+        self.buffer[start:start + len(series)] = series.to_numpy()
+
+    def finish(self, length):
+        return self.buffer[:length]
+
+
+class _CategoricalColumn(_NumpyColumn):
+    """Integer codes in a numpy buffer; categories of later batches are appended to the known ones"""
+
+    def __init__(self, dtype, capacity):
+        super().__init__(np.int32, capacity)
+        self.categories = dtype.categories
+        self.ordered = dtype.ordered
+
+    def write(self, series, start):
+        categorical = series.array
+        codes = categorical.codes
+        if categorical.categories is self.categories or categorical.categories.equals(self.categories):
+            self.buffer[start:start + len(codes)] = codes
+            return
+        if self.ordered:
+            raise TypeError("Ordered categorical batches must have the same categories")
+        self.categories = self.categories.append(categorical.categories.difference(self.categories, sort=False))
+        recode = self.categories.get_indexer(categorical.categories)
+        self.buffer[start:start + len(codes)] = np.where(codes >= 0, recode[codes], -1)
+
+    def finish(self, length):
+        return pd.Categorical.from_codes(self.buffer[:length], categories=self.categories, ordered=self.ordered)
+
+
+class _ExtensionColumn:
+    """Extension arrays (nullable integers, strings, tz-aware datetimes): pieces joined once in finish()"""
+
+    def __init__(self, dtype, capacity):
+        self.dtype = dtype
+        self.pieces = []
+
+    def reserve(self, length, needed):
+        pass
+
+    def write(self, series, start):
+        self.pieces.append(series.array)
+
+    def finish(self, length):
+        if len(self.pieces) > 1:
+            self.pieces = [type(self.pieces[0])._concat_same_type(self.pieces)]
+        return self.pieces[0] if self.pieces else pd.array([], dtype=self.dtype)
+
+
+def _make_column(dtype, capacity):
+    if isinstance(dtype, pd.CategoricalDtype):
+        return _CategoricalColumn(dtype, capacity)
+    if isinstance(dtype, np.dtype):
+        return _NumpyColumn(dtype, capacity)
+    return _ExtensionColumn(dtype, capacity)
+
+
+# 2. BUILDER
+# --------------------------------------------------------------------------------------------------------
+class FrameBuilder:
+    """Accumulates same-schema batches and materialises one DataFrame (with a RangeIndex) at the end"""
+
+    def __init__(self, capacity=1024, backend='numpy'):
+        if backend not in ('numpy', 'arrow'):
+            raise ValueError("backend must be 'numpy' or 'arrow'")
+        if backend == 'arrow' and pa is None:
+            raise ImportError("backend='arrow' needs pyarrow (pip install pyarrow)")
+        self.backend = backend
+        self.capacity = capacity
+        self.rows = 0
+        self._dtypes = None    # column name -> dtype, fixed by the first batch
+        self._columns = {}     # numpy backend: column name -> buffer
+        self._batches = []     # arrow backend: record batches
+        self._schema = None
+
+    def __len__(self):
+        return self.rows
+
+    def _start(self, batch):
+        # The first batch fixes the schema
+        self._dtypes = dict(batch.dtypes)
+        if self.backend == 'numpy':
+            self._columns = {name: _make_column(dtype, self.capacity) for name, dtype in self._dtypes.items()}
+
+    def _check_dtype(self, name, dtype):
+        expected = self._dtypes[name]
+        if dtype is expected or dtype == expected:
+            return
+        if (isinstance(dtype, pd.CategoricalDtype) and isinstance(expected, pd.CategoricalDtype)
+                and dtype.ordered == expected.ordered):
+            if dtype.ordered and not dtype.categories.equals(expected.categories):
+                raise TypeError(f"Column {name!r}: ordered categorical batches must have the same categories")
+            return  # new categories are merged by the column buffer
+        raise TypeError(f"Column {name!r} is {dtype} in this batch but {expected} in the first batch; "
+                        f"cast the batch first (pd.concat would silently upcast it)")
+
+    def append(self, batch):
+        """Copies a DataFrame batch into the buffers (or keeps it as an Arrow record batch)"""
+        if self._dtypes is None:
+            self._start(batch)
+        elif batch.columns.tolist() != list(self._dtypes):
+            raise ValueError(f"Batch columns {batch.columns.tolist()} differ from the first batch "
+                             f"{list(self._dtypes)}")
+
+        # Every column is checked before any is written, so a rejected batch leaves no trace
+        for name, dtype in batch.dtypes.items():
+            self._check_dtype(name, dtype)
+        if self.backend == 'arrow':
+            if len(batch):  # an empty batch would pin object columns to Arrow's null type
+                record_batch = pa.RecordBatch.from_pandas(batch, schema=self._schema, preserve_index=False)
+                self._schema = self._schema or record_batch.schema
+                self._batches.append(record_batch)
+        else:
+            needed = self.rows + len(batch)
+            for name, column in self._columns.items():
+                column.reserve(self.rows, needed)
+                column.write(batch[name], self.rows)
+        self.rows += len(batch)
+        return self
+
+    def reserve(self, rows):
+        """
+        Zero-copy path: returns {column: writable numpy view} for the next `rows` rows, to be filled in place.
+        Needs a schema (from a first append(), or from_schema()) with numpy columns only.
+        """
+        if self.backend != 'numpy' or self._dtypes is None:
+            raise ValueError("reserve() needs the numpy backend and a known schema")
+        if not all(type(column) is _NumpyColumn for column in self._columns.values()):
+            raise TypeError("reserve() only supports plain numpy columns (no categoricals or extension types)")
+        needed = self.rows + rows
+        views = {}
+        for name, column in self._columns.items():
+            column.reserve(self.rows, needed)
+            views[name] = column.buffer[self.rows:needed]
+        self.rows = needed
+        return views
+
+    @classmethod
+    def from_schema(cls, dtypes, capacity=1024):
+        """Builder with a declared schema ({column: dtype}), e.g. to use reserve() before any batch exists"""
+        builder = cls(capacity=capacity)
+        builder._start(pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in dtypes.items()}))
+        return builder
+
+    def build(self):
+        """The accumulated rows as one DataFrame; numpy buffers are wrapped, not copied"""
+        if self._dtypes is None:
+            return pd.DataFrame()
+        if self.backend == 'arrow' and not self._batches:
+            return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in self._dtypes.items()})
+        if self.backend == 'arrow':
+            table = pa.Table.from_batches(self._batches, schema=self._schema)
+            return table.to_pandas()
+        data = {name: column.finish(self.rows) for name, column in self._columns.items()}
+        return pd.DataFrame(data, copy=False)
+
+
+def build_frame(batches, capacity=1024, backend='numpy'):
+    """pd.concat(list(batches), ignore_index=True) through a FrameBuilder"""
+    builder = FrameBuilder(capacity=capacity, backend=backend)
+    for batch in batches:
+        builder.append(batch)
+    return builder.build()
+
+
+def replicate_frame(df, times):
+    """pd.concat([df] * times, ignore_index=True) with one allocation per column"""
+    data = {}
+    for name in df.columns:
+        series = df[name]
+        if isinstance(series.dtype, np.dtype):
+            # Reshaping the broadcast (read-only) view makes the single copy
+            data[name] = np.broadcast_to(series.to_numpy(), (times, len(series))).reshape(-1)
+        elif isinstance(series.dtype, pd.CategoricalDtype):
+            codes = np.broadcast_to(series.array.codes, (times, len(series))).reshape(-1)
+            data[name] = pd.Categorical.from_codes(codes, dtype=series.dtype, validate=False)
+        else:  # extension arrays: one take() builds the repeated array
+            data[name] = series.array.take(np.tile(np.arange(len(series)), times))
+    return pd.DataFrame(data, copy=False)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    batches = [pd.DataFrame({
+        'customer_id': rng.integers(1, 100_000, size=2_000),
+        'name': rng.choice(['Alice', 'Bob', 'Charlie', 'David', 'Eve'], size=2_000).astype(object),
+        'sales': rng.uniform(50, 500, size=2_000).round(2),
+        'region': pd.Categorical(rng.choice(['North', 'South', 'East', 'West'], size=2_000)),
+    }) for _ in range(1_000)]
+
+    start = time.perf_counter()
+    combined = batches[0]
+    for batch in batches[1:]:
+        combined = pd.concat([combined, batch], ignore_index=True)  # the quadratic accumulation loop
+    print(f"Repeated pd.concat:        {time.perf_counter() - start:.2f} s")
+
+    start = time.perf_counter()
+    single = pd.concat(batches, ignore_index=True)
+    print(f"One pd.concat of the list: {time.perf_counter() - start:.2f} s")
+
+    for backend in ('numpy', 'arrow') if pa is not None else ('numpy',):
+        start = time.perf_counter()
+        built = build_frame(batches, backend=backend)
+        print(f"FrameBuilder ({backend}):     {time.perf_counter() - start:.2f} s, same: {built.equals(single)}")
+
+    start = time.perf_counter()
+    expected = pd.concat([batches[0]] * 1000, ignore_index=True)
+    print(f"\npd.concat([df] * 1000):    {time.perf_counter() - start:.3f} s")
+    start = time.perf_counter()
+    replicated = replicate_frame(batches[0], 1000)
+    print(f"replicate_frame(df, 1000): {time.perf_counter() - start:.3f} s, same: {replicated.equals(expected)}")
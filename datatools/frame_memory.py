@@ -0,0 +1,194 @@
+# Automatic DataFrame memory optimiser (the manual steps of 04_DATA/Pandas.py sections 7.2, 8.1 and 8.8):
+# - Integer columns are downcast to the smallest integer type that holds them (int64 -> int8/16/32)
+# - Float columns become float32 when no value changes
+# - Low-cardinality string columns become categoricals, the rest use the compact string dtype
+#   (Arrow-backed when pyarrow is installed)
+# - Numeric strings ('1', '2', ...) become integers and date strings become datetime64
+# - Every conversion is verified: the column is converted back and must be identical to the original,
+#   otherwise it is left unchanged. restore_frame() performs the same reverse conversion for the whole frame.
+#
+# Example:
+#   optimized, report = optimize_frame(df)
+#   print(report)                                   # per-column memory before/after
+#   restore_frame(optimized, report).equals(df)     # True
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = 'string'
+
+
+def _column_bytes(series):
+    return int(series.memory_usage(index=False, deep=True))
+
+
+def _identical(a, b):
+    return a.dtype == b.dtype and a.equals(b)
+
+
+# 1. CONVERSIONS (each returns the new column and the detail needed to undo it)
+# --------------------------------------------------------------------------------------------------------
+def _downcast_integer(series):
+    return pd.to_numeric(series, downcast='integer'), None
+
+
+def _downcast_float(series):
+    values = series.to_numpy()
+    smaller = values.astype(np.float32)
+    if not np.array_equal(smaller.astype(values.dtype), values, equal_nan=True):
+        return series, None
+    return pd.Series(smaller, index=series.index, name=series.name), None
+
+
+def _numeric_strings(series):
+    values = series.dropna()
+    if not len(values) or len(values) != len(series) or not values.map(type).eq(str).all():
+        return None
+    try:
+        numbers = pd.to_numeric(values, downcast='integer')
+    except (ValueError, TypeError):
+        return None
+    if numbers.dtype.kind not in 'iu':
+        return None
+    return numbers, None
+
+
+def _date_strings(series):
+    values = series.dropna()
+    if not len(values) or not values.map(type).eq(str).all():
+        return None
+    date_format = guess_datetime_format(values.iloc[0])
+    if date_format is None:
+        return None
+    try:
+        dates = pd.to_datetime(series, format=date_format)
+    except (ValueError, TypeError):
+        return None
+    return dates, date_format
+
+
+def _strings(series, category_threshold):
+    values = series.dropna()
+    if not len(values) or not values.map(type).eq(str).all():
+        return None
+    if series.nunique(dropna=True) <= category_threshold * len(series):
+        return series.astype('category'), None
+    return series.astype(STRING_DTYPE), None
+
+
+def _restore_column(series, before_dtype, conversion, detail):
+    if conversion in ('integer', 'float'):
+        return series.astype(before_dtype)
+    if conversion == 'numeric string':
+        return series.astype(str).astype(before_dtype)
+    if conversion == 'date string':
+        restored = series.dt.strftime(detail).astype(object)
+    else:  # category / string
+        restored = series.astype(object)
+    # Missing values come back as NaN, like in a freshly loaded object column
+    return restored.where(series.notna(), np.nan).astype(before_dtype)
+
+
+# 2. OPTIMISER
+# --------------------------------------------------------------------------------------------------------
+def _candidates(series, category_threshold, parse_numbers, parse_dates):
+    # Conversions to try for one column, in order of preference
+    kind = series.dtype.kind
+    if kind in 'iu':
+        yield 'integer', _downcast_integer(series)
+    elif kind == 'f':
+        yield 'float', _downcast_float(series)
+    elif kind == 'O':
+        if parse_numbers:
+            yield 'numeric string', _numeric_strings(series)
+        if parse_dates:
+            yield 'date string', _date_strings(series)
+        converted = _strings(series, category_threshold)
+        if converted is not None:
+            yield ('category' if isinstance(converted[0].dtype, pd.CategoricalDtype) else 'string'), converted
+
+
+def optimize_frame(df, category_threshold=0.5, parse_numbers=True, parse_dates=True):
+    """
+    Returns (optimized DataFrame, per-column report).
+    category_threshold: a string column becomes categorical when unique values <= threshold * rows.
+    """
+    optimized = {}
+    rows = []
+    for name in df.columns:
+        series = df[name]
+        before = _column_bytes(series)
+        best, best_row = series, None
+
+        for conversion, result in _candidates(series, category_threshold, parse_numbers, parse_dates):
+            if result is None:
+                continue
+            converted, detail = result
+            if converted.dtype == series.dtype or _column_bytes(converted) >= before:
+                continue
+            # Round-trip guarantee: only keep the conversion if it can be undone exactly
+            if not _identical(_restore_column(converted, series.dtype, conversion, detail), series):
+                continue
+            best = converted
+            best_row = {'conversion': conversion, 'detail': detail}
+            break
+
+        optimized[name] = best
+        after = _column_bytes(best)
+        rows.append({
+            'column': name,
+            'before_dtype': series.dtype,
+            'after_dtype': best.dtype,
+            'before_bytes': before,
+            'after_bytes': after,
+            'saved_bytes': before - after,
+            'saved_pct': round(100 * (before - after) / before, 1) if before else 0.0,
+            **(best_row or {'conversion': 'unchanged', 'detail': None}),
+        })
+
+    result = pd.DataFrame(optimized, index=df.index)
+    report = pd.DataFrame(rows)
+    return result, report
+
+
+def restore_frame(optimized, report):
+    """Converts an optimized frame back to its original dtypes (identical to the input of optimize_frame)"""
+    restored = optimized.copy()
+    for row in report.itertuples(index=False):
+        if row.conversion != 'unchanged':
+            restored[row.column] = _restore_column(optimized[row.column], row.before_dtype, row.conversion,
+                                                   row.detail)
+    return restored
+
+
+def memory_summary(report):
+    """One-line total of a report: 'x MB -> y MB (z% saved)'"""
+    before = report['before_bytes'].sum()
+    after = report['after_bytes'].sum()
+    return (f"{before / 1024**2:.2f} MB -> {after / 1024**2:.2f} MB "
+            f"({100 * (before - after) / before if before else 0:.1f}% saved)")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(42)
+    n = 200_000
+    sales = pd.DataFrame({
+        'customer_id': rng.integers(1, 50_000, size=n).astype(str),
+        'name': [f'customer_{i}' for i in rng.integers(0, 150_000, size=n)],
+        'sales': rng.integers(50, 500, size=n).astype(float),
+        'region': rng.choice(['North', 'South', 'East', 'West'], size=n).astype(object),
+        'order_date': pd.Series(pd.date_range('2025-01-01', periods=365)).dt.strftime('%Y-%m-%d')
+                        .sample(n, replace=True, random_state=1).to_numpy(),
+        'quantity': rng.integers(1, 20, size=n),
+    })
+
+    optimized, report = optimize_frame(sales)
+    pd.set_option('display.width', 160)
+    print(report.drop(columns=['detail']))
+    print("\nTotal:", memory_summary(report))
+    print("Round trip identical:", restore_frame(optimized, report).equals(sales))
@@ -0,0 +1,236 @@
+# Grouped array computations without Python loops over groups (section 4 broadcasting of 04_DATA/Numpy.py,
+# applied per group):
+# - `for region in regions: out.append(f(values[keys == region]))` followed by np.vstack costs one Python
+#   iteration (and one boolean scan of the whole array) per group; with 100k+ groups the loop dominates
+# - GroupedArray sorts the rows by group key ONCE (codes from pd.factorize, np.lexsort for several keys) and
+#   keeps the order, group starts and counts; every operation is then a segment operation on contiguous
+#   groups: np.add.reduceat / np.minimum.reduceat / ..., np.repeat and one take() back to row order
+# - Reductions, per-row transforms, normalisations, per-group cumulative sums and per-group covariance
+#   matrices of feature columns; values are 1-d or 2-d (rows x features), and `out=` writes into
+#   preallocated arrays
+# - Missing keys (None/NaN) form their own group, like groupby(dropna=False); NaN values propagate as in NumPy
+#
+# Example:
+#   groups = GroupedArray(df['region'].to_numpy())
+#   totals = groups.reduce(features, 'sum')                # (ngroups, n_features)
+#   scaled = groups.normalize(features, 'zscore')          # per row, in the original order
+
+import numpy as np
+import pandas as pd
+
+GROUP_REDUCTIONS = ('sum', 'mean', 'count', 'min', 'max', 'prod', 'var', 'std', 'first', 'last')
+GROUP_NORMALIZATIONS = ('zscore', 'minmax', 'demean', 'share')
+
+_REDUCEAT = {'sum': np.add, 'prod': np.multiply, 'min': np.minimum, 'max': np.maximum}
+
+
+class GroupedArray:
+    """Rows grouped by one or more key arrays, sorted once (see module header)"""
+
+    def __init__(self, keys):
+        keys = list(keys) if isinstance(keys, (list, tuple)) else [keys]
+        codes, uniques = [], []
+        for key in keys:
+            key_codes, key_uniques = pd.factorize(np.asarray(key), sort=True, use_na_sentinel=False)
+            codes.append(key_codes)
+            uniques.append(np.asarray(key_uniques))
+        if len({len(key_codes) for key_codes in codes}) > 1:
+            raise ValueError("All key arrays must have the same length")
+
+        # Several keys: one combined code while the number of combinations fits in int64, else np.lexsort
+        sizes = [len(key_uniques) for key_uniques in uniques]
+        if len(codes) == 1 or np.prod(sizes, dtype=np.float64) < 2**62:
+            combined = np.ravel_multi_index(codes, sizes) if len(codes) > 1 else codes[0]
+            self.order = _stable_order(combined)
+        else:
+            self.order = np.lexsort(codes[::-1])  # the last key of np.lexsort is the primary one
+        rows = len(self.order)
+        boundary = np.zeros(rows, dtype=bool)
+        if rows:
+            boundary[0] = True
+            for key_codes in codes:
+                sorted_codes = key_codes[self.order]
+                boundary[1:] |= sorted_codes[1:] != sorted_codes[:-1]
+        self.starts = np.flatnonzero(boundary)
+        self.counts = np.diff(np.append(self.starts, rows))
+
+        # Group number of every row, in the original row order
+        self.labels = np.empty(rows, dtype=np.intp)
+        self.labels[self.order] = np.cumsum(boundary) - 1
+        first_rows = self.order[self.starts]
+        group_keys = [key_uniques[key_codes[first_rows]] for key_codes, key_uniques in zip(codes, uniques)]
+        self.keys = group_keys[0] if len(group_keys) == 1 else tuple(group_keys)
+
+    @property
+    def ngroups(self):
+        return len(self.starts)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _sorted(self, values):
+        values = np.asarray(values)
+        if values.shape[0] != len(self.order):
+            raise ValueError(f"values have {values.shape[0]} rows, the groups have {len(self.order)}")
+        return np.take(values, self.order, axis=0)  # much faster than values[self.order] for 2-d rows
+
+    @staticmethod
+    def _per_group(array, ndim):
+        # Broadcasts a per-group count against (ngroups, features) results
+        return array.reshape((-1,) + (1,) * (ndim - 1))
+
+    # 1. REDUCTIONS
+    # ----------------------------------------------------------------------------------------------------
+    def reduce(self, values, how='sum', ddof=1, out=None):
+        """One row per group (in the order of self.keys): sum/mean/count/min/max/prod/var/std/first/last"""
+        return self.aggregate(values, [how], ddof=ddof, out={how: out} if out is not None else None)[how]
+
+    def aggregate(self, values, statistics, ddof=1, out=None):
+        """{statistic: per-group array}, gathering the values into group order only once"""
+        unsupported = set(statistics) - set(GROUP_REDUCTIONS)
+        if unsupported:
+            raise ValueError(f"Unsupported reductions: {sorted(unsupported)} (use {GROUP_REDUCTIONS})")
+        ordered = self._sorted(values)
+        out = out or {}
+        results = {}
+        if not self.ngroups:
+            return {name: np.empty((0,) + ordered.shape[1:]) for name in statistics}
+
+        for name in statistics:
+            target = out.get(name)
+            if name in _REDUCEAT:
+                results[name] = _REDUCEAT[name].reduceat(ordered, self.starts, axis=0, out=target)
+            elif name == 'count':
+                counts = np.broadcast_to(self._per_group(self.counts, ordered.ndim), (self.ngroups,) + ordered.shape[1:])
+                results[name] = counts.copy() if target is None else _copy_into(target, counts)
+            elif name == 'first':
+                results[name] = np.take(ordered, self.starts, axis=0, out=target)
+            elif name == 'last':
+                results[name] = np.take(ordered, self.starts + self.counts - 1, axis=0, out=target)
+            elif name == 'mean':
+                sums = results.get('sum')
+                if sums is None:
+                    sums = np.add.reduceat(ordered, self.starts, axis=0, dtype=np.float64)
+                results[name] = np.divide(sums, self._per_group(self.counts, ordered.ndim), out=target)
+            else:  # var / std: second pass over the deviations from the group means (no cancellation)
+                means = results.get('mean')
+                if means is None:
+                    means = np.add.reduceat(ordered, self.starts, axis=0, dtype=np.float64)
+                    means /= self._per_group(self.counts, ordered.ndim)
+                deviations = ordered - np.repeat(means, self.counts, axis=0)
+                np.square(deviations, out=deviations)
+                squares = np.add.reduceat(deviations, self.starts, axis=0)
+                denominator = self._per_group(self.counts - ddof, ordered.ndim).astype(np.float64)
+                denominator[denominator <= 0] = np.nan
+                variance = np.divide(squares, denominator, out=target if name == 'var' else None)
+                results[name] = variance if name == 'var' else np.sqrt(variance, out=target)
+        return results
+
+    # 2. PER-ROW RESULTS
+    # ----------------------------------------------------------------------------------------------------
+    def broadcast(self, group_values, out=None):
+        """Per-group values (one row per group) repeated to every row of the group, in the original order"""
+        return np.take(group_values, self.labels, axis=0, out=out)
+
+    def transform(self, values, how='mean', ddof=1, out=None):
+        """Same as groupby(keys).transform(how): the group's reduction on every row"""
+        return self.broadcast(self.reduce(values, how, ddof=ddof), out=out)
+
+    def normalize(self, values, method='zscore', ddof=1, out=None):
+        """
+        Per-group normalisation of every row:
+        zscore (x - mean) / std, minmax (x - min) / (max - min), demean x - mean, share x / sum.
+        """
+        if method not in GROUP_NORMALIZATIONS:
+            raise ValueError(f"Unsupported normalisation {method!r} (use {GROUP_NORMALIZATIONS})")
+        values = np.asarray(values)
+        if out is None:
+            out = np.empty(values.shape, dtype=np.result_type(values.dtype, np.float64))
+        if method == 'share':
+            return np.divide(values, self.transform(values, 'sum'), out=out)
+        needed = {'zscore': ['mean', 'std'], 'minmax': ['min', 'max'], 'demean': ['mean']}[method]
+        stats = self.aggregate(values, needed, ddof=ddof)
+        center = stats['min'] if method == 'minmax' else stats['mean']
+        np.subtract(values, self.broadcast(center), out=out)
+        if method == 'zscore':
+            out /= self.broadcast(stats['std'])
+        elif method == 'minmax':
+            out /= self.broadcast(stats['max'] - stats['min'])
+        return out
+
+    def cumsum(self, values, out=None):
+        """Running sum within each group, in the original row order (groupby(keys).cumsum(): NaN rows stay NaN)"""
+        values = np.asarray(values)
+        if values.shape[0] != len(self.order):
+            raise ValueError(f"values have {values.shape[0]} rows, the groups have {len(self.order)}")
+        # The sum restarts at every group (pandas' grouped cumsum kernel): one global cumsum minus the total
+        # before each group would let a NaN or a huge value of one group leak into all the following groups
+        columns = pd.DataFrame(values.reshape(len(values), -1), copy=False)
+        running = columns.groupby(self.labels, sort=False).cumsum().to_numpy().reshape(values.shape)
+        if out is None:
+            return running
+        out[...] = running
+        return out
+
+    # 3. BATCHED MATRIX OPERATIONS
+    # ----------------------------------------------------------------------------------------------------
+    def cov(self, features, ddof=1):
+        """(ngroups, k, k) covariance matrix of the k feature columns within every group"""
+        ordered = self._sorted(features).astype(np.float64, copy=False)
+        if ordered.ndim != 2:
+            raise ValueError("cov() needs a 2-d (rows x features) array")
+        means = np.add.reduceat(ordered, self.starts, axis=0) / self.counts[:, None]
+        centered = ordered - np.repeat(means, self.counts, axis=0)
+        # Per-row outer products summed per group: X_g^T X_g for every group in one reduceat
+        products = np.einsum('ni,nj->nij', centered, centered)
+        scatter = np.add.reduceat(products, self.starts, axis=0)
+        denominator = (self.counts - ddof).astype(np.float64)
+        denominator[denominator <= 0] = np.nan
+        return scatter / denominator[:, None, None]
+
+
+def _stable_order(codes):
+    # LSD radix sort on 16-bit digits: NumPy's stable argsort is a radix sort for 16-bit integers (and a
+    # much slower timsort for wider ones)
+    if not len(codes):
+        return np.arange(0)
+    order = None
+    for shift in range(0, max(int(codes.max()).bit_length(), 1), 16):
+        digit = ((codes if order is None else codes[order]) >> shift & 0xFFFF).astype(np.uint16)
+        step = np.argsort(digit, kind='stable')
+        order = step if order is None else order[step]
+    return order
+
+
+def _copy_into(target, values):
+    target[...] = values
+    return target
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    n, groups = 2_000_000, 100_000
+    keys = rng.integers(0, groups, n)
+    features = rng.normal(size=(n, 4))
+
+    start = time.perf_counter()
+    grouped = GroupedArray(keys)
+    scaled = grouped.normalize(features, 'zscore')
+    means = grouped.reduce(features, 'mean')
+    print(f"GroupedArray (sort once + reduceat): {time.perf_counter() - start:.2f} s, {grouped.ngroups:,} groups")
+
+    frame = pd.DataFrame(features, columns=list('abcd')).assign(key=keys)
+    start = time.perf_counter()
+    by_key = frame.groupby('key')[list('abcd')]
+    expected_scaled = (frame[list('abcd')] - by_key.transform('mean')) / by_key.transform('std')
+    expected_means = by_key.mean()
+    print(f"pandas groupby transform:            {time.perf_counter() - start:.2f} s")
+    print("Same:", np.allclose(scaled, expected_scaled) and np.allclose(means, expected_means))
+
+    subset = keys < 500  # a Python loop over all 100k groups would take minutes: time 500 of them
+    start = time.perf_counter()
+    looped = [features[keys == key].mean(axis=0) for key in np.unique(keys[subset])]
+    print(f"Python loop over 500 groups:         {time.perf_counter() - start:.2f} s "
+          f"(x{groups // 500} for all groups)")
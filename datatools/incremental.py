@@ -0,0 +1,273 @@
+# Incremental rolling-window, cumulative and rank statistics over appended data
+# (04_DATA/Pandas.py sections 7.6 and 8.5, without recomputing the whole history for every new batch):
+# - Rolling windows keep only the last (window - 1) rows of every series as state
+# - Cumulative columns (cumsum, cumprod, cummax, cummin) keep one running value per series
+# - Ranks use an order-statistics structure holding every value seen so far (sorted blocks with
+#   batch inserts and O(log n) rank queries)
+# - Each update costs O(batch) (plus O(batch * log n) for ranks); the state can be saved and reloaded
+#   between runs
+# - The new columns of every batch equal what pandas returns for those rows when run over the full history
+#   (ranks are not revised for older rows when later values arrive)
+#
+# Example:
+#   stats = IncrementalStats(by='customer_id',
+#                            rolling_sales_3=('sales', 'rolling_mean', 3),
+#                            cum_sales=('sales', 'cumsum'),
+#                            sales_rank=('sales', 'rank', {'ascending': False}))
+#   today = stats.update(new_rows)     # new_rows with the three columns added
+#   stats.save('sales_stats.pkl')      # tomorrow: IncrementalStats.load('sales_stats.pkl').update(...)
+
+import pickle
+
+import numpy as np
+import pandas as pd
+
+ROLLING = ('sum', 'mean', 'min', 'max', 'std', 'var', 'median', 'count')
+CUMULATIVE = ('cumsum', 'cumprod', 'cummax', 'cummin')
+RANK_METHODS = ('average', 'min', 'max')
+
+# The aggregate that carries a cumulative column from one batch to the next
+_RUNNING_AGGREGATE = {'cumsum': 'sum', 'cumprod': 'prod', 'cummax': 'max', 'cummin': 'min'}
+
+
+# 1. ORDER STATISTICS
+# --------------------------------------------------------------------------------------------------------
+class OrderStatistics:
+    """Sorted multiset of numbers stored as sorted blocks: batch inserts and rank counts in O(log n) per value"""
+
+    def __init__(self, block_size=4096):
+        self.block_size = block_size
+        self._blocks = []
+        self._maxes = np.empty(0)
+        self._offsets = np.zeros(1, dtype=np.int64)  # number of values before each block (+ total at the end)
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def insert(self, values):
+        values = np.sort(np.asarray(values, dtype=float))
+        values = values[~np.isnan(values)]
+        if not len(values):
+            return
+        if not self._blocks:
+            self._blocks = [values[start:start + self.block_size]
+                            for start in range(0, len(values), self.block_size)]
+        else:
+            # Values above the largest one go to the last block
+            targets = np.minimum(np.searchsorted(self._maxes, values, side='left'), len(self._blocks) - 1)
+            bounds = np.flatnonzero(np.diff(targets)) + 1
+            blocks = list(self._blocks)
+            for part in np.split(np.arange(len(values)), bounds):
+                target = targets[part[0]]
+                blocks[target] = np.sort(np.concatenate([blocks[target], values[part]]), kind='mergesort')
+            self._blocks = []
+            for block in blocks:
+                if len(block) > 2 * self.block_size:  # split blocks that grew too large
+                    self._blocks.extend(block[start:start + self.block_size]
+                                        for start in range(0, len(block), self.block_size))
+                else:
+                    self._blocks.append(block)
+        self._maxes = np.array([block[-1] for block in self._blocks])
+        self._offsets = np.concatenate([[0], np.cumsum([len(block) for block in self._blocks])])
+
+    def _count(self, values, side):
+        values = np.asarray(values, dtype=float)
+        blocks = np.searchsorted(self._maxes, values, side=side)
+        counts = self._offsets[blocks].astype(float)
+        for block in np.unique(blocks[blocks < len(self._blocks)]):
+            hit = blocks == block
+            counts[hit] += np.searchsorted(self._blocks[block], values[hit], side=side)
+        return counts
+
+    def count_less(self, values):
+        """Number of stored values < each of `values`"""
+        return self._count(values, 'left')
+
+    def count_less_equal(self, values):
+        """Number of stored values <= each of `values`"""
+        return self._count(values, 'right')
+
+    def kth(self, k):
+        """The k-th smallest stored value (0-based)"""
+        block = int(np.searchsorted(self._offsets, k, side='right')) - 1
+        return self._blocks[block][k - self._offsets[block]]
+
+    def rank(self, values, ascending=True, method='average'):
+        """pandas Series.rank of `values` among the stored values (which must include them)"""
+        values = np.asarray(values, dtype=float)
+        less = self.count_less(values)
+        equal = self.count_less_equal(values) - less
+        before = less if ascending else len(self) - less - equal
+        ranks = {'min': before + 1, 'max': before + equal, 'average': before + (equal + 1) / 2}[method]
+        return np.where(np.isnan(values), np.nan, ranks)
+
+
+# 2. INCREMENTAL OPERATOR
+# --------------------------------------------------------------------------------------------------------
+def _parse_spec(label, spec):
+    column, how, *options = spec
+    if how.startswith('rolling_') and how[len('rolling_'):] in ROLLING:
+        if len(options) != 1 or not isinstance(options[0], int) or options[0] < 1:
+            raise ValueError(f"{label}: rolling statistics need a window size, e.g. ('sales', '{how}', 3)")
+        return column, how, options[0]
+    if how in CUMULATIVE and not options:
+        return column, how, None
+    if how == 'rank':
+        rank_options = {'ascending': True, 'method': 'average', **(options[0] if options else {})}
+        if rank_options['method'] not in RANK_METHODS:
+            raise ValueError(f"{label}: rank method must be one of {RANK_METHODS}")
+        return column, how, rank_options
+    raise ValueError(f"{label}: unsupported statistic {how!r} "
+                     f"(rolling_<{'|'.join(ROLLING)}>, {', '.join(CUMULATIVE)} or rank)")
+
+
+class IncrementalStats:
+    """Stateful rolling/cumulative/rank columns for batches appended to one or more series (see module header)"""
+
+    def __init__(self, by=None, **stats):
+        if not stats:
+            raise ValueError("At least one statistic is required, e.g. cum_sales=('sales', 'cumsum')")
+        self.by = [by] if isinstance(by, str) else list(by or [])
+        self.stats = {label: _parse_spec(label, spec) for label, spec in stats.items()}
+        self.rows_seen = 0
+        self._tail = None     # last (largest window - 1) rows of every series
+        self._running = {}    # label -> Series of running values indexed by series key
+        self._ranks = {}      # label -> {series key: OrderStatistics}
+
+    def _keys(self, frame):
+        # Series keys: the `by` columns, or a single series for the whole frame
+        if self.by:
+            return [frame[column] for column in self.by]
+        return [pd.Series(0, index=frame.index, name='__series__')]
+
+    def _key_index(self, frame):
+        if len(self.by) > 1:
+            return pd.MultiIndex.from_frame(frame[self.by])
+        return pd.Index(self._keys(frame)[0])
+
+    def _rolling(self, batch):
+        windows = [window for _, how, window in self.stats.values() if how.startswith('rolling_')]
+        if not windows:
+            return {}
+        columns = list(dict.fromkeys(self.by + [column for column, how, _ in self.stats.values()
+                                                if how.startswith('rolling_')]))
+        combined = pd.concat([self._tail, batch[columns]], ignore_index=True) if self._tail is not None \
+            else batch[columns].reset_index(drop=True)
+        start = len(combined) - len(batch)
+        grouped = combined.groupby(self._keys(combined), sort=False)
+
+        results = {}
+        for label, (column, how, window) in self.stats.items():
+            if how.startswith('rolling_'):
+                values = grouped[column].rolling(window).agg(how[len('rolling_'):])
+                # Back to row positions (rows with a missing key are not in any series and stay NaN)
+                values = values.reset_index(level=list(range(values.index.nlevels - 1)), drop=True)
+                results[label] = values.reindex(range(len(combined))).to_numpy()[start:]
+        self._tail = grouped.tail(max(windows) - 1).reset_index(drop=True)
+        return results
+
+    def _cumulative(self, label, column, how, batch):
+        keys = self._keys(batch)
+        within = getattr(batch.groupby(keys, sort=False)[column], how)()  # cumulative inside the batch
+        totals = getattr(batch.groupby(keys)[column], _RUNNING_AGGREGATE[how])()
+        running = self._running.get(label)
+        if running is None:
+            self._running[label] = totals
+            return within.to_numpy()
+
+        # Continue from each series' running value (series seen for the first time start from the identity)
+        if how in ('cumsum', 'cumprod'):
+            identity = 0 if how == 'cumsum' else 1
+        else:
+            bounds = np.iinfo(running.dtype) if running.dtype.kind in 'iu' else None
+            if how == 'cummax':
+                identity = bounds.min if bounds else -np.inf
+            else:
+                identity = bounds.max if bounds else np.inf
+        previous = running.reindex(self._key_index(batch), fill_value=identity).to_numpy()
+        current = within.to_numpy()
+        if how == 'cumsum':
+            values = current + previous
+        elif how == 'cumprod':
+            values = current * previous
+        else:  # missing values stay missing, like in pandas
+            combine = np.fmax if how == 'cummax' else np.fmin
+            values = np.where(within.isna(), current, combine(current, previous))
+        merged = pd.concat([running, totals])
+        self._running[label] = merged.groupby(level=list(range(merged.index.nlevels))).agg(
+            _RUNNING_AGGREGATE[how])
+        return values
+
+    def _rank(self, label, column, options, batch):
+        structures = self._ranks.setdefault(label, {})
+        ranks = np.full(len(batch), np.nan)
+        for key, positions in batch.groupby(self._keys(batch), sort=False).indices.items():
+            values = batch[column].to_numpy()[positions]
+            structure = structures.setdefault(key, OrderStatistics())
+            structure.insert(values)  # the batch itself counts, like pandas ranking the full history
+            ranks[positions] = structure.rank(values, ascending=options['ascending'], method=options['method'])
+        return ranks
+
+    def update(self, batch):
+        """Returns the batch with the statistic columns added and advances the state past it"""
+        batch = batch.copy()
+        results = self._rolling(batch)
+        for label, (column, how, options) in self.stats.items():
+            if how in CUMULATIVE:
+                results[label] = self._cumulative(label, column, how, batch)
+            elif how == 'rank':
+                results[label] = self._rank(label, column, options, batch)
+        for label in self.stats:  # keep the order the statistics were declared in
+            batch[label] = results[label]
+        self.rows_seen += len(batch)
+        return batch
+
+    # 3. PERSISTENCE
+    # ----------------------------------------------------------------------------------------------------
+    def save(self, path):
+        """Writes the whole state (specification, window tails, running values, rank structures)"""
+        with open(path, 'wb') as file:
+            pickle.dump(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            stats = pickle.load(file)
+        if not isinstance(stats, cls):
+            raise TypeError(f"{path} does not contain a saved {cls.__name__}")
+        return stats
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    days = pd.date_range('2020-01-01', periods=5 * 365, freq='D')
+    history = pd.DataFrame({
+        'order_date': np.repeat(days, 200),
+        'customer_id': np.tile(np.arange(200), len(days)),
+        'sales': rng.uniform(50, 500, size=200 * len(days)).round(2),
+    })
+    spec = dict(rolling_sales_3=('sales', 'rolling_mean', 3), cum_sales=('sales', 'cumsum'),
+                sales_rank=('sales', 'rank', {'ascending': False}))
+
+    stats = IncrementalStats(by='customer_id', **spec)
+    stats.update(history[history['order_date'] < days[-1]])
+    today = history[history['order_date'] == days[-1]]
+
+    start = time.perf_counter()
+    incremental = stats.update(today)
+    print(f"Incremental update of one day ({len(today)} rows): {time.perf_counter() - start:.4f} s")
+
+    start = time.perf_counter()
+    grouped = history.groupby('customer_id')['sales']
+    full = history.assign(
+        rolling_sales_3=grouped.rolling(3).mean().reset_index(level=0, drop=True),
+        cum_sales=grouped.cumsum(),
+        sales_rank=grouped.rank(ascending=False),
+    )
+    print(f"Full recomputation ({len(history):,} rows): {time.perf_counter() - start:.4f} s")
+
+    expected = full[full['order_date'] == days[-1]]
+    print("Same as the full recomputation:",
+          all(np.allclose(incremental[label], expected[label], equal_nan=True) for label in spec))
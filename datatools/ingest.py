@@ -0,0 +1,267 @@
+# Single-writer ingestion service for SQLite:
+# - SQLite allows only one writer at a time, so many workers inserting directly end up with
+#   "database is locked" errors and retries
+# - Producers (threads or processes) put row batches on a bounded queue instead
+# - ONE writer thread coalesces queued batches into large transactions, flushing when `max_rows`
+#   rows are collected or `max_delay` seconds have passed since the first batch arrived
+# - A full queue blocks the producer (back-pressure) and every batch gets an acknowledgement:
+#   a Future for threads, a (batch_id, rows, error) message for processes
+#
+# Example:
+#   with IngestionService('sqlite:///sales_data.db', table='sales') as service:
+#       ack = service.submit(df)        # from any thread
+#       ack.result()                    # rows written, or raises the insert error
+
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+from sqlalchemy import insert, text
+
+from .db import DEFAULT_DB_URL, get_engine, get_table, table_versions
+
+_STOP = object()  # sentinel that tells the worker threads to finish
+
+
+class IngestionError(Exception):
+    """Raised in a producer when its batch could not be written"""
+
+
+def _to_records(rows, columns):
+    # Normalises a DataFrame, a list of dicts or a list of tuples into a list of dicts
+    if isinstance(rows, pd.DataFrame):
+        records = rows.to_dict('records')
+    else:
+        records = [row if isinstance(row, dict) else dict(zip(columns, row)) for row in rows]
+    unknown = set().union(*records) - set(columns) if records else set()
+    if unknown:
+        raise ValueError(f"Unknown columns for this table: {sorted(unknown)}")
+    return records
+
+
+class IngestionService:
+    """Accepts row batches from many producers and writes them through a single writer thread"""
+
+    def __init__(self, url=DEFAULT_DB_URL, table='sales', max_rows=10_000, max_delay=0.2,
+                 max_pending=64, engine=None):
+        self.engine = engine if engine is not None else get_engine(url)
+        self.table = get_table(self.engine, table)
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.stats = {'batches': 0, 'rows': 0, 'transactions': 0, 'failed_batches': 0}
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._writer = threading.Thread(target=self._write_loop, name='ingest-writer', daemon=True)
+        self._manager = None  # created lazily by client() for multi-process producers
+        self._remote = None
+        self._acks = {}
+        self._bridge = None
+        self._client_ids = itertools.count()
+
+    # 1. PRODUCER API (threads)
+    # ----------------------------------------------------------------------------------------------------
+    def submit(self, rows, timeout=None):
+        """
+        Queues a batch (DataFrame, list of dicts or list of tuples) and returns a Future with the row count.
+        Blocks while the queue is full; raises queue.Full if `timeout` seconds pass first.
+        """
+        if not self._writer.is_alive():
+            raise RuntimeError("IngestionService is not running (call start() or use it as a context manager)")
+        future = Future()
+        records = _to_records(rows, self.table.c.keys())
+        self._queue.put((records, future), timeout=timeout)
+        return future
+
+    def write(self, rows, timeout=None):
+        """Queues a batch and waits for its acknowledgement"""
+        future = self.submit(rows, timeout=timeout)
+        return future.result(timeout=timeout)
+
+    # 2. PRODUCER API (processes)
+    # ----------------------------------------------------------------------------------------------------
+    def client(self):
+        """
+        Returns a picklable IngestClient to pass to a worker process.
+        Call it in the parent process before starting the workers.
+        """
+        if self._manager is None:
+            self._manager = multiprocessing.Manager()
+            self._remote = self._manager.Queue(maxsize=self.max_pending)
+            self._bridge = threading.Thread(target=self._bridge_loop, name='ingest-bridge', daemon=True)
+            self._bridge.start()
+        client_id = next(self._client_ids)
+        self._acks[client_id] = self._manager.Queue()
+        return IngestClient(client_id, self._remote, self._acks[client_id])
+
+    def _bridge_loop(self):
+        # Moves batches from worker processes into the local writer queue and sends back acks
+        while True:
+            item = self._remote.get()
+            if item is None:
+                break
+            client_id, batch_id, rows = item
+            acks = self._acks[client_id]
+
+            def send_ack(future, batch_id=batch_id, acks=acks):
+                error = future.exception()
+                acks.put((batch_id, 0 if error else future.result(), None if error is None else str(error)))
+
+            try:
+                self.submit(rows).add_done_callback(send_ack)
+            except Exception as exc:  # e.g. unknown columns or a malformed row: refuse this batch, keep bridging
+                acks.put((batch_id, 0, f"{type(exc).__name__}: {exc}"))
+
+    # 3. SINGLE WRITER
+    # ----------------------------------------------------------------------------------------------------
+    def _write_loop(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            pending_rows = len(item[0])
+            deadline = time.monotonic() + self.max_delay
+
+            # Coalesce more batches until the size or time threshold is reached
+            while pending_rows < self.max_rows:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                pending_rows += len(item[0])
+
+            self._flush(batch)
+
+    def _insert(self, records):
+        with self.engine.begin() as conn:
+            if records:
+                conn.execute(insert(self.table), records)
+        table_versions.bump(self.table.name)
+        self.stats['transactions'] += 1
+
+    def _flush(self, batch):
+        try:
+            self._insert([record for records, _ in batch for record in records])
+        except Exception:
+            # Retry batch by batch so one bad batch does not fail everybody else's rows
+            for records, future in batch:
+                self._flush_one(records, future)
+            return
+        for records, future in batch:
+            self.stats['batches'] += 1
+            self.stats['rows'] += len(records)
+            future.set_result(len(records))
+
+    def _flush_one(self, records, future):
+        try:
+            self._insert(records)
+        except Exception as exc:
+            self.stats['failed_batches'] += 1
+            future.set_exception(IngestionError(f"Batch of {len(records)} rows failed: {exc}"))
+        else:
+            self.stats['batches'] += 1
+            self.stats['rows'] += len(records)
+            future.set_result(len(records))
+
+    # 4. LIFECYCLE
+    # ----------------------------------------------------------------------------------------------------
+    def start(self):
+        """Starts the writer thread (WAL mode lets readers keep working while it writes)"""
+        if self.engine.dialect.name == 'sqlite':
+            with self.engine.connect() as conn:
+                conn.execute(text('PRAGMA journal_mode=WAL'))
+        self._writer.start()
+        return self
+
+    def close(self):
+        """Drains every queued batch, then stops the worker threads"""
+        if self._bridge is not None:
+            self._remote.put(None)
+            self._bridge.join()
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+class IngestClient:
+    """Picklable producer handle for worker processes (created with IngestionService.client())"""
+
+    def __init__(self, client_id, requests, acks):
+        self.client_id = client_id
+        self._requests = requests
+        self._acks = acks
+        self._batch_ids = itertools.count()
+        self._received = {}
+
+    def submit(self, rows, timeout=None):
+        """Sends a batch to the service and returns its batch id (blocks while the queue is full)"""
+        batch_id = next(self._batch_ids)
+        self._requests.put((self.client_id, batch_id, rows), timeout=timeout)
+        return batch_id
+
+    def wait(self, batch_id, timeout=None):
+        """Waits for the acknowledgement of `batch_id` and returns the rows written"""
+        while batch_id not in self._received:
+            ack_id, rows, error = self._acks.get(timeout=timeout)
+            self._received[ack_id] = (rows, error)
+        rows, error = self._received.pop(batch_id)
+        if error is not None:
+            raise IngestionError(error)
+        return rows
+
+    def write(self, rows, timeout=None):
+        """Sends a batch and waits for its acknowledgement"""
+        return self.wait(self.submit(rows, timeout=timeout), timeout=timeout)
+
+
+if __name__ == "__main__":
+    from concurrent.futures import ThreadPoolExecutor
+
+    from sqlalchemy import create_engine
+
+    engine = create_engine('sqlite:///ingest_demo.db')
+    with engine.begin() as conn:
+        conn.execute(text('DROP TABLE IF EXISTS sales'))
+        conn.execute(text('CREATE TABLE sales (customer_id INTEGER, name TEXT, sales REAL, region TEXT)'))
+
+    def producer(worker_id, service):
+        # Each worker sends 50 batches of 200 rows and waits for all the acks
+        acks = []
+        for batch in range(50):
+            rows = [(worker_id * 100_000 + batch * 200 + i, f'customer_{i}', 10.0 * i, 'North')
+                    for i in range(200)]
+            acks.append(service.submit(rows))
+        return sum(ack.result() for ack in acks)
+
+    start = time.perf_counter()
+    with IngestionService(engine=engine, table='sales') as service:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            written = sum(pool.map(producer, range(8), [service] * 8))
+    elapsed = time.perf_counter() - start
+
+    print(f"Rows acknowledged: {written}")
+    print(f"Writer stats: {service.stats}")
+    print(f"Throughput: {written / elapsed:,.0f} rows/second")
@@ -0,0 +1,313 @@
+# Join engine for large key joins (section 4 of 04_DATA/Pandas.py: pd.merge(df, orders, on='customer_id')):
+# - Join keys must have the same dtype on both sides: pd.merge would silently match strings against an
+#   object column of mixed values (or refuse int64 vs object), here a TypeError says which side to cast
+# - The strategy is picked from the input size and sortedness:
+#     sort_merge: both sides already sorted on a single key, indexers come from a binary-search merge
+#                 (no hash table is built)
+#     hash:       the smaller (build) side fits in memory_limit, pandas' own hash join is used; a larger
+#                 side given as a file path is streamed in chunks against the in-memory build side
+#     spill:      Grace hash join, both sides are hash partitioned to disk in chunks and each partition pair
+#                 is joined in memory (also accepts CSV / JSON-lines / Parquet paths)
+# - Every strategy returns exactly what pd.merge returns: same rows, same dtypes and, for single- and multi-key
+#   joins alike, the same row order as pandas >= 2.2 (inner/left: left rows in order; right: right rows; outer:
+#   sorted keys). Older pandas grouped inner joins by key, so the order matches only from 2.2 on
+#
+# Example:
+#   result = join_frames(df, orders, on='customer_id', how='left', memory_limit=2 * 1024**3)
+#   choose_join_strategy(df, orders, on='customer_id')   # 'sort_merge' / 'hash' / 'spill'
+
+import math
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .chunked_groupby import iter_chunks
+from .query_builder import read_file
+
+JOIN_TYPES = ('inner', 'left', 'right', 'outer')
+STRATEGIES = ('auto', 'sort_merge', 'hash', 'spill')
+
+# Row numbers carried through the spilled partitions to restore pd.merge's row order at the end
+LEFT_ROW = '__left_row'
+RIGHT_ROW = '__right_row'
+
+
+# 1. KEY CHECKS
+# --------------------------------------------------------------------------------------------------------
+def check_key_dtypes(left, right, on):
+    """Raises TypeError when a join key has a different dtype (or different values type) on each side"""
+    for key in on:
+        left_dtype, right_dtype = left[key].dtype, right[key].dtype
+        if left_dtype != right_dtype:
+            raise TypeError(f"Join key {key!r} is {left_dtype} on the left but {right_dtype} on the right; "
+                            f"cast one side first, e.g. right[{key!r}] = right[{key!r}].astype('{left_dtype}')")
+        if left_dtype == object:
+            # object columns can hold anything: '1' never matches 1, so compare what is inside
+            left_kind = pd.api.types.infer_dtype(left[key], skipna=True)
+            right_kind = pd.api.types.infer_dtype(right[key], skipna=True)
+            if 'empty' not in (left_kind, right_kind) and left_kind != right_kind:
+                raise TypeError(f"Join key {key!r} holds {left_kind} values on the left but {right_kind} "
+                                f"values on the right; convert both sides to the same type first")
+
+
+def _is_sorted(frame, on):
+    if len(on) != 1:
+        return False
+    keys = frame[on[0]]
+    return keys.dtype.kind in 'iufmM' and not keys.hasnans and keys.is_monotonic_increasing
+
+
+def _frame_bytes(source):
+    if isinstance(source, pd.DataFrame):
+        return int(source.memory_usage(index=True, deep=True).sum())
+    return os.path.getsize(source)
+
+
+def _head(source, rows=1_000):
+    return source.iloc[:rows] if isinstance(source, pd.DataFrame) else next(iter_chunks(source, chunksize=rows))
+
+
+def choose_join_strategy(left, right, on, how='inner', memory_limit=1024**3):
+    """The strategy join_frames(strategy='auto') would use for these inputs"""
+    on = [on] if isinstance(on, str) else list(on)
+    frames = isinstance(left, pd.DataFrame) and isinstance(right, pd.DataFrame)
+    if frames and how != 'outer' and _is_sorted(left, on) and _is_sorted(right, on):
+        return 'sort_merge'
+    if min(_frame_bytes(left), _frame_bytes(right)) <= memory_limit:
+        return 'hash'
+    return 'spill'
+
+
+# 2. SORT-MERGE JOIN
+# --------------------------------------------------------------------------------------------------------
+def _key_values(left, right, on):
+    # One comparable array per side: the raw values for a single numeric/datetime key,
+    # otherwise shared integer codes (missing values get a code too, pd.merge matches NaN with NaN)
+    if len(on) == 1 and left[on[0]].dtype.kind in 'iufmM':
+        return left[on[0]].to_numpy(), right[on[0]].to_numpy()
+    combined = np.zeros(len(left) + len(right), dtype=np.int64)
+    for key in on:
+        codes, uniques = pd.factorize(pd.concat([left[key], right[key]], ignore_index=True),
+                                      use_na_sentinel=False)
+        if combined.max(initial=0) >= np.iinfo(np.int64).max // (len(uniques) + 1):
+            combined = pd.factorize(combined)[0].astype(np.int64)
+        combined = combined * (len(uniques) + 1) + codes
+    return combined[:len(left)], combined[len(left):]
+
+
+def _merge_indexers(probe, build, keep_unmatched):
+    """Row indexers (probe order, then build order) for equal keys; -1 marks an unmatched probe row"""
+    order = None
+    if len(build) > 1 and not (build[1:] >= build[:-1]).all():
+        order = np.argsort(build, kind='stable')
+        build = build[order]
+    lower = np.searchsorted(build, probe, side='left')
+    counts = np.searchsorted(build, probe, side='right') - lower
+    if keep_unmatched:
+        counts_out = np.maximum(counts, 1)
+    else:
+        counts_out = counts
+
+    probe_index = np.repeat(np.arange(len(probe)), counts_out)
+    offsets = np.arange(len(probe_index)) - np.repeat(np.cumsum(counts_out) - counts_out, counts_out)
+    build_index = np.repeat(lower, counts_out) + offsets
+    if keep_unmatched:
+        build_index[np.repeat(counts == 0, counts_out)] = -1
+    if order is not None:
+        build_index = np.where(build_index >= 0, order[np.maximum(build_index, 0)], -1)
+    return probe_index, build_index
+
+
+def _take(frame, indexer):
+    # Rows by position; -1 gives a missing row (with the same upcasting pd.merge applies: int -> float, ...)
+    frame = frame.reset_index(drop=True)
+    if (indexer < 0).any():
+        return frame.reindex(indexer).reset_index(drop=True)
+    return frame.take(indexer).reset_index(drop=True)
+
+
+def _sort_merge(left, right, on, how, suffixes):
+    left_keys, right_keys = _key_values(left, right, on)
+    if how == 'right':
+        right_index, left_index = _merge_indexers(right_keys, left_keys, keep_unmatched=True)
+    else:
+        left_index, right_index = _merge_indexers(left_keys, right_keys, keep_unmatched=how == 'left')
+
+    left_part = _take(left, left_index)
+    if how == 'right':
+        for key in on:  # right join: the key values come from the right side
+            left_part[key] = _take(right[[key]], right_index)[key]
+    right_columns = [column for column in right.columns if column not in on]
+    right_part = _take(right[right_columns], right_index)
+
+    overlap = set(left_part.columns).intersection(right_columns)
+    left_part = left_part.rename(columns={column: f'{column}{suffixes[0]}' for column in overlap})
+    right_part = right_part.rename(columns={column: f'{column}{suffixes[1]}' for column in overlap})
+    return pd.concat([left_part, right_part], axis=1)
+
+
+# 3. SPILLING (GRACE) HASH JOIN
+# --------------------------------------------------------------------------------------------------------
+def _numbered_chunks(source, on, side, row_column, reference, chunksize):
+    """Yields (number, chunk) with the input's row numbers in `row_column`"""
+    offset = 0
+    for number, chunk in enumerate(iter_chunks(source, chunksize=chunksize)):
+        for key in on:  # file chunks are typed independently: a chunk must not change the key dtype
+            if chunk[key].dtype != reference[key].dtype:
+                raise TypeError(f"Join key {key!r} changes dtype from {reference[key].dtype} to "
+                                f"{chunk[key].dtype} in chunk {number} of the {side} input")
+        yield number, chunk.assign(**{row_column: np.arange(offset, offset + len(chunk))})
+        offset += len(chunk)
+
+
+def _restore_order(merged, on, how):
+    # pd.merge order: left rows (inner/left), right rows (right), or sorted keys (outer),
+    # with ties broken by the position on each side
+    order_by = {'inner': [LEFT_ROW, RIGHT_ROW], 'left': [LEFT_ROW, RIGHT_ROW],
+                'right': [RIGHT_ROW, LEFT_ROW], 'outer': on + [LEFT_ROW, RIGHT_ROW]}[how]
+    sort_keys = {}
+    if how == 'outer':
+        # pd.merge sorts datetime keys on their int64 values, which puts NaT first (NaN goes last)
+        for position, key in enumerate(on):
+            if merged[key].dtype.kind in 'mM':
+                sort_keys[f'__sort_{position}'] = merged[key].array.asi8
+                order_by[position] = f'__sort_{position}'
+    merged = merged.assign(**sort_keys).sort_values(order_by, kind='stable', na_position='last')
+    return merged.drop(columns=[LEFT_ROW, RIGHT_ROW, *sort_keys]).reset_index(drop=True)
+
+
+def _spill(source, on, partitions, directory, side, row_column, reference, chunksize):
+    """Hash partitions one input to pickle files; returns the file list of every partition"""
+    files = [[] for _ in range(partitions)]
+    for number, chunk in _numbered_chunks(source, on, side, row_column, reference, chunksize):
+        buckets = pd.util.hash_pandas_object(chunk[on], index=False).to_numpy() % np.uint64(partitions)
+        for bucket in np.unique(buckets):
+            path = os.path.join(directory, f'{side}_{bucket}_{number}.pkl')
+            chunk[buckets == bucket].to_pickle(path)
+            files[bucket].append(path)
+    return files
+
+
+def _load(paths, empty):
+    return pd.concat([pd.read_pickle(path) for path in paths], ignore_index=True) if paths else empty
+
+
+def _spill_join(left, right, on, how, suffixes, memory_limit, partitions, spill_dir, chunksize,
+                left_head, right_head):
+    if partitions is None:
+        build_bytes = min(_frame_bytes(left), _frame_bytes(right))
+        partitions = max(2, 2 * math.ceil(build_bytes / memory_limit))
+    left_empty = left_head.iloc[:0].assign(**{LEFT_ROW: np.array([], dtype=np.int64)})
+    right_empty = right_head.iloc[:0].assign(**{RIGHT_ROW: np.array([], dtype=np.int64)})
+
+    with tempfile.TemporaryDirectory(prefix='join_', dir=spill_dir) as directory:
+        left_files = _spill(left, on, partitions, directory, 'left', LEFT_ROW, left_head, chunksize)
+        right_files = _spill(right, on, partitions, directory, 'right', RIGHT_ROW, right_head, chunksize)
+        parts = []
+        for left_paths, right_paths in zip(left_files, right_files):
+            if not left_paths and not right_paths:
+                continue
+            parts.append(pd.merge(_load(left_paths, left_empty), _load(right_paths, right_empty),
+                                  on=on, how=how, suffixes=suffixes))
+            for path in left_paths + right_paths:  # free disk space as soon as a partition is done
+                os.remove(path)
+
+    if not parts:
+        return pd.merge(left_empty, right_empty, on=on, how=how, suffixes=suffixes).drop(
+            columns=[LEFT_ROW, RIGHT_ROW])
+    return _restore_order(pd.concat(parts, ignore_index=True), on, how)
+
+
+# 4. STREAMED HASH JOIN
+# --------------------------------------------------------------------------------------------------------
+def _streamed_join(left, right, on, how, suffixes, chunksize, left_head, right_head):
+    """Hash join of the in-memory smaller side with the larger file, read chunk by chunk"""
+    stream_left = _frame_bytes(left) > _frame_bytes(right)
+    build_side, stream_side = ('right', 'left') if stream_left else ('left', 'right')
+    build_row, stream_row = (RIGHT_ROW, LEFT_ROW) if stream_left else (LEFT_ROW, RIGHT_ROW)
+    build = right if stream_left else left
+    build = build if isinstance(build, pd.DataFrame) else read_file(build)
+    build = build.assign(**{build_row: np.arange(len(build))})
+    keep_stream = how in ('outer', stream_side)  # unmatched streamed rows are kept chunk by chunk
+    keep_build = how in ('outer', build_side)    # unmatched build rows are added once every chunk is joined
+
+    parts, matched = [], np.zeros(len(build), dtype=bool)
+    for _, chunk in _numbered_chunks(left if stream_left else right, on, stream_side, stream_row,
+                                     left_head if stream_left else right_head, chunksize):
+        pair = (chunk, build) if stream_left else (build, chunk)
+        part = pd.merge(*pair, on=on, how=stream_side if keep_stream else 'inner', suffixes=suffixes)
+        if keep_build:
+            matched[part[build_row].dropna().to_numpy(dtype=np.int64)] = True
+        if len(part):
+            parts.append(part)
+    if keep_build and not matched.all() or not parts:
+        stream_empty = (left_head if stream_left else right_head).iloc[:0].assign(
+            **{stream_row: np.array([], dtype=np.int64)})
+        pair = (stream_empty, build[~matched]) if stream_left else (build[~matched], stream_empty)
+        parts.append(pd.merge(*pair, on=on, how=build_side if keep_build else 'inner', suffixes=suffixes))
+    return _restore_order(pd.concat(parts, ignore_index=True), on, how)
+
+
+# 5. ENTRY POINT
+# --------------------------------------------------------------------------------------------------------
+def join_frames(left, right, on, how='inner', strategy='auto', memory_limit=1024**3, partitions=None,
+                spill_dir=None, chunksize=1_000_000, suffixes=('_x', '_y')):
+    """
+    pd.merge(left, right, on=on, how=how, suffixes=suffixes) for inputs of any size.
+    left/right: DataFrames or CSV/JSON-lines/Parquet paths (the larger side is streamed when it is a path).
+    strategy: 'auto', 'sort_merge', 'hash' or 'spill' (see choose_join_strategy).
+    memory_limit: bytes the build side may take in memory before the join spills to disk.
+    """
+    on = [on] if isinstance(on, str) else list(on)
+    if how not in JOIN_TYPES:
+        raise ValueError(f"Unsupported join type: {how!r} (use one of {JOIN_TYPES})")
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy!r} (use one of {STRATEGIES})")
+    if strategy == 'sort_merge' and how == 'outer':
+        raise ValueError("The sort-merge strategy supports inner, left and right joins")
+
+    left_head, right_head = _head(left), _head(right)
+    check_key_dtypes(left_head if not isinstance(left, pd.DataFrame) else left,
+                     right_head if not isinstance(right, pd.DataFrame) else right, on)
+    if strategy == 'auto':
+        strategy = choose_join_strategy(left, right, on, how=how, memory_limit=memory_limit)
+
+    if strategy == 'spill':
+        return _spill_join(left, right, on, how, suffixes, memory_limit, partitions, spill_dir, chunksize,
+                           left_head, right_head)
+    if strategy == 'hash' and not all(isinstance(source, pd.DataFrame) for source in (left, right)):
+        return _streamed_join(left, right, on, how, suffixes, chunksize, left_head, right_head)
+    left = left if isinstance(left, pd.DataFrame) else read_file(left)
+    right = right if isinstance(right, pd.DataFrame) else read_file(right)
+    if strategy == 'sort_merge':
+        return _sort_merge(left, right, on, how, suffixes)
+    return pd.merge(left, right, on=on, how=how, suffixes=suffixes)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(42)
+    customers = pd.DataFrame({
+        'customer_id': np.arange(1, 1_000_001),
+        'region': rng.choice(['North', 'South', 'East', 'West'], size=1_000_000),
+    })
+    orders = pd.DataFrame({
+        'customer_id': np.sort(rng.integers(1, 1_200_000, size=5_000_000)),
+        'amount': rng.uniform(10, 500, size=5_000_000).round(2),
+    })
+
+    for strategy in ('hash', 'sort_merge', 'spill'):
+        start = time.perf_counter()
+        result = join_frames(customers, orders, on='customer_id', how='left', strategy=strategy,
+                             memory_limit=32 * 1024**2)
+        print(f"{strategy:>10}: {time.perf_counter() - start:.2f} s, {len(result):,} rows")
+    print("Same as pd.merge:", result.equals(pd.merge(customers, orders, on='customer_id', how='left')))
+    print("auto picks:", choose_join_strategy(customers, orders, on='customer_id'))
+
+    try:
+        join_frames(customers, orders.astype({'customer_id': str}), on='customer_id')
+    except TypeError as exc:
+        print("Key check:", exc)
@@ -0,0 +1,272 @@
+# Lazy element-wise array expressions without full-size temporaries (section 4 of 04_DATA/Numpy.py at scale):
+# - ((arr + 5) ** 2) / 100 allocates a new array for every operator: three 800 MB temporaries for 1e8 floats,
+#   each written to memory and read back by the next operator
+# - lazy(arr) records the operations instead (operators and NumPy ufuncs such as np.sqrt(lazy(arr)))
+#   and evaluate() runs the whole expression chunk by chunk: every operator writes into a chunk-sized buffer
+#   with out=, and reuses an input buffer it no longer needs (in-place ufunc) when the dtype allows it
+# - Chunk buffers come from a BufferPool, so repeated pipelines reuse the same memory; peak memory is the
+#   result plus a few cache-sized buffers, and each chunk stays in cache from the first operator to the last
+# - Sub-expressions that do not depend on the chunked axis (e.g. a per-column vector) are computed once
+# - Results and dtypes are exactly those of the eager NumPy expression
+#
+# Example:
+#   result = ((lazy(arr) + 5) ** 2 / 100).evaluate()
+#   (np.sqrt(lazy(arr)) * weights).evaluate(out=arr)     # overwrite arr in place, no allocation at all
+
+import threading
+
+import numpy as np
+
+CHUNK_ELEMENTS = 1 << 16  # 64K elements (512 KB of float64) per chunk: all live buffers fit in L2 cache
+
+
+# 1. BUFFER POOL
+# --------------------------------------------------------------------------------------------------------
+class BufferPool:
+    """Free chunk buffers by (shape, dtype), reused across evaluations (at most max_bytes are kept)"""
+
+    def __init__(self, max_bytes=64 * 1024**2):
+        self.max_bytes = max_bytes
+        self.stats = {'allocated': 0, 'reused': 0}
+        self._free = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def take(self, shape, dtype):
+        key = (shape, np.dtype(dtype))
+        with self._lock:
+            buffers = self._free.get(key)
+            if buffers:
+                self._bytes -= buffers[-1].nbytes
+                self.stats['reused'] += 1
+                return buffers.pop()
+            self.stats['allocated'] += 1
+        return np.empty(shape, dtype=dtype)
+
+    def give(self, buffer):
+        with self._lock:
+            if self._bytes + buffer.nbytes <= self.max_bytes:
+                self._free.setdefault((buffer.shape, buffer.dtype), []).append(buffer)
+                self._bytes += buffer.nbytes
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+            self._bytes = 0
+
+
+default_pool = BufferPool()
+
+
+# 2. EXPRESSION NODES
+# --------------------------------------------------------------------------------------------------------
+def _binary(ufunc):
+    def method(self, other):
+        return LazyArray(ufunc, (self, other))
+    return method
+
+
+def _reflected(ufunc):
+    def method(self, other):
+        return LazyArray(ufunc, (other, self))
+    return method
+
+
+class LazyArray:
+    """An array, or a ufunc applied to other LazyArrays, arrays and scalars (nothing is computed before evaluate())"""
+
+    def __init__(self, ufunc, operands):
+        self.ufunc = ufunc        # None for a leaf
+        self.operands = operands  # leaf: (array,); node: tuple of LazyArray/array/scalar
+        self.shape = np.broadcast_shapes(*(np.shape(operand) for operand in operands))
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    def __repr__(self):
+        if self.ufunc is None:
+            return f"lazy(<array {self.operands[0].shape} {self.operands[0].dtype}>)"
+        return f"{self.ufunc.__name__}({', '.join(map(repr, self.operands))})"
+
+    # Operators build nodes; x ** 2 uses np.square like ndarray.__pow__
+    __add__, __radd__ = _binary(np.add), _reflected(np.add)
+    __sub__, __rsub__ = _binary(np.subtract), _reflected(np.subtract)
+    __mul__, __rmul__ = _binary(np.multiply), _reflected(np.multiply)
+    __truediv__, __rtruediv__ = _binary(np.true_divide), _reflected(np.true_divide)
+    __floordiv__, __rfloordiv__ = _binary(np.floor_divide), _reflected(np.floor_divide)
+    __mod__, __rmod__ = _binary(np.remainder), _reflected(np.remainder)
+    __rpow__ = _reflected(np.power)
+    __and__, __rand__ = _binary(np.bitwise_and), _reflected(np.bitwise_and)
+    __or__, __ror__ = _binary(np.bitwise_or), _reflected(np.bitwise_or)
+    __lt__, __le__ = _binary(np.less), _binary(np.less_equal)
+    __gt__, __ge__ = _binary(np.greater), _binary(np.greater_equal)
+    __eq__, __ne__ = _binary(np.equal), _binary(np.not_equal)
+    __hash__ = None
+
+    def __pow__(self, other):
+        if isinstance(other, (int, float)) and not isinstance(other, bool) and other == 2:
+            return LazyArray(np.square, (self,))
+        return LazyArray(np.power, (self, other))
+
+    def __neg__(self):
+        return LazyArray(np.negative, (self,))
+
+    def __abs__(self):
+        return LazyArray(np.absolute, (self,))
+
+    def __invert__(self):
+        return LazyArray(np.invert, (self,))
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        # np.sqrt(lazy_array), np.maximum(lazy_array, 0), ... also stay lazy
+        if method != '__call__' or kwargs or ufunc.nout != 1:
+            return NotImplemented
+        return LazyArray(ufunc, inputs)
+
+    def __array__(self, dtype=None, copy=None):
+        result = self.evaluate()
+        return result if dtype is None else result.astype(dtype, copy=False)
+
+    # 3. EVALUATION
+    # ----------------------------------------------------------------------------------------------------
+    def evaluate(self, out=None, pool=None, chunk_elements=CHUNK_ELEMENTS):
+        """
+        Computes the expression chunk by chunk along the first axis.
+        out: array to write the result into (may be one of the expression's own same-shape inputs).
+        """
+        pool = default_pool if pool is None else pool
+        if self.ufunc is None or self.ndim == 0:
+            value = _eager(self)
+            if out is None:
+                return np.array(value)
+            np.copyto(out, value)
+            return out
+
+        rows = self.shape[0]
+        plan = _Plan(self, rows)
+        if out is None:
+            out = np.empty(self.shape, dtype=plan.dtypes[id(self)])
+        elif out.shape != self.shape:
+            raise ValueError(f"out has shape {out.shape}, the expression has shape {self.shape}")
+
+        row_elements = max(int(np.prod(self.shape[1:])), 1)
+        step = max(chunk_elements // row_elements, 1)
+        for start in range(0, rows, step):
+            stop = min(start + step, rows)
+            plan.run(plan.root, start, stop, pool, out[start:stop])
+        return out
+
+
+def lazy(array):
+    """Starts a lazy expression on an array (a LazyArray is returned unchanged)"""
+    if isinstance(array, LazyArray):
+        return array
+    return LazyArray(None, (np.asanyarray(array),))
+
+
+def _eager(operand):
+    # Plain NumPy evaluation (sub-expressions that are not chunked, 0-d expressions)
+    if not isinstance(operand, LazyArray):
+        return operand
+    if operand.ufunc is None:
+        return operand.operands[0]
+    return operand.ufunc(*(_eager(child) for child in operand.operands))
+
+
+class _Plan:
+    """Chunked evaluation plan: per-node dtypes, and sub-expressions hoisted out of the chunk loop"""
+
+    def __init__(self, root, rows):
+        self.rows = rows
+        self.ndim = root.ndim
+        self.dtypes = {}
+        self._samples = {}  # zero-row result of every chunked node: dtype and trailing shape
+        self.root = self._prepare(root)
+
+    def _chunked(self, shape):
+        return len(shape) == self.ndim and shape[0] == self.rows
+
+    def _prepare(self, operand):
+        # Leaves become arrays/scalars, constant sub-expressions are evaluated once
+        if not isinstance(operand, LazyArray):
+            return np.asanyarray(operand) if isinstance(operand, (list, tuple)) else operand
+        if operand.ufunc is None:
+            return operand.operands[0]
+        if not self._chunked(operand.shape):
+            return _eager(operand)
+        node = (operand.ufunc, tuple(self._prepare(child) for child in operand.operands))
+        # The dtype of a zero-row chunk is the dtype NumPy gives the full arrays (scalars keep their casting rules)
+        sample = operand.ufunc(*(self._sample(child) for child in node[1]))
+        self.dtypes[id(node)] = sample.dtype
+        self.dtypes[id(operand)] = sample.dtype
+        self._samples[id(node)] = sample
+        return node
+
+    def _sample(self, operand):
+        if isinstance(operand, tuple):
+            return self._samples[id(operand)]
+        if isinstance(operand, np.ndarray) and self._chunked(operand.shape):
+            return operand[:0]
+        return operand
+
+    def run(self, operand, start, stop, pool, out=None):
+        """Value of `operand` for rows start:stop, and whether it is a pool buffer the caller may reuse"""
+        if not isinstance(operand, tuple):
+            if isinstance(operand, np.ndarray) and self._chunked(operand.shape):
+                return operand[start:stop], False
+            return operand, False
+
+        ufunc, children = operand
+        values = [self.run(child, start, stop, pool) for child in children]
+        dtype = self.dtypes[id(operand)]
+        shape = (stop - start,) + self._samples[id(operand)].shape[1:]
+        target = out
+        if target is None:
+            # In place: write over an input buffer of the right shape and dtype instead of taking a new one
+            for value, owned in values:
+                if owned and value.dtype == dtype and value.shape == shape:
+                    target = value
+                    break
+            else:
+                target = pool.take(shape, dtype)
+        ufunc(*(value for value, _ in values), out=target)
+        for value, owned in values:
+            if owned and value is not target:
+                pool.give(value)
+        return target, out is None
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    rng = np.random.default_rng(42)
+    arr = rng.uniform(0, 100, size=20_000_000)  # 160 MB
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    expected = np.sqrt((arr + 5) ** 2 / 100) - arr * 0.5
+    eager_time = time.perf_counter() - start
+    eager_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del expected
+
+    for attempt in ('first run', 'pooled rerun'):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = (np.sqrt((lazy(arr) + 5) ** 2 / 100) - lazy(arr) * 0.5).evaluate()
+        lazy_time = time.perf_counter() - start
+        lazy_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"lazy ({attempt}): {lazy_time:.2f} s, peak {lazy_peak / 1024**2:.0f} MB  |  "
+              f"eager: {eager_time:.2f} s, peak {eager_peak / 1024**2:.0f} MB")
+        del result
+    print("pool:", default_pool.stats)
+
+    check = (np.sqrt((lazy(arr) + 5) ** 2 / 100) - lazy(arr) * 0.5).evaluate()
+    print("Same as eager:", np.array_equal(check, np.sqrt((arr + 5) ** 2 / 100) - arr * 0.5))
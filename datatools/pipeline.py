@@ -0,0 +1,423 @@
+# Back-pressured producer/consumer pipelines (the threads of 03_ADVANCED/Concurrency.py, connected):
+# - fetch -> parse -> transform -> load stages run at the same time, each with its own worker set: threads
+#   (blocking I/O), a process pool (CPU-bound work) or coroutines on an event loop thread (async I/O)
+# - Stages are connected by bounded queues: a fast stage blocks when the next one's queue is full instead of
+#   piling items up in memory, so the whole pipeline runs at the pace of its slowest stage
+# - batch_size groups items between stages (func receives a list): one DB insert or one process round trip
+#   per batch instead of per item; batch_wait waits that long to fill a batch before running a partial one
+# - Graceful drain: when the source is exhausted (or stop(drain=True)), every item already read flows through
+#   all the stages before the workers exit; stop(drain=False) and the first failure abort at once
+# - stats() reports per-stage busy time and time starved of input or blocked on output: the stage with the
+#   highest utilisation is the bottleneck to give more workers
+#
+# Example:
+#   pipeline = Pipeline(Stage(fetch_page, workers=16),                           # threads, blocking I/O
+#                       Stage(parse_rows, expand=True),                          # one page -> many rows
+#                       Stage(clean_rows, kind='process', workers=4, batch_size=500),
+#                       Stage(insert_rows, batch_size=1_000, batch_wait=0.5))    # returns None: a sink
+#   pipeline.run(range(1, 501))
+#   print(pipeline.stats(), pipeline.bottleneck())
+
+import asyncio
+import inspect
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pandas as pd
+
+STAGE_KINDS = ('thread', 'process', 'async')
+POLL_INTERVAL = 0.05  # seconds between checks for an abort while blocked on a queue
+
+_DONE = object()  # end-of-stream marker, one per reader of a queue
+
+
+class PipelineError(Exception):
+    """A stage (or the source) raised; the original exception is the __cause__"""
+
+    def __init__(self, stage, cause):
+        super().__init__(f"Stage {stage!r} failed: {type(cause).__name__}: {cause}")
+        self.stage = stage
+
+
+def _apply(func, batch, batched, expand):
+    # Module level so process pool workers can unpickle it; always returns a list of results to pass on
+    if batched:
+        results = func(batch)
+        return [] if results is None else list(results)
+    result = func(batch[0])
+    if result is None:
+        return []
+    return list(result) if expand else [result]
+
+
+# 1. STAGES
+# --------------------------------------------------------------------------------------------------------
+class Stage:
+    """
+    One step of a Pipeline: func(item) -> result, or func(list_of_items) -> results when batch_size > 1.
+    None results are not passed on (filters and sinks); expand=True passes on every element of the result.
+    kind: 'thread', 'process' (func must be picklable) or 'async' (default for coroutine functions).
+    queue_size: bound of the stage's input queue (default: the pipeline's).
+    """
+
+    def __init__(self, func, workers=1, kind=None, batch_size=1, batch_wait=0.0, expand=False, queue_size=None,
+                 name=None):
+        kind = kind or ('async' if inspect.iscoroutinefunction(func) else 'thread')
+        if kind not in STAGE_KINDS:
+            raise ValueError(f"Unknown stage kind {kind!r} (use {STAGE_KINDS})")
+        if workers < 1 or batch_size < 1:
+            raise ValueError("workers and batch_size must be at least 1")
+        self.func = func
+        self.workers = workers
+        self.kind = kind
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.expand = expand
+        self.queue_size = queue_size
+        self.name = name or getattr(func, '__name__', 'stage')
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, kind={self.kind!r}, workers={self.workers}, batch_size={self.batch_size})"
+
+    @property
+    def readers(self):
+        # Threads that take items from the input queue (an async stage has one dispatcher)
+        return 1 if self.kind == 'async' else self.workers
+
+
+class _Counters:
+    """Live statistics of one stage, updated by its workers"""
+
+    def __init__(self, name, kind, workers, running):
+        self.name = name
+        self.kind = kind
+        self.workers = workers
+        self.running = running   # worker threads still running
+        self.items_in = 0
+        self.items_out = 0
+        self.batches = 0
+        self.busy = 0.0          # seconds spent in func, summed over workers
+        self.input_wait = 0.0    # seconds waiting for items (starved)
+        self.output_wait = 0.0   # seconds blocked on a full output queue (back-pressure)
+        self.queue_peak = 0      # largest length of the output queue
+        self.lock = threading.Lock()
+
+    def add(self, **amounts):
+        with self.lock:
+            for field, amount in amounts.items():
+                setattr(self, field, getattr(self, field) + amount)
+
+
+# 2. PIPELINE
+# --------------------------------------------------------------------------------------------------------
+class Pipeline:
+    """Stages running concurrently, connected by bounded queues (see module header)"""
+
+    def __init__(self, *stages, queue_size=1_000):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = [stage if isinstance(stage, Stage) else Stage(stage) for stage in stages]
+        self.queue_size = queue_size
+        self._threads = []
+        self._started = None
+        self._finished = None
+
+    # Queue helpers (every blocking call polls the abort flag, so nothing hangs after a failure)
+    def _get(self, inbox):
+        while True:
+            try:
+                return inbox.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                if self._abort.is_set():
+                    return _DONE
+
+    def _put(self, counters, outbox, item):
+        try:
+            outbox.put_nowait(item)
+        except queue.Full:
+            blocked = time.perf_counter()
+            while not self._abort.is_set():
+                try:
+                    outbox.put(item, timeout=POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    pass
+            counters.add(output_wait=time.perf_counter() - blocked)
+        length = outbox.qsize()
+        if length > counters.queue_peak:
+            counters.queue_peak = length
+
+    def _put_all(self, counters, outbox, items):
+        for item in items:
+            self._put(counters, outbox, item)
+        counters.add(items_out=len(items))
+
+    def _take(self, stage, counters, inbox):
+        """Next batch: waits for one item, then up to batch_wait seconds to fill the batch; (batch, done)"""
+        waiting = time.perf_counter()
+        batch = []
+        deadline = None
+        done = False
+        while len(batch) < stage.batch_size:
+            if deadline is None:
+                item = self._get(inbox)
+            else:
+                try:
+                    remaining = deadline - time.perf_counter()
+                    item = inbox.get(timeout=remaining) if remaining > 0 else inbox.get_nowait()
+                except queue.Empty:
+                    break
+            if item is _DONE:
+                done = True
+                break
+            batch.append(item)
+            if deadline is None:
+                deadline = time.perf_counter() + stage.batch_wait
+        counters.add(input_wait=time.perf_counter() - waiting, items_in=len(batch), batches=1 if batch else 0)
+        return batch, done
+
+    # Workers
+    def _feed(self, source, counters, outbox, readers):
+        try:
+            iterator = iter(source)
+            while not (self._abort.is_set() or self._draining.is_set()):
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                counters.add(busy=time.perf_counter() - started)
+                self._put_all(counters, outbox, [item])
+        except BaseException as error:
+            self._fail('source', error)
+        finally:
+            for _ in range(readers):
+                self._put(counters, outbox, _DONE)
+
+    def _work(self, stage, counters, inbox, outbox, readers, pool):
+        try:
+            done = False
+            while not (done or self._abort.is_set()):
+                batch, done = self._take(stage, counters, inbox)
+                if not batch:
+                    continue
+                started = time.perf_counter()
+                if pool is not None:
+                    results = pool.submit(_apply, stage.func, batch, stage.batch_size > 1, stage.expand).result()
+                else:
+                    results = _apply(stage.func, batch, stage.batch_size > 1, stage.expand)
+                counters.add(busy=time.perf_counter() - started)
+                self._put_all(counters, outbox, results)
+        except BaseException as error:
+            self._fail(stage.name, error)
+        finally:
+            self._worker_done(stage, counters, outbox, readers, pool)
+
+    def _run_async(self, stage, counters, inbox, outbox, readers):
+        try:
+            asyncio.run(self._dispatch(stage, counters, inbox, outbox))
+        except BaseException as error:
+            self._fail(stage.name, error)
+        finally:
+            self._worker_done(stage, counters, outbox, readers, None)
+
+    async def _dispatch(self, stage, counters, inbox, outbox):
+        # One coroutine per batch, at most `workers` at a time; queue calls block, so they run on helper threads
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(stage.workers)
+        running = set()
+        with ThreadPoolExecutor(1, 'pipeline-get') as getter, ThreadPoolExecutor(1, 'pipeline-put') as putter:
+            done = False
+            while not (done or self._abort.is_set()):
+                await slots.acquire()
+                batch, done = await loop.run_in_executor(getter, self._take, stage, counters, inbox)
+                if not batch:
+                    slots.release()
+                    continue
+                job = asyncio.create_task(self._run_batch(stage, counters, batch, outbox, putter, slots))
+                running.add(job)
+                job.add_done_callback(running.discard)
+            await asyncio.gather(*running)
+
+    async def _run_batch(self, stage, counters, batch, outbox, putter, slots):
+        try:
+            started = time.perf_counter()
+            if stage.batch_size > 1:
+                results = await stage.func(batch)
+                results = [] if results is None else list(results)
+            else:
+                result = await stage.func(batch[0])
+                results = [] if result is None else list(result) if stage.expand else [result]
+            counters.add(busy=time.perf_counter() - started)
+            await asyncio.get_running_loop().run_in_executor(putter, self._put_all, counters, outbox, results)
+        except Exception as error:
+            self._fail(stage.name, error)
+        finally:
+            slots.release()
+
+    def _worker_done(self, stage, counters, outbox, readers, pool):
+        # The last worker of a stage forwards the end of the stream to every reader of the next queue
+        with counters.lock:
+            counters.running -= 1
+            last = counters.running == 0
+        if last:
+            if pool is not None:
+                pool.shutdown(wait=False, cancel_futures=True)
+            if not self._abort.is_set():
+                for _ in range(readers):
+                    self._put(counters, outbox, _DONE)
+
+    def _fail(self, stage, error):
+        with self._lock:
+            if self._error is None:
+                self._error = (stage, error)
+        self._abort.set()
+
+    # Control
+    def start(self, source):
+        """Starts feeding `source` (any iterable) through the stages in background threads"""
+        if self._threads and self._finished is None:
+            raise RuntimeError("The pipeline is already running")
+        self._lock = threading.Lock()
+        self._abort = threading.Event()
+        self._draining = threading.Event()
+        self._error = None
+        self._counters = [_Counters('source', 'thread', 1, 1)] + [
+            _Counters(stage.name, stage.kind, stage.workers, stage.readers) for stage in self.stages]
+        queues = [queue.Queue(stage.queue_size or self.queue_size) for stage in self.stages]
+        self._output = queue.Queue(self.queue_size)
+        queues.append(self._output)
+        self._started, self._finished = time.perf_counter(), None
+
+        self._threads = [threading.Thread(target=self._feed, name='pipeline-source', daemon=True,
+                                          args=(source, self._counters[0], queues[0], self.stages[0].readers))]
+        for position, stage in enumerate(self.stages):
+            counters, inbox, outbox = self._counters[position + 1], queues[position], queues[position + 1]
+            readers = self.stages[position + 1].readers if position + 1 < len(self.stages) else 1
+            if stage.kind == 'async':
+                self._threads.append(threading.Thread(target=self._run_async, name=f'pipeline-{stage.name}',
+                                                      args=(stage, counters, inbox, outbox, readers), daemon=True))
+                continue
+            pool = ProcessPoolExecutor(max_workers=stage.workers) if stage.kind == 'process' else None
+            for worker in range(stage.workers):
+                self._threads.append(threading.Thread(target=self._work, name=f'pipeline-{stage.name}-{worker}',
+                                                      args=(stage, counters, inbox, outbox, readers, pool),
+                                                      daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def results(self):
+        """Yields the results of the last stage as they arrive; raises PipelineError if a stage failed"""
+        while True:
+            item = self._get(self._output)
+            if item is _DONE:
+                break
+            yield item
+        for thread in self._threads:
+            thread.join()
+        if self._finished is None:
+            self._finished = time.perf_counter()
+        if self._error is not None:
+            stage, error = self._error
+            raise PipelineError(stage, error) from error
+
+    def join(self):
+        """Waits until the pipeline has drained (results of the last stage are discarded)"""
+        for _ in self.results():
+            pass
+
+    def run(self, source):
+        """Feeds `source` through the stages and returns the last stage's results (a sink returns [])"""
+        return list(self.start(source).results())
+
+    def stop(self, drain=True):
+        """drain=True: stop reading the source and finish the items in flight; False: abort at once"""
+        if drain:
+            self._draining.set()
+        else:
+            self._abort.set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._threads:
+            if exc_type is not None:
+                self.stop(drain=False)
+            try:
+                self.join()
+            except PipelineError:
+                if exc_type is None:
+                    raise
+        return False
+
+    # Monitoring
+    def stats(self):
+        """
+        One row per stage (the source first): items in/out, busy and waiting seconds, and utilisation, the
+        share of the stage's worker time spent in func. Can be called while the pipeline runs.
+        """
+        if self._started is None:
+            raise RuntimeError("The pipeline has not been started")
+        elapsed = (self._finished or time.perf_counter()) - self._started
+        rows = []
+        for counters in self._counters:
+            rows.append({'stage': counters.name, 'kind': counters.kind, 'workers': counters.workers,
+                         'items_in': counters.items_in, 'items_out': counters.items_out,
+                         'batches': counters.batches, 'busy_s': counters.busy,
+                         'input_wait_s': counters.input_wait, 'output_wait_s': counters.output_wait,
+                         'queue_peak': counters.queue_peak,
+                         'utilisation': counters.busy / (counters.workers * elapsed) if elapsed else 0.0})
+        return pd.DataFrame(rows)
+
+    def bottleneck(self):
+        """Name of the stage (or 'source') with the highest utilisation"""
+        stats = self.stats()
+        return stats.loc[stats['utilisation'].idxmax(), 'stage']
+
+
+def _transform_batch(rows):
+    # CPU-bound step of the demo (module level: runs in a process pool)
+    return [{**row, 'score': sum(i * i for i in range(row['value'] % 2_000))} for row in rows]
+
+
+if __name__ == "__main__":
+    async def fetch_page(page):
+        await asyncio.sleep(0.02)  # e.g. an aiohttp request
+        return [{'page': page, 'value': page * 100 + i} for i in range(100)]
+
+    def load_rows(rows):
+        time.sleep(0.01 + 0.0001 * len(rows))  # e.g. one executemany() per batch
+        return None
+
+    pages = range(100)
+    start = time.perf_counter()
+    loaded = 0
+    for page in pages:
+        rows = _transform_batch(asyncio.run(fetch_page(page)))
+        load_rows(rows)
+        loaded += len(rows)
+    print(f"Sequential fetch -> transform -> load: {time.perf_counter() - start:.2f} s, {loaded:,} rows")
+
+    pipeline = Pipeline(Stage(fetch_page, workers=20, expand=True),
+                        Stage(_transform_batch, kind='process', workers=os.cpu_count(), batch_size=500,
+                              batch_wait=0.05),
+                        Stage(load_rows, batch_size=1_000, batch_wait=0.1),
+                        queue_size=5_000)
+    start = time.perf_counter()
+    pipeline.run(pages)
+    print(f"Pipeline:                              {time.perf_counter() - start:.2f} s")
+    print(pipeline.stats().round(2).to_string())
+    print("Bottleneck:", pipeline.bottleneck())
+
+    def broken(row):
+        raise ValueError(f"bad row {row}")
+
+    try:
+        Pipeline(Stage(lambda n: n * 2, workers=4), Stage(broken), queue_size=10).run(range(1_000_000))
+    except PipelineError as error:
+        print("Failure stops every stage:", error)
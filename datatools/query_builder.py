@@ -0,0 +1,222 @@
+# Push-down query builder:
+# - Describe a query as a small spec: select, filters, groupby, named aggregations, order_by, limit
+# - Against a database the spec is compiled into SQLAlchemy Core, so filtering and grouping run inside SQLite
+#   and only the reduced result is transferred into pandas
+# - Against a file (CSV, JSON, Excel, Parquet) the same spec falls back to pandas
+#
+# Example (same result as df.query('sales > 200').groupby('region').agg(...) in 04_DATA/Pandas.py):
+#   run_query('sqlite:///sales_data.db',
+#             filters=[('sales', '>', 200)],
+#             groupby=['region'],
+#             aggs={'total_sales': ('sales', 'sum'), 'avg_sales': ('sales', 'mean')})
+
+import operator
+import os
+
+import pandas as pd
+from sqlalchemy import select as sa_select, func
+from sqlalchemy.engine import Engine
+
+from .db import get_engine, get_table
+
+# 1. SUPPORTED OPERATORS AND AGGREGATIONS
+# --------------------------------------------------------------------------------------------------------
+# Comparison operators work the same on SQLAlchemy columns and on pandas Series.
+FILTER_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+}
+
+# Membership operators need a different method on each side.
+SQL_MEMBERSHIP = {
+    'in': lambda column, values: column.in_(values),
+    'not in': lambda column, values: column.not_in(values),
+}
+PANDAS_MEMBERSHIP = {
+    'in': lambda series, values: series.isin(values),
+    'not in': lambda series, values: ~series.isin(values),
+}
+
+# Named aggregation functions (pandas name -> SQL expression builder)
+SQL_AGGREGATIONS = {
+    'sum': func.sum,
+    'mean': func.avg,
+    'min': func.min,
+    'max': func.max,
+    'count': func.count,
+    'nunique': lambda column: func.count(column.distinct()),
+}
+
+FILE_READERS = {
+    '.csv': pd.read_csv,
+    '.json': lambda path, **kwargs: pd.read_json(path, orient='records', lines=True),
+    '.jsonl': lambda path, **kwargs: pd.read_json(path, orient='records', lines=True),
+    '.xlsx': pd.read_excel,
+    '.parquet': pd.read_parquet,
+}
+
+
+def _check_operator(op):
+    if op not in FILTER_OPERATORS and op not in SQL_MEMBERSHIP:
+        raise ValueError(f"Unsupported filter operator: {op!r}")
+
+
+def _check_aggregation(how):
+    if how not in SQL_AGGREGATIONS:
+        raise ValueError(f"Unsupported aggregation: {how!r} (use one of {sorted(SQL_AGGREGATIONS)})")
+
+
+def _split_order(order_by):
+    # 'sales' -> ('sales', True), '-sales' -> ('sales', False)
+    for name in order_by or []:
+        if name.startswith('-'):
+            yield name[1:], False
+        else:
+            yield name, True
+
+
+# 2. SQL BACKEND
+# --------------------------------------------------------------------------------------------------------
+def build_query(table, select=None, filters=None, groupby=None, aggs=None, order_by=None, limit=None):
+    """
+    Compiles the query spec into a SQLAlchemy Core SELECT against `table`.
+    When grouping without an explicit order_by, rows are ordered by the group keys (like pandas groupby).
+    """
+    columns = table.c
+    groupby = list(groupby or [])
+
+    if aggs:
+        outputs = [columns[name] for name in groupby]
+        for label, (column, how) in aggs.items():
+            _check_aggregation(how)
+            outputs.append(SQL_AGGREGATIONS[how](columns[column]).label(label))
+    elif select:
+        outputs = [columns[name] for name in select]
+    else:
+        outputs = [table]
+
+    query = sa_select(*outputs)
+
+    for column, op, value in filters or []:
+        _check_operator(op)
+        if op in SQL_MEMBERSHIP:
+            query = query.where(SQL_MEMBERSHIP[op](columns[column], list(value)))
+        else:
+            query = query.where(FILTER_OPERATORS[op](columns[column], value))
+
+    if groupby:
+        query = query.group_by(*[columns[name] for name in groupby])
+
+    # Aggregation labels are valid order keys, so look them up in the selected columns first
+    selected = {col.name: col for col in query.selected_columns}
+    order = list(_split_order(order_by)) or [(name, True) for name in groupby]
+    for name, ascending in order:
+        column = selected[name] if name in selected else columns[name]
+        query = query.order_by(column.asc() if ascending else column.desc())
+
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def compile_query(query, engine=None):
+    """Returns the SQL text of a built query with the parameters inlined (handy for logging)"""
+    dialect = engine.dialect if engine is not None else None
+    return str(query.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+
+
+# 3. PANDAS FALLBACK
+# --------------------------------------------------------------------------------------------------------
+def read_file(path, columns=None):
+    """Reads a CSV/JSON(-lines)/Excel/Parquet file, loading only `columns` where the reader supports it"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_READERS:
+        raise ValueError(f"Unsupported file type: {extension!r}")
+    if columns is not None and extension in ('.csv', '.xlsx'):
+        return FILE_READERS[extension](path, usecols=columns)
+    if columns is not None and extension == '.parquet':
+        return FILE_READERS[extension](path, columns=columns)
+    df = FILE_READERS[extension](path)
+    return df if columns is None else df[columns]
+
+
+def apply_query(df, select=None, filters=None, groupby=None, aggs=None, order_by=None, limit=None):
+    """Applies the same query spec to an in-memory DataFrame"""
+    groupby = list(groupby or [])
+
+    if filters:
+        mask = pd.Series(True, index=df.index)
+        for column, op, value in filters:
+            _check_operator(op)
+            if op in PANDAS_MEMBERSHIP:
+                mask &= PANDAS_MEMBERSHIP[op](df[column], list(value))
+            else:
+                mask &= FILTER_OPERATORS[op](df[column], value)
+        df = df[mask]
+
+    if aggs:
+        for column, how in aggs.values():
+            _check_aggregation(how)
+        if groupby:
+            result = df.groupby(groupby, as_index=False, sort=not order_by).agg(**aggs)
+        else:
+            result = pd.DataFrame({label: [getattr(df[column], how)()] for label, (column, how) in aggs.items()})
+    else:
+        result = df  # projected after the sort, which may use a column that is not selected
+
+    order = list(_split_order(order_by))
+    if order:
+        result = result.sort_values(by=[name for name, _ in order],
+                                    ascending=[ascending for _, ascending in order])
+    if limit is not None:
+        result = result.head(limit)
+    if select and not aggs:
+        result = result[list(select)]
+    return result.reset_index(drop=True)
+
+
+def _needed_columns(select, filters, groupby, aggs, order_by, limit):
+    # Columns the pandas fallback has to read (None means "all of them")
+    if not (aggs or select):
+        return None
+    needed = list(groupby or [])
+    needed += [column for column, _ in aggs.values()] if aggs else list(select)
+    needed += [column for column, _, _ in filters or []]
+    needed += [name for name, _ in _split_order(order_by) if not (aggs and name in aggs)]
+    return list(dict.fromkeys(needed))
+
+
+# 4. ENTRY POINT
+# --------------------------------------------------------------------------------------------------------
+def run_query(source, table='sales', select=None, filters=None, groupby=None, aggs=None, order_by=None, limit=None):
+    """
+    Runs the query spec and returns a DataFrame with only the reduced result.
+    `source` can be a SQLAlchemy engine, a database URL ('sqlite:///sales_data.db') or a file path.
+    """
+    spec = dict(select=select, filters=filters, groupby=groupby, aggs=aggs, order_by=order_by, limit=limit)
+
+    if isinstance(source, Engine) or '://' in str(source):
+        engine = source if isinstance(source, Engine) else get_engine(source)
+        query = build_query(get_table(engine, table), **spec)
+        with engine.connect() as conn:
+            return pd.read_sql(query, conn)
+
+    df = read_file(source, columns=_needed_columns(**spec))
+    return apply_query(df, **spec)
+
+
+if __name__ == "__main__":
+    engine = get_engine()
+    spec = dict(
+        filters=[('sales', '>', 200)],
+        groupby=['region'],
+        aggs={'total_sales': ('sales', 'sum'), 'avg_sales': ('sales', 'mean'), 'count': ('customer_id', 'count')},
+    )
+    print("SQL sent to SQLite:")
+    print(compile_query(build_query(get_table(engine, 'sales'), **spec), engine))
+    print("\nResult:")
+    print(run_query(engine, **spec))
@@ -0,0 +1,275 @@
+# Query result cache for repeated pd.read_sql calls:
+# - Results are keyed on the normalised SQL text (comments dropped, whitespace collapsed) plus its parameters;
+#   the caller's original SQL is what runs on a miss
+# - Each entry remembers the version of every table it reads (see db.table_versions); loaders bump the
+#   version on write, so an entry is served only while its tables are unchanged
+# - Memory is bounded with an LRU policy on the DataFrames' deep memory usage
+# - Optionally, evicted results are spilled to Parquet files and promoted back into memory when requested again;
+#   a result Parquet cannot store (e.g. a mixed-type object column) stays in memory until its next eviction
+# - Versions are counters in this process: writes made by other processes (or outside the datatools loaders)
+#   do not invalidate anything; call invalidate(table) yourself, or pass a shared `versions` object
+#
+# Example:
+#   cache = QueryCache(engine, max_bytes=256 * 1024**2, spill_dir='query_cache')
+#   df = cache.read_sql('SELECT * FROM sales WHERE sales > :min_sales', params={'min_sales': 200})
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from sqlalchemy import text
+
+from .db import table_versions
+
+# Quoted literals/identifiers are kept as-is; comments and runs of whitespace become a single space
+_TOKENS = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")|((?:--[^\n]*|/\*.*?(?:\*/|$)|\s+)+)", re.DOTALL)
+_SPACES = re.compile(r'\s*')
+_TABLE_CLAUSE = re.compile(r'\b(?:from|join)\b', re.IGNORECASE)
+# One table of a FROM/JOIN list: name, optional alias, optional comma before the next table
+_TABLE_NAME = re.compile(r'\s*((?:["`\[]?\w+["`\]]?\.)*["`\[]?\w+["`\]]?)')
+# After a table (or a parenthesised subquery): optional alias, then a comma if another table follows
+_TABLE_ALIAS = re.compile(r'(?:\s+(?:as\s+)?(?!(?:where|join|inner|left|right|full|outer|cross|natural|on|using'
+                          r'|group|order|having|limit|union|except|intersect|window)\b)\w+)?\s*(,?)', re.IGNORECASE)
+_CONDITION = re.compile(r'(?:on|using)\b', re.IGNORECASE)
+# Inside an ON/USING condition: literals (skipped), parentheses, commas and the keywords that end the condition
+_CONDITION_TOKEN = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|[(),]|\b(?:where|join|inner|left|right|full"
+                              r"|cross|natural|group|order|having|limit|union|except|intersect|window)\b",
+                              re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """Drops comments, collapses whitespace outside quoted strings and drops a trailing ';'"""
+    normalized = _TOKENS.sub(lambda m: m.group(1) if m.group(1) else ' ', sql).strip()
+    return normalized.rstrip(';').strip()
+
+
+def referenced_tables(sql):
+    """
+    Returns the table names that appear after FROM/JOIN, including `FROM a, b` lists and tables listed after a
+    join condition (`JOIN b ON ..., c`): the entry's dependencies. Expects normalised SQL (no comments).
+    """
+    names = set()
+    for clause in _TABLE_CLAUSE.finditer(sql):
+        position = clause.end()
+        while True:
+            start = _SPACES.match(sql, position).end()
+            if sql.startswith('(', start):  # a subquery: its own FROM is found by the outer loop
+                position = _closing_parenthesis(sql, start)
+            else:
+                name = _TABLE_NAME.match(sql, position)
+                if name is None:
+                    break
+                names.add(re.sub(r'["`\[\]]', '', name.group(1)).split('.')[-1].lower())
+                position = name.end()
+            alias = _TABLE_ALIAS.match(sql, position)
+            if alias.group(1):
+                position = alias.end()
+            elif _CONDITION.match(sql, alias.end()):
+                position = _condition_comma(sql, alias.end())
+                if position is None:
+                    break
+            else:
+                break
+    return sorted(names)
+
+
+def _condition_comma(sql, start):
+    # Position after the comma that ends the ON/USING condition at `start` and lists another table, else None
+    depth = 0
+    for token in _CONDITION_TOKEN.finditer(sql, start):
+        value = token.group()
+        if value == '(':
+            depth += 1
+        elif value == ')':
+            if depth == 0:  # the end of an enclosing subquery
+                return None
+            depth -= 1
+        elif depth == 0 and value == ',':
+            return token.end()
+        elif depth == 0 and value[0] not in '\'"':
+            return None
+    return None
+
+
+def _closing_parenthesis(sql, start):
+    # Position just after the parenthesis that closes the one at `start` (quotes are not special-cased)
+    depth = 0
+    for position in range(start, len(sql)):
+        depth += {'(': 1, ')': -1}.get(sql[position], 0)
+        if depth == 0:
+            return position + 1
+    return len(sql)
+
+
+def _params_key(params):
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(sorted((key, repr(value)) for key, value in params.items()))
+    return tuple(repr(value) for value in params)
+
+
+class QueryCache:
+    """LRU cache of query results invalidated by per-table versions"""
+
+    def __init__(self, engine, max_bytes=256 * 1024**2, spill_dir=None, versions=table_versions):
+        self.engine = engine
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.versions = versions
+        self.stats = {'hits': 0, 'misses': 0, 'spill_hits': 0, 'evictions': 0, 'spill_errors': 0}
+
+        self._entries = OrderedDict()  # key -> (DataFrame, versions, nbytes)
+        self._spilled = {}             # key -> (parquet path, versions)
+        self._unspillable = set()      # keys whose result Parquet could not store: dropped at their next eviction
+        self._bytes = 0
+        self._lock = threading.Lock()
+        if spill_dir:
+            try:
+                import pyarrow  # noqa: F401  (Parquet engine used for the spill files)
+            except ImportError:
+                raise ImportError("spill_dir needs pyarrow for Parquet files: pip install pyarrow")
+            os.makedirs(spill_dir, exist_ok=True)
+
+    # 1. LOOKUP
+    # ----------------------------------------------------------------------------------------------------
+    def read_sql(self, sql, params=None, tables=None, copy=True):
+        """
+        Returns the cached result of `sql` when its tables are unchanged, otherwise runs it with pd.read_sql.
+        `tables` overrides the tables detected from the FROM/JOIN clauses.
+        Use copy=False for read-only callers to skip the defensive copy.
+        """
+        normalized = normalize_sql(sql)
+        key = (normalized, _params_key(params))
+        tables = referenced_tables(normalized) if tables is None else [table.lower() for table in tables]
+        current = self.versions.snapshot(tables)
+
+        df = self._get(key, current)
+        if df is None:
+            self.stats['misses'] += 1
+            with self.engine.connect() as conn:
+                df = pd.read_sql(text(sql), conn, params=params)
+            self._put(key, df, current)
+        return df.copy() if copy else df
+
+    def _get(self, key, current):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] == current:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry[0]
+                self._drop(key)
+
+            spilled = self._spilled.pop(key, None)
+        if spilled is None:
+            return None
+
+        path, versions = spilled
+        if versions != current:
+            os.remove(path)
+            return None
+        df = pd.read_parquet(path)
+        os.remove(path)
+        self.stats['spill_hits'] += 1
+        self._put(key, df, current)
+        return df
+
+    # 2. STORAGE
+    # ----------------------------------------------------------------------------------------------------
+    def _put(self, key, df, versions):
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return  # never cache a result bigger than the whole cache
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (df, versions, nbytes)
+            self._bytes += nbytes
+            evicted = []
+            while self._bytes > self.max_bytes:
+                old_key, old_entry = self._entries.popitem(last=False)
+                self._bytes -= old_entry[2]
+                self.stats['evictions'] += 1
+                if old_key in self._unspillable:
+                    self._unspillable.discard(old_key)
+                else:
+                    evicted.append((old_key, old_entry))
+        for old_key, old_entry in evicted:
+            self._spill(old_key, old_entry)
+
+    def _drop(self, key):
+        _, _, nbytes = self._entries.pop(key)
+        self._bytes -= nbytes
+        self._unspillable.discard(key)
+
+    def _spill(self, key, entry):
+        # Writes an evicted result to Parquet so it can be promoted back without re-running the query
+        if not self.spill_dir:
+            return
+        df, versions, nbytes = entry
+        name = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        path = os.path.join(self.spill_dir, f'{name}.parquet')
+        try:
+            df.to_parquet(path, index=True)
+        except Exception:  # ArrowInvalid/ArrowTypeError, e.g. an object column mixing numbers and strings
+            if os.path.exists(path):
+                os.remove(path)
+            with self._lock:
+                self.stats['spill_errors'] += 1
+                if key not in self._entries:  # keep it in memory, oldest first, instead of losing it
+                    self._entries[key] = entry
+                    self._entries.move_to_end(key, last=False)
+                    self._bytes += nbytes
+                    self._unspillable.add(key)
+            return
+        with self._lock:
+            self._spilled[key] = (path, versions)
+
+    # 3. MAINTENANCE
+    # ----------------------------------------------------------------------------------------------------
+    def invalidate(self, table):
+        """Bumps `table`'s version so every cached result that reads it becomes stale"""
+        return self.versions.bump(table)
+
+    def clear(self):
+        """Removes every cached result from memory and disk"""
+        with self._lock:
+            self._entries.clear()
+            self._unspillable.clear()
+            self._bytes = 0
+            spilled, self._spilled = self._spilled, {}
+        for path, _ in spilled.values():
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def memory_bytes(self):
+        return self._bytes
+
+
+if __name__ == "__main__":
+    import time
+
+    from .db import get_engine
+
+    cache = QueryCache(get_engine())
+    query = "SELECT * FROM sales WHERE sales > :min_sales"
+
+    for attempt in range(3):
+        start = time.perf_counter()
+        df = cache.read_sql(query, params={'min_sales': 200})
+        print(f"Attempt {attempt + 1}: {len(df)} rows in {(time.perf_counter() - start) * 1e6:,.0f} µs")
+
+    cache.invalidate('sales')  # what a loader does after writing to the table
+    start = time.perf_counter()
+    cache.read_sql(query, params={'min_sales': 200})
+    print(f"After a write to sales: {(time.perf_counter() - start) * 1e6:,.0f} µs")
+    print("Cache stats:", cache.stats)
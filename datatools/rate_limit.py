@@ -0,0 +1,420 @@
+# Rate limiting and bounded concurrency for API clients (instead of the fire-everything asyncio.gather of
+# 03_ADVANCED/Concurrency.py):
+# - Sending every request at once against a rate-limited API triggers a storm of 429 responses; waiting out
+#   their Retry-After costs more than pacing the requests in the first place
+# - TokenBucket: `rate` requests per second on average with bursts of up to `burst`; LeakyBucket: requests
+#   evenly spaced at `rate` per second (no bursts). Both work from threads (acquire, `with limiter:`) and
+#   coroutines (acquire_async, `async with limiter:`): a waiter reserves its slot under a short lock, then
+#   sleeps outside it (time.sleep or asyncio.sleep)
+# - AdaptiveLimiter: additive increase / multiplicative decrease of the rate from the responses (halved on
+#   429/5xx and paused for Retry-After, ramped up again while requests succeed), so the client settles just
+#   under the server's real limit
+# - KeyedLimiter: one limiter per host (or any key), created on first use
+# - bounded_gather: asyncio.gather with at most `limit` awaitables running at a time, results in order
+#
+# Example:
+#   limits = KeyedLimiter(lambda: AdaptiveLimiter(TokenBucket(rate=20, burst=5), max_rate=100))
+#
+#   async def fetch(session, url):
+#       async with limits.get(url):
+#           response = await session.get(url)
+#       limits.get(url).report(response.status, response.headers.get('Retry-After'))
+#       return response
+#
+#   responses = await bounded_gather((fetch(session, url) for url in urls), limit=20)
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+# 1. LIMITERS
+# --------------------------------------------------------------------------------------------------------
+class _Limiter:
+    """Shared acquire/context-manager logic: subclasses implement _reserve, _pause and _state/_restore"""
+
+    def __init__(self, rate):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.paused_until = 0.0  # time.monotonic() before which nothing is granted
+        self._shifted = 0.0      # total seconds pauses have pushed the queue back
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens, now):
+        """Takes `tokens` and returns the seconds to wait before using them"""
+        raise NotImplementedError
+
+    def reserve(self, tokens=1):
+        """Reserves `tokens` now and returns the delay before they may be used (the caller sleeps)"""
+        with self._lock:
+            return self._reserve(tokens, time.monotonic())
+
+    def _waits(self, tokens):
+        # Delays to sleep: the reservation's, then the extra delay of every pause() that started meanwhile
+        with self._lock:
+            delay = self._reserve(tokens, time.monotonic())
+            shifted = self._shifted
+        while delay > 0:
+            yield delay
+            delay, shifted = self._shifted - shifted, self._shifted
+
+    def acquire(self, tokens=1):
+        """Blocks the thread until `tokens` are available; returns the seconds waited"""
+        started = time.monotonic()
+        for delay in self._waits(tokens):
+            time.sleep(delay)
+        return time.monotonic() - started
+
+    async def acquire_async(self, tokens=1):
+        """Waits (without blocking the event loop) until `tokens` are available; returns the seconds waited"""
+        started = time.monotonic()
+        for delay in self._waits(tokens):
+            await asyncio.sleep(delay)
+        return time.monotonic() - started
+
+    def try_acquire(self, tokens=1):
+        """Takes `tokens` only if that needs no waiting (drop instead of queueing)"""
+        with self._lock:
+            now = time.monotonic()
+            state = self._state()
+            if self._reserve(tokens, now) > 0:
+                self._restore(state)
+                return False
+            return True
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._reserve(0, time.monotonic())  # settle the elapsed time at the old rate
+            self.rate = float(rate)
+
+    def pause(self, seconds):
+        """Nothing is granted for `seconds` (e.g. a Retry-After header), not even to callers already waiting"""
+        with self._lock:
+            now = time.monotonic()
+            extension = now + seconds - max(self.paused_until, now)
+            if extension > 0:
+                self.paused_until = now + seconds
+                self._shifted += extension
+                self._pause(now, extension)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class TokenBucket(_Limiter):
+    """`rate` tokens per second, at most `burst` saved up (default: one second's worth)"""
+
+    def __init__(self, rate, burst=None):
+        super().__init__(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self._tokens = self.burst
+        self._updated = time.monotonic()  # time the token count refers to (in the future while paused)
+
+    def __repr__(self):
+        return f"TokenBucket(rate={self.rate:g}, burst={self.burst:g})"
+
+    def _reserve(self, tokens, now):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+        self._tokens -= tokens  # a debt when negative: later callers queue up behind it
+        return (self._updated - now) + max(-self._tokens, 0.0) / self.rate
+
+    def _state(self):
+        return self._tokens, self._updated
+
+    def _restore(self, state):
+        self._tokens, self._updated = state
+
+    def _pause(self, now, extension):
+        self._reserve(0, now)
+        self._tokens = min(self._tokens, 0.0)  # nothing saved up during a pause
+        self._updated = max(self._updated, now) + extension
+
+
+class LeakyBucket(_Limiter):
+    """Requests leave at a steady `rate` per second, one every 1 / rate seconds, never in bursts"""
+
+    def __init__(self, rate):
+        super().__init__(rate)
+        self._next = time.monotonic()  # earliest time of the next request
+
+    def __repr__(self):
+        return f"LeakyBucket(rate={self.rate:g})"
+
+    def _reserve(self, tokens, now):
+        start = max(now, self._next)
+        self._next = start + tokens / self.rate
+        return start - now
+
+    def _state(self):
+        return self._next
+
+    def _restore(self, state):
+        self._next = state
+
+    def _pause(self, now, extension):
+        self._next = max(self._next, now) + extension
+
+
+# 2. ADAPTIVE AND KEYED LIMITS
+# --------------------------------------------------------------------------------------------------------
+def _throttled(status):
+    return status is not None and (status == 429 or 500 <= status < 600)
+
+
+class AdaptiveLimiter:
+    """
+    Adjusts the rate of a TokenBucket/LeakyBucket from report()ed responses (AIMD):
+    a 429/5xx (or an exception) multiplies the rate by `decrease` (at most once per `cooldown` seconds, so the
+    requests already in flight do not divide it again) and honours Retry-After; successes add `increase`
+    requests/second per second of traffic (default: a tenth of the starting rate), up to max_rate.
+    """
+
+    def __init__(self, limiter, min_rate=None, max_rate=None, increase=None, decrease=0.5, cooldown=1.0):
+        self.limiter = limiter
+        self.min_rate = min_rate if min_rate is not None else limiter.rate / 20
+        self.max_rate = max_rate if max_rate is not None else limiter.rate * 10
+        self.increase = increase if increase is not None else limiter.rate / 10
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.stats = {'ok': 0, 'throttled': 0, 'decreases': 0}
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"AdaptiveLimiter({self.limiter!r}, min_rate={self.min_rate:g}, max_rate={self.max_rate:g})"
+
+    @property
+    def rate(self):
+        return self.limiter.rate
+
+    def report(self, status=None, retry_after=None, error=None):
+        """Feeds back one response: its HTTP status (None if there is none), Retry-After and/or exception"""
+        with self._lock:
+            if _throttled(status) or error is not None:
+                self.stats['throttled'] += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self.stats['decreases'] += 1
+                    self.limiter.set_rate(max(self.min_rate, self.limiter.rate * self.decrease))
+            else:
+                self.stats['ok'] += 1
+                # increase / rate per response = `increase` req/s more per second of successful traffic
+                self.limiter.set_rate(min(self.max_rate, self.limiter.rate + self.increase / self.limiter.rate))
+        seconds = _retry_after_seconds(retry_after)
+        if seconds:
+            self.limiter.pause(seconds)
+
+    def reserve(self, tokens=1):
+        return self.limiter.reserve(tokens)
+
+    def acquire(self, tokens=1):
+        return self.limiter.acquire(tokens)
+
+    async def acquire_async(self, tokens=1):
+        return await self.limiter.acquire_async(tokens)
+
+    def try_acquire(self, tokens=1):
+        return self.limiter.try_acquire(tokens)
+
+    def pause(self, seconds):
+        self.limiter.pause(seconds)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_value is not None:
+            self.report(error=exc_value)
+        return False
+
+    async def __aenter__(self):
+        await self.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_value is not None:
+            self.report(error=exc_value)
+        return False
+
+
+def _retry_after_seconds(retry_after):
+    # Retry-After is a number of seconds or an HTTP date
+    if retry_after is None:
+        return 0.0
+    try:
+        return max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        from email.utils import parsedate_to_datetime
+
+        try:
+            return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+        except (TypeError, ValueError):
+            return 0.0
+
+
+def host_key(key):
+    """'https://api.example.com:443/v1/items?page=2' -> 'api.example.com:443'; other keys are unchanged"""
+    if isinstance(key, str) and '://' in key:
+        return urlsplit(key).netloc.lower()
+    return key
+
+
+class KeyedLimiter:
+    """One limiter per key (URLs are keyed by host), made by factory() on first use"""
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.limiters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        key = host_key(key)
+        limiter = self.limiters.get(key)
+        if limiter is None:
+            with self._lock:
+                limiter = self.limiters.get(key)
+                if limiter is None:
+                    limiter = self.limiters[key] = self.factory()
+        return limiter
+
+    def acquire(self, key, tokens=1):
+        return self.get(key).acquire(tokens)
+
+    async def acquire_async(self, key, tokens=1):
+        return await self.get(key).acquire_async(tokens)
+
+    def report(self, key, status=None, retry_after=None, error=None):
+        self.get(key).report(status, retry_after, error)
+
+
+def rate_limited(limiter, tokens=1):
+    """Decorator: every call (plain or coroutine function) first acquires `tokens` from the limiter"""
+    def decorate(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def limited_async(*args, **kwargs):
+                await limiter.acquire_async(tokens)
+                return await func(*args, **kwargs)
+            return limited_async
+
+        @functools.wraps(func)
+        def limited(*args, **kwargs):
+            limiter.acquire(tokens)
+            return func(*args, **kwargs)
+        return limited
+    return decorate
+
+
+# 3. BOUNDED GATHER
+# --------------------------------------------------------------------------------------------------------
+async def bounded_gather(awaitables, limit=10, return_exceptions=False):
+    """
+    Like asyncio.gather(*awaitables) with at most `limit` of them running at a time; results in input order.
+    `awaitables` may be a lazy iterable (a generator of coroutines is consumed as slots free up). The first
+    exception cancels the running ones and is raised, unless return_exceptions.
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    iterator = enumerate(awaitables)
+    results = {}
+
+    async def worker():
+        for position, awaitable in iterator:  # workers share the iterator: each takes the next awaitable
+            try:
+                results[position] = await awaitable
+            except Exception as error:
+                if not return_exceptions:
+                    raise
+                results[position] = error
+
+    workers = [asyncio.ensure_future(worker()) for _ in range(limit)]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for running in workers:
+            running.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for _, awaitable in iterator:  # never started: close them so they do not warn "never awaited"
+            if inspect.iscoroutine(awaitable):
+                awaitable.close()
+        raise
+    return [results[position] for position in range(len(results))]
+
+
+if __name__ == "__main__":
+    import random
+
+    SERVER_LIMIT = 50  # requests per second the fake API accepts
+
+    class FakeApi:
+        """Answers 429 (Retry-After: 1) beyond SERVER_LIMIT requests in the last second"""
+
+        def __init__(self):
+            self.recent = []
+            self.throttled = 0
+
+        async def get(self, item):
+            await asyncio.sleep(0.02)
+            now = time.monotonic()
+            self.recent = [sent for sent in self.recent if now - sent < 1.0] + [now]  # rejected ones count too
+            if len(self.recent) > SERVER_LIMIT:
+                self.throttled += 1
+                return 429, 1.0
+            return 200, None
+
+    async def fetch_with_retries(api, item, limiter=None):
+        while True:
+            if limiter is not None:
+                await limiter.acquire_async()
+            status, retry_after = await api.get(item)
+            if limiter is not None:
+                limiter.report(status, retry_after)
+            if status == 200:
+                return item
+            if limiter is None:
+                await asyncio.sleep(retry_after * random.uniform(1, 3))  # jittered, or every retry collides again
+
+    async def compare(requests):
+        api = FakeApi()
+        jobs = [asyncio.ensure_future(fetch_with_retries(api, item)) for item in range(requests)]
+        done, pending = await asyncio.wait(jobs, timeout=10)  # the retries keep colliding: give up after 10 s
+        for job in pending:
+            job.cancel()
+        print(f"asyncio.gather, all at once:    {len(done)}/{requests} done after 10 s, {api.throttled:,} x 429")
+
+        api = FakeApi()
+        limiter = AdaptiveLimiter(TokenBucket(rate=100, burst=10), max_rate=200)
+        start = time.perf_counter()
+        items = await bounded_gather((fetch_with_retries(api, item, limiter) for item in range(requests)), limit=20)
+        print(f"bounded_gather + adaptive rate: {time.perf_counter() - start:.2f} s, {api.throttled:,} x 429, "
+              f"final rate {limiter.rate:.0f}/s, in order: {items == list(range(requests))}")
+
+    asyncio.run(compare(300))
+
+    bucket = LeakyBucket(rate=100)
+    start = time.perf_counter()
+    threads = [threading.Thread(target=lambda: [bucket.acquire() for _ in range(25)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"4 threads x 25 acquires at 100/s (leaky bucket): {time.perf_counter() - start:.2f} s")
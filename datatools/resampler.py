@@ -0,0 +1,200 @@
+# Streaming time-series resampler (section 8.4 of 04_DATA/Pandas.py without loading the whole series):
+#   df.set_index('order_date').resample('ME')['sales'].sum()
+# - Chunks may arrive in time order or roughly in order; each chunk is reduced to per-bucket partial states
+#   (sum, count, min, max) that are merged into the open buckets
+# - The watermark is the latest timestamp seen minus `allowed_lateness`; buckets that end before the
+#   watermark's bucket are closed and emitted right away (including empty buckets, like resample)
+# - Rows that arrive for a bucket that was already emitted are too late: they are counted in
+#   stats['late_rows'] and dropped (or raise with late='raise')
+# - Fixed-frequency bins ('7D', '90min') must not depend on which row arrives first: origin defaults to
+#   midnight ('start_day', the same grid as 'epoch' when the frequency divides a day); other frequencies
+#   need origin='epoch' or an explicit Timestamp
+# - Concatenating everything emitted gives the same frame as df.resample(freq, on=on).agg(**named_aggs)
+#   (float sums and means can differ in the last bits, they are added up in a different order)
+#
+# Example:
+#   resampler = StreamingResampler('ME', on='order_date', allowed_lateness='2D', total_sales=('sales', 'sum'))
+#   for chunk in pd.read_csv('events.csv', parse_dates=['order_date'], chunksize=1_000_000):
+#       closed = resampler.push(chunk)        # finished months, as soon as they are complete
+#   last = resampler.close()                 # remaining open buckets at the end of the stream
+
+import pandas as pd
+from pandas.tseries.frequencies import to_offset
+from pandas.tseries.offsets import Tick
+
+from .chunked_groupby import iter_chunks
+
+RESAMPLE_AGGREGATIONS = ('sum', 'mean', 'count', 'min', 'max')
+
+# Partial states each aggregation needs, and how partial states of the same bucket are merged
+_PARTIALS = {'sum': ('sum',), 'mean': ('sum', 'count'), 'count': ('count',), 'min': ('min',), 'max': ('max',)}
+_MERGE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max', 'size': 'sum'}
+
+
+class StreamingResampler:
+    """Incremental df.resample(freq, on=on).agg(**named_aggs) over a stream of chunks (see module header)"""
+
+    def __init__(self, freq, on, allowed_lateness='0s', late='drop', closed=None, label=None,
+                 origin='start_day', **named_aggs):
+        if not named_aggs:
+            raise ValueError("At least one named aggregation is required, e.g. total=('sales', 'sum')")
+        for label_name, (column, how) in named_aggs.items():
+            if how not in RESAMPLE_AGGREGATIONS:
+                raise ValueError(f"{label_name}: unsupported aggregation {how!r} (use {RESAMPLE_AGGREGATIONS})")
+        if late not in ('drop', 'raise'):
+            raise ValueError("late must be 'drop' or 'raise'")
+        if isinstance(to_offset(freq), Tick) and isinstance(origin, str) and origin != 'epoch':
+            # 'start'/'end' (and 'start_day' for '7D') bins are anchored on the stream's earliest/latest row,
+            # which a stream only knows at the end; 'start_day' bins of a frequency that divides a day are
+            # the 'epoch' bins
+            if origin != 'start_day' or pd.Timedelta(days=1) % pd.Timedelta(to_offset(freq)):
+                raise ValueError(f"origin={origin!r} depends on the whole stream for freq={freq!r}; "
+                                 f"use origin='epoch' or a Timestamp")
+            origin = 'epoch'
+        self.freq = freq
+        self.on = on
+        self.allowed_lateness = pd.Timedelta(allowed_lateness)
+        self.late = late
+        self.named_aggs = named_aggs
+        self.stats = {'rows': 0, 'late_rows': 0, 'emitted_buckets': 0}
+
+        self._options = {'closed': closed, 'label': label, 'origin': origin}
+        self._partials = list(dict.fromkeys((column, partial) for column, how in named_aggs.values()
+                                            for partial in _PARTIALS[how]))
+        self._state = None       # open buckets: DataFrame indexed by bucket label, one column per partial
+        self._next_label = None  # first bucket that has not been emitted yet
+        self._max_seen = None
+
+    # 1. BUCKETING
+    # ----------------------------------------------------------------------------------------------------
+    def _resample(self, frame):
+        return frame.resample(self.freq, on=self.on, **self._options)
+
+    def _bucket_of(self, timestamp):
+        return self._resample(pd.DataFrame({self.on: [timestamp]})).size().index[0]
+
+    def _labels(self, start, end):
+        # Every bucket label from start up to end (inclusive), empty buckets included
+        return pd.date_range(start, end, freq=to_offset(self.freq))
+
+    def _partial_states(self, chunk):
+        resampled = self._resample(chunk)
+        states = {}
+        for column, partial in self._partials:
+            states[(column, partial)] = getattr(resampled[column], partial)()
+        states[(None, 'size')] = resampled.size()
+        return pd.DataFrame(states)
+
+    # 2. STREAM
+    # ----------------------------------------------------------------------------------------------------
+    def push(self, chunk):
+        """Adds a chunk; returns the buckets closed by the new watermark (possibly an empty frame)"""
+        chunk = chunk[[self.on] + list(dict.fromkeys(column for column, _ in self._partials))]
+        if not pd.api.types.is_datetime64_any_dtype(chunk[self.on]):
+            chunk = chunk.assign(**{self.on: pd.to_datetime(chunk[self.on])})
+        chunk = chunk[chunk[self.on].notna()]
+        if chunk.empty:
+            return self._finalize(None)
+        self.stats['rows'] += len(chunk)
+
+        partial = self._partial_states(chunk)
+        if self._next_label is not None:
+            late = partial.index < self._next_label
+            late_rows = int(partial.loc[late, (None, 'size')].sum())
+            if late_rows:
+                if self.late == 'raise':
+                    raise ValueError(f"{late_rows} rows belong to buckets that were already emitted "
+                                     f"(before {self._next_label}); increase allowed_lateness")
+                self.stats['late_rows'] += late_rows
+            partial = partial[~late]
+
+        if self._state is None:
+            self._state = partial
+        else:
+            merged = pd.concat([self._state, partial])
+            self._state = merged.groupby(level=0).agg({key: _MERGE[key[1]] for key in merged.columns})
+
+        latest = chunk[self.on].max()
+        self._max_seen = latest if self._max_seen is None else max(self._max_seen, latest)
+        return self._emit(self._bucket_of(self._max_seen - self.allowed_lateness))
+
+    def _emit(self, open_from):
+        # Emits every bucket before `open_from`: no on-time row can fall into them any more
+        if self._state is None or not len(self._state) or self._state.index.min() >= open_from:
+            return self._finalize(None)
+        closed = self._state[self._state.index < open_from]
+        self._state = self._state[self._state.index >= open_from]
+        start = closed.index.min() if self._next_label is None else self._next_label
+        labels = self._labels(start, closed.index.max())
+        self._next_label = labels[-1] + labels.freq
+
+        # Buckets between chunks that received no rows: sum/count are 0 (as in resample), min/max are missing
+        filled = closed.reindex(labels)
+        for key in filled.columns:
+            if key[1] in ('sum', 'count', 'size'):
+                filled[key] = filled[key].fillna(0).astype(closed[key].dtype)
+        return self._finalize(filled)
+
+    def close(self):
+        """Emits all remaining buckets (end of the stream)"""
+        if self._state is None or not len(self._state):
+            return self._finalize(None)
+        return self._emit(self._state.index.max() + pd.Timedelta(1, 'ns'))
+
+    def _finalize(self, states):
+        columns = list(self.named_aggs)
+        if states is None:
+            return pd.DataFrame(columns=columns, index=pd.DatetimeIndex([], name=self.on))
+        result = {}
+        for label, (column, how) in self.named_aggs.items():
+            if how == 'mean':
+                count = states[(column, 'count')]
+                result[label] = states[(column, 'sum')] / count.where(count > 0)
+            else:
+                result[label] = states[(column, how)]
+        self.stats['emitted_buckets'] += len(states)
+        return pd.DataFrame(result, index=states.index.rename(self.on))
+
+
+def resample_stream(source, freq, on, chunksize=1_000_000, **kwargs):
+    """Yields closed buckets while reading `source` (DataFrame, iterable of DataFrames or CSV/JSON-lines/Parquet path)"""
+    resampler = StreamingResampler(freq, on, **kwargs)
+    for chunk in iter_chunks(source, chunksize=chunksize):
+        closed = resampler.push(chunk)
+        if len(closed):
+            yield closed
+    closed = resampler.close()
+    if len(closed):
+        yield closed
+
+
+if __name__ == "__main__":
+    import time
+
+    import numpy as np
+
+    rng = np.random.default_rng(42)
+    n = 5_000_000
+    events = pd.DataFrame({
+        'order_date': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 730 * 86400, n)), 's'),
+        'sales': rng.uniform(50, 500, size=n).round(2),
+    })
+    # Roughly ordered stream: every event may be up to one hour out of place
+    jitter = rng.integers(0, 3600 * 10**9, n)
+    events = events.iloc[np.argsort(events['order_date'].to_numpy().astype('int64') + jitter, kind='stable')]
+    spec = dict(total_sales=('sales', 'sum'), avg_sales=('sales', 'mean'), orders=('sales', 'count'))
+
+    start = time.perf_counter()
+    resampler = StreamingResampler('ME', on='order_date', allowed_lateness='1h', **spec)
+    emitted = []
+    for offset in range(0, n, 500_000):
+        closed = resampler.push(events.iloc[offset:offset + 500_000])
+        if len(closed):
+            print(f"rows {offset + 500_000:>9,}: closed {', '.join(closed.index.strftime('%Y-%m'))}")
+            emitted.append(closed)
+    emitted.append(resampler.close())
+    print(f"Streaming: {time.perf_counter() - start:.2f} s, stats {resampler.stats}")
+
+    expected = events.resample('ME', on='order_date').agg(**spec)
+    result = pd.concat(emitted)
+    print("Same as resample:", result.index.equals(expected.index) and np.allclose(result, expected))
@@ -0,0 +1,170 @@
+# SQL profiler and slow-query log for SQLAlchemy engines:
+# - Hooks into the engine's before/after_cursor_execute events, so every statement is timed
+#   (unlike create_engine(..., echo=True), which only prints the SQL)
+# - QueryProfiler.read_sql wraps pd.read_sql and also records the fetch time, the rows returned and
+#   the bytes materialised in the resulting DataFrame
+# - Statements slower than `slow_threshold` seconds are logged together with their query plan
+# - report() summarises the top-N statements by total time
+#
+# Example:
+#   profiler = QueryProfiler(engine, slow_threshold=0.5).attach()
+#   df = profiler.read_sql('SELECT * FROM sales WHERE sales > 200')
+#   print(profiler.report(top_n=10))
+
+import logging
+import threading
+import time
+
+import pandas as pd
+from sqlalchemy import event, text
+
+from .query_cache import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfiler:
+    """Collects per-statement latency, rows and DataFrame bytes for one engine"""
+
+    def __init__(self, engine, slow_threshold=0.5, explain=True):
+        self.engine = engine
+        self.slow_threshold = slow_threshold
+        self.explain = explain
+        self.stats = {}  # normalised statement -> counters
+        self.slow_queries = []
+        self._lock = threading.Lock()
+        self._local = threading.local()  # per-thread start times and the statement being read into pandas
+
+    # 1. ENGINE EVENTS
+    # ----------------------------------------------------------------------------------------------------
+    def attach(self):
+        """Starts listening to the engine's cursor events"""
+        event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+        event.listen(self.engine, 'after_cursor_execute', self._after_execute)
+        return self
+
+    def detach(self):
+        """Stops profiling (collected stats are kept)"""
+        event.remove(self.engine, 'before_cursor_execute', self._before_execute)
+        event.remove(self.engine, 'after_cursor_execute', self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self._local.__dict__.setdefault('starts', []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - self._local.starts.pop()
+        rows = cursor.rowcount if cursor.rowcount is not None and cursor.rowcount >= 0 else 0
+        key = self._record(statement, elapsed, rows=rows)
+
+        if getattr(self._local, 'reading', False):
+            # Inside read_sql: the fetch is not done yet, so read_sql finishes the bookkeeping
+            self._local.last = (key, statement, parameters, elapsed)
+        elif elapsed >= self.slow_threshold:
+            self._log_slow(key, statement, parameters, elapsed)
+
+    # 2. RECORDING
+    # ----------------------------------------------------------------------------------------------------
+    def _record(self, statement, elapsed, rows=0, nbytes=0, calls=1):
+        key = normalize_sql(statement)
+        with self._lock:
+            entry = self.stats.setdefault(key, {'calls': 0, 'total_time': 0.0, 'max_time': 0.0,
+                                                'rows': 0, 'bytes': 0})
+            entry['calls'] += calls
+            entry['total_time'] += elapsed
+            entry['max_time'] = max(entry['max_time'], elapsed)
+            entry['rows'] += rows
+            entry['bytes'] += nbytes
+        return key
+
+    def _query_plan(self, statement, parameters):
+        # Runs EXPLAIN on a raw DBAPI connection, so it does not show up in the profile itself
+        if not self.explain:
+            return None
+        prefix = 'EXPLAIN QUERY PLAN ' if self.engine.dialect.name == 'sqlite' else 'EXPLAIN '
+        if isinstance(parameters, list):  # executemany: one parameter set is enough for the plan
+            parameters = parameters[0] if parameters else ()
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute(prefix + statement, parameters or ())
+            return [' | '.join(str(value) for value in row) for row in cursor.fetchall()]
+        except Exception as exc:
+            return [f'<plan not available: {exc}>']
+        finally:
+            raw.close()
+
+    def _log_slow(self, key, statement, parameters, elapsed, rows=None, nbytes=None):
+        plan = self._query_plan(statement, parameters)
+        self.slow_queries.append({'statement': key, 'seconds': elapsed, 'rows': rows, 'bytes': nbytes,
+                                  'plan': plan})
+        details = f" rows={rows} bytes={nbytes}" if rows is not None else ''
+        plan_text = ''.join(f"\n    {line}" for line in plan or [])
+        logger.warning("Slow query (%.3f s)%s: %s%s", elapsed, details, key, plan_text)
+
+    # 3. PANDAS INTEGRATION
+    # ----------------------------------------------------------------------------------------------------
+    def read_sql(self, sql, con=None, params=None, **kwargs):
+        """
+        pd.read_sql with full accounting: execute + fetch time, rows returned and DataFrame bytes.
+        Uses the profiled engine when no connection is given.
+        """
+        query = text(sql) if isinstance(sql, str) else sql
+        self._local.reading = True
+        self._local.last = None
+        start = time.perf_counter()
+        try:
+            df = pd.read_sql(query, con if con is not None else self.engine, params=params, **kwargs)
+        finally:
+            self._local.reading = False
+        total = time.perf_counter() - start
+
+        if self._local.last is not None:
+            key, statement, parameters, execute_time = self._local.last
+            nbytes = int(df.memory_usage(index=True, deep=True).sum())
+            # Add the fetch + DataFrame build time on top of the execute time already recorded
+            self._record(statement, total - execute_time, rows=len(df), nbytes=nbytes, calls=0)
+            with self._lock:
+                entry = self.stats[key]
+                entry['max_time'] = max(entry['max_time'], total)
+            if total >= self.slow_threshold:
+                self._log_slow(key, statement, parameters, total, rows=len(df), nbytes=nbytes)
+        return df
+
+    # 4. REPORTING
+    # ----------------------------------------------------------------------------------------------------
+    def report(self, top_n=10, by='total_time'):
+        """Returns the top-N statements sorted by `by` (total_time, calls, avg_time, rows or bytes)"""
+        with self._lock:
+            rows = [dict(statement=key, **entry) for key, entry in self.stats.items()]
+        report = pd.DataFrame(rows, columns=['statement', 'calls', 'total_time', 'max_time', 'rows', 'bytes'])
+        report.insert(3, 'avg_time', report['total_time'] / report['calls'].where(report['calls'] > 0))
+        return report.sort_values(by, ascending=False).head(top_n).reset_index(drop=True)
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.slow_queries.clear()
+
+    def __enter__(self):
+        return self.attach()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.detach()
+        return False
+
+
+if __name__ == "__main__":
+    from .db import get_engine
+
+    logging.basicConfig(level=logging.INFO)
+    pd.set_option('display.max_colwidth', 60)
+    pd.set_option('display.width', 160)
+
+    engine = get_engine()
+    with QueryProfiler(engine, slow_threshold=0.0) as profiler:  # threshold 0 logs everything for the demo
+        for _ in range(5):
+            profiler.read_sql('SELECT * FROM sales WHERE sales > 200')
+        profiler.read_sql('SELECT region, SUM(sales) AS total_sales FROM sales GROUP BY region')
+
+    print("\nTop statements by total time:")
+    print(profiler.report(top_n=5))
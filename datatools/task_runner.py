@@ -0,0 +1,380 @@
+# Structured task runner over threads, processes and asyncio (the three models of 03_ADVANCED/Concurrency.py):
+# - Jobs declare how they spend their time: kind='io' (blocking I/O: API calls, DB writes) runs on a thread
+#   pool, kind='cpu' (pandas/numpy transforms) on a process pool, kind='async' (coroutines) on one event loop
+#   thread; the kind comes from submit(), from the @task decorator, or coroutine functions are 'async'
+# - Bounded concurrency: pool sizes and an async semaphore limit running jobs, max_pending blocks submit()
+#   while too many jobs are queued (back-pressure for producers)
+# - Per-task timeouts counted from the moment the job starts (process workers report it, so time spent queued
+#   behind other cpu jobs does not count); coroutines are cancelled, thread/process jobs cannot be
+#   interrupted, so they are failed with TimeoutError and their late result is discarded
+# - Structured: every task submitted inside `with TaskRunner() as runner:` is finished when the block exits.
+#   The first failure cancels the other tasks (fail_fast) and is raised as TaskError, unless it was
+#   already retrieved through result()/gather()
+#
+# Example:
+#   with TaskRunner(io_workers=16, max_pending=1_000) as runner:
+#       pages = [runner.submit(fetch_page, page, timeout=10) for page in range(1, 51)]      # coroutine: async
+#       frames = [runner.submit(clean_sales, page.result(), kind='cpu') for page in pages]
+#       writes = [runner.submit(write_frame, frame.result(), kind='io') for frame in frames]
+#   totals = runner.gather(writes)
+
+import asyncio
+import inspect
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+TASK_KINDS = ('io', 'cpu', 'async')
+WATCHDOG_INTERVAL = 0.02  # seconds between timeout checks of thread and process jobs
+
+
+class TaskError(Exception):
+    """A task failed, timed out or was cancelled; the original exception is the __cause__"""
+
+    def __init__(self, task, cause):
+        super().__init__(f"Task {task.name!r} ({task.kind}) failed: {type(cause).__name__}: {cause}")
+        self.task = task
+
+
+def task(kind):
+    """Declares the kind of a function: @task('cpu') def transform(df): ..."""
+    if kind not in TASK_KINDS:
+        raise ValueError(f"Unknown task kind {kind!r} (use {TASK_KINDS})")
+
+    def declare(func):
+        func.task_kind = kind
+        return func
+    return declare
+
+
+_process_starts = None  # in a process pool worker: the queue on which it reports the jobs it starts
+
+
+def _init_process(starts):
+    global _process_starts
+    _process_starts = starts
+
+
+def _call(number, func, args, kwargs):
+    # Module level so process pool workers can unpickle it; reports the start of timed jobs to the watchdog
+    if number is not None:
+        _process_starts.put(number)
+    return func(*args, **kwargs)
+
+
+# 1. TASK HANDLES
+# --------------------------------------------------------------------------------------------------------
+class TaskHandle:
+    """One submitted job: wait with result()/exception(), stop it with cancel()"""
+
+    def __init__(self, runner, name, kind, timeout):
+        self.name = name
+        self.kind = kind
+        self.timeout = timeout
+        self.started = None      # time.monotonic() when the job started running
+        self.future = Future()   # settled once, by the job, its timeout or a cancellation
+        self._runner = runner
+        self._inner = None       # the executor's future (or the event loop's, for coroutines)
+        self._retrieved = False
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        state = 'pending' if not self.future.done() else 'cancelled' if self.future.cancelled() else 'done'
+        return f"<TaskHandle {self.name!r} {self.kind} {state}>"
+
+    def _settle(self, result=None, error=None, cancel=False):
+        with self._lock:
+            if self.future.done():
+                return False
+            if cancel:
+                self.future.cancel()
+                self.future.set_running_or_notify_cancel()  # wakes wait()/as_completed() like an executor does
+            elif error is not None:
+                self.future.set_exception(error)
+            else:
+                self.future.set_result(result)
+        if error is not None:
+            self._runner._failed(self)
+        return True
+
+    def _inner_done(self, inner):
+        if inner.cancelled():
+            self._settle(cancel=True)
+        elif inner.exception() is not None:
+            self._settle(error=inner.exception())
+        else:
+            self._settle(result=inner.result())
+
+    def done(self):
+        return self.future.done()
+
+    def cancel(self):
+        """Cancels the job (a running thread/process job is abandoned, its result is discarded)"""
+        if self._inner is not None:
+            self._inner.cancel()
+        return self._settle(cancel=True)
+
+    def result(self, timeout=None):
+        """The job's return value; raises TaskError if it failed, timed out or was cancelled"""
+        self._retrieved = True
+        try:
+            return self.future.result(timeout)
+        except CancelledError as error:
+            raise TaskError(self, error) from error
+        except TimeoutError:
+            if not self.future.done():
+                raise  # the wait timed out, not the task
+            raise TaskError(self, self.future.exception()) from self.future.exception()
+        except Exception as error:
+            raise TaskError(self, error) from error
+
+    def exception(self, timeout=None):
+        self._retrieved = True
+        if self.future.cancelled():
+            return CancelledError()
+        return self.future.exception(timeout)
+
+
+# 2. RUNNER
+# --------------------------------------------------------------------------------------------------------
+class TaskRunner:
+    """Routes io/cpu/async jobs to a thread pool, a process pool and an event loop (see module header)"""
+
+    def __init__(self, io_workers=16, cpu_workers=None, async_limit=100, max_pending=None, fail_fast=True):
+        self.io_workers = io_workers
+        self.cpu_workers = cpu_workers or os.cpu_count()
+        self.async_limit = async_limit
+        self.fail_fast = fail_fast
+        self.tasks = []
+        self.failures = []  # failed tasks, in the order they failed (cancellations are not failures)
+        self._pending = threading.BoundedSemaphore(max_pending) if max_pending else None
+        self._names = itertools.count(1)
+        self._lock = threading.Lock()
+        self._closed = False
+        # Created on first use: a runner that only does I/O never starts processes or an event loop
+        self._threads = None
+        self._processes = None
+        self._loop = None
+        self._loop_thread = None
+        self._async_slots = None
+        self._watchdog = None
+        self._process_starts = None  # numbers of timed process jobs a worker has started
+        self._starting = {}          # number -> handle, for timed process jobs not started yet
+
+    # Executors
+    def _thread_pool(self):
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix='task-io')
+        return self._threads
+
+    def _process_pool(self):
+        if self._processes is None:
+            self._process_starts = multiprocessing.Queue()
+            self._processes = ProcessPoolExecutor(max_workers=self.cpu_workers, initializer=_init_process,
+                                                  initargs=(self._process_starts,))
+        return self._processes
+
+    def _event_loop(self):
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, name='task-async', daemon=True)
+            self._loop_thread.start()
+        return self._loop
+
+    def _start_watchdog(self):
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch_timeouts, name='task-watchdog', daemon=True)
+            self._watchdog.start()
+
+    # Submission
+    def submit(self, func, *args, kind=None, name=None, timeout=None, **kwargs):
+        """
+        Starts func(*args, **kwargs) as a task and returns its TaskHandle.
+        kind: 'io', 'cpu' or 'async' (default: the @task declaration, 'async' for coroutine functions, else 'io').
+        'cpu' functions and their arguments must be picklable (module-level functions).
+        """
+        kind = kind or getattr(func, 'task_kind', None) or ('async' if inspect.iscoroutinefunction(func) else 'io')
+        if kind not in TASK_KINDS:
+            raise ValueError(f"Unknown task kind {kind!r} (use {TASK_KINDS})")
+        if self._closed:
+            raise RuntimeError("The runner is closed")
+        if self._pending is not None:
+            self._pending.acquire()  # back-pressure: wait for a slot
+        handle = TaskHandle(self, name or f"{getattr(func, '__name__', 'task')}-{next(self._names)}", kind, timeout)
+        with self._lock:
+            self.tasks.append(handle)
+
+        if kind == 'async':
+            inner = asyncio.run_coroutine_threadsafe(self._run_coroutine(handle, func, args, kwargs),
+                                                     self._event_loop())
+        elif kind == 'io':
+            inner = self._thread_pool().submit(self._run_thread, handle, func, args, kwargs)
+        else:
+            number = None
+            if timeout is not None:
+                number = next(self._names)
+                with self._lock:
+                    self._starting[number] = handle
+            inner = self._process_pool().submit(_call, number, func, args, kwargs)
+        handle._inner = inner
+        if self._pending is not None:
+            inner.add_done_callback(lambda _: self._pending.release())  # the slot frees when the work really ends
+        inner.add_done_callback(handle._inner_done)
+        if timeout is not None and kind != 'async':
+            self._start_watchdog()
+        return handle
+
+    def map(self, func, items, kind=None, timeout=None):
+        """One task per item: [submit(func, item) for item in items]"""
+        return [self.submit(func, item, kind=kind, timeout=timeout) for item in items]
+
+    @staticmethod
+    def _run_thread(handle, func, args, kwargs):
+        handle.started = time.monotonic()
+        return func(*args, **kwargs)
+
+    async def _run_coroutine(self, handle, func, args, kwargs):
+        if self._async_slots is None:
+            self._async_slots = asyncio.Semaphore(self.async_limit)  # created on the loop thread
+        async with self._async_slots:
+            handle.started = time.monotonic()
+            return await asyncio.wait_for(func(*args, **kwargs), handle.timeout)
+
+    def _watch_timeouts(self):
+        # Thread/process jobs cannot be interrupted: past their deadline they are failed and abandoned
+        while not self._closed:
+            now = time.monotonic()
+            self._receive_process_starts(now)
+            with self._lock:
+                timed = [handle for handle in self.tasks if handle.timeout is not None and handle.kind != 'async'
+                         and not handle.future.done()]
+            for handle in timed:
+                if handle.started is not None and now - handle.started > handle.timeout:
+                    handle._inner.cancel()
+                    handle._settle(error=TimeoutError(f"no result after {handle.timeout} s"))
+            time.sleep(WATCHDOG_INTERVAL)
+
+    def _receive_process_starts(self, now):
+        # The executor marks a process job running as soon as it is queued for a worker, so the clock of
+        # a process job starts when its worker reports it (at most WATCHDOG_INTERVAL late)
+        while self._process_starts is not None:
+            try:
+                number = self._process_starts.get_nowait()
+            except (queue.Empty, OSError, ValueError):
+                return
+            with self._lock:
+                handle = self._starting.pop(number, None)
+            if handle is not None:
+                handle.started = now
+
+    def _failed(self, handle):
+        with self._lock:
+            self.failures.append(handle)
+        if self.fail_fast and not self._closed:
+            self.cancel_all()
+
+    def cancel_all(self):
+        with self._lock:
+            pending = [handle for handle in self.tasks if not handle.future.done()]
+        for handle in pending:
+            handle.cancel()
+
+    # Results
+    def gather(self, handles=None, return_exceptions=False):
+        """Results of `handles` (default: every task) in order; raises the first TaskError"""
+        handles = list(self.tasks if handles is None else handles)
+        wait([handle.future for handle in handles])
+        results = []
+        for handle in handles:
+            try:
+                results.append(handle.result())
+            except TaskError as error:
+                if not return_exceptions:
+                    raise
+                results.append(error)
+        return results
+
+    def as_completed(self, handles=None):
+        """Yields handles as they finish"""
+        from concurrent.futures import as_completed
+
+        handles = list(self.tasks if handles is None else handles)
+        by_future = {handle.future: handle for handle in handles}
+        for future in as_completed(by_future):
+            yield by_future[future]
+
+    # Structure
+    def close(self, cancel=False):
+        """Waits for (or cancels) every task, then stops the executors"""
+        if cancel:
+            self.cancel_all()
+        with self._lock:
+            futures = [handle.future for handle in self.tasks]
+        wait(futures)
+        self._closed = True
+        # Abandoned (timed-out or cancelled) thread/process jobs finish in the background
+        if self._threads is not None:
+            self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+            self._process_starts.close()
+            self._starting.clear()
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(_cancel_coroutines(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(cancel=exc_type is not None)
+        if exc_type is None:
+            for handle in self.failures:
+                if not handle._retrieved:
+                    handle.result()  # raises the first failure nobody has looked at
+        return False
+
+
+async def _cancel_coroutines():
+    # Lets cancelled coroutines unwind before the event loop stops
+    tasks = [pending for pending in asyncio.all_tasks() if pending is not asyncio.current_task()]
+    for pending in tasks:
+        pending.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def _cpu_bound_sum(n):
+    return sum(i * i for i in range(n))
+
+
+if __name__ == "__main__":
+    def blocking_io(name, delay):
+        time.sleep(delay)  # e.g. requests.get or a database write
+        return f"{name} done after {delay} s"
+
+    async def async_io(name, delay):
+        await asyncio.sleep(delay)  # e.g. an aiohttp request
+        return f"{name} done after {delay} s"
+
+    start = time.perf_counter()
+    with TaskRunner(io_workers=8) as runner:
+        io_tasks = runner.map(lambda i: blocking_io(f"thread {i}", 0.5), range(8))
+        async_tasks = [runner.submit(async_io, f"coroutine {i}", 0.5) for i in range(100)]
+        cpu_tasks = runner.map(_cpu_bound_sum, [2_000_000] * 4, kind='cpu')
+        slow = runner.submit(async_io, "slow coroutine", 5, timeout=1)
+        print(runner.gather(io_tasks)[:2], runner.gather(async_tasks)[:2], runner.gather(cpu_tasks)[:1])
+        print("timeout:", repr(slow.exception()))
+    print(f"8 thread jobs, 100 coroutines, 4 processes and a timeout in {time.perf_counter() - start:.2f} s")
+
+    try:
+        with TaskRunner() as runner:
+            runner.submit(blocking_io, "long", 3)
+            runner.submit(lambda: 1 / 0, name='broken')
+    except TaskError as error:
+        print("fail fast:", error, "| other task:", runner.tasks[0])
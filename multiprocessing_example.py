@@ -1,11 +1,17 @@
 from multiprocessing import Process, current_process
 import time
 
+from datatools import WorkerPool
+
 def compute_square(n):
     print(f"[{current_process().name}] Computing square of {n}")
     time.sleep(1)
     print(f"[{current_process().name}] Result: {n**2}")
 
+def square(n):
+    time.sleep(1)
+    return n**2
+
 if __name__ == "__main__":
     numbers = [2, 4, 6, 8]
     processes = []
@@ -17,4 +23,9 @@ if __name__ == "__main__":
     for p in processes:
         p.join()
 
-    print("All processes have finished.")
\ No newline at end of file
+    print("All processes have finished.")
+
+    # Same work in a persistent pool: no process start per number, and the results come back in order
+    with WorkerPool() as pool:
+        results = pool.map(square, numbers)
+    print("Squares returned to the parent:", results)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from datatools import array_stats
+from datatools.array_stats import fused_stats
+
+STATISTICS = ['count', 'sum', 'mean', 'var', 'std', 'min', 'max']
+
+
+@pytest.fixture(autouse=True)
+def small_blocks(monkeypatch):
+    monkeypatch.setattr(array_stats, 'BLOCK_ELEMENTS', 64)  # many blocks even for small test arrays
+
+
+def expected(data, axis, ddof):
+    return {'count': data.size if axis is None else data.shape[axis], 'sum': data.sum(axis=axis),
+            'mean': data.mean(axis=axis), 'var': data.var(axis=axis, ddof=ddof),
+            'std': data.std(axis=axis, ddof=ddof), 'min': data.min(axis=axis), 'max': data.max(axis=axis)}
+
+
+@pytest.mark.parametrize('axis', [None, 0, 1, -1])
+@pytest.mark.parametrize('workers', [1, 4])
+def test_matches_numpy(axis, workers):
+    data = np.random.default_rng(0).normal(1e6, 5, size=(301, 7))
+    result = fused_stats(data, STATISTICS, axis=axis, ddof=1, workers=workers)
+    for name, value in expected(data, None if axis is None else axis % 2, 1).items():
+        np.testing.assert_allclose(result[name], value, rtol=1e-10, err_msg=name)
+
+
+def test_non_contiguous_and_integer_input():
+    data = np.random.default_rng(1).integers(-50, 50, size=(40, 30)).T  # Fortran-ordered view
+    result = fused_stats(data, STATISTICS)
+    for name, value in expected(data, None, 0).items():
+        np.testing.assert_allclose(result[name], value, rtol=1e-12, err_msg=name)
+    assert fused_stats(data, 'sum')['sum'].dtype == data.sum().dtype
+
+
+def test_results_do_not_depend_on_the_number_of_workers():
+    data = np.random.default_rng(2).random((500, 3))
+    one = fused_stats(data, ['mean', 'std'], axis=0, workers=1)
+    many = fused_stats(data, ['mean', 'std'], axis=0, workers=8)
+    for name in one:
+        np.testing.assert_array_equal(one[name], many[name])
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        fused_stats(np.ones(3), 'median')
+    with pytest.raises(ValueError):
+        fused_stats(np.ones((0, 3)), 'sum', axis=0)
+    with pytest.raises(np.AxisError):
+        fused_stats(np.ones(3), 'sum', axis=1)
+    assert np.isnan(fused_stats(np.ones(1), 'var', ddof=1)['var'])
@@ -0,0 +1,57 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from datatools.array_store import ArrayStore, reduce_blocks
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArrayStore(tmp_path / 'store')
+
+
+def test_save_open_and_append(store):
+    features = np.random.default_rng(0).random((1_000, 3))
+    store.save('features', features)
+    mapped = store.open('features')
+    assert isinstance(mapped, np.memmap) and not mapped.flags.writeable
+    np.testing.assert_array_equal(mapped, features)
+
+    extra = np.ones((10, 3))
+    store.append('features', extra)
+    np.testing.assert_array_equal(store.open('features'), np.concatenate([features, extra]))
+    np.testing.assert_array_equal(store.read('features', slice(5, 7)), features[5:7])
+    assert store.catalog()['features']['shape'] == [1_010, 3]
+    assert store.names() == ['features'] and 'features' in store
+    assert pickle.loads(pickle.dumps(store)).names() == ['features']
+
+
+@pytest.mark.parametrize('how', ['sum', 'mean', 'min', 'max'])
+@pytest.mark.parametrize('axis', [None, 0, 1, 2, -1, -3])
+def test_reductions_match_numpy(store, how, axis):
+    values = np.random.default_rng(1).integers(-100, 100, size=(503, 4, 3)).astype(np.int32)
+    store.save('values', values)
+    result = store.reduce('values', how, axis=axis, block_bytes=256)
+    np.testing.assert_allclose(result, getattr(values, how)(axis=axis))
+    count = reduce_blocks(values, 'count', axis=axis, block_bytes=256)
+    np.testing.assert_array_equal(count, np.ones_like(values).sum(axis=axis))
+
+
+def test_errors(store):
+    store.save('prices', np.arange(10.0))
+    with pytest.raises(FileExistsError):
+        store.save('prices', np.arange(3.0))
+    with pytest.raises(ValueError):
+        store.save('bad/name', np.arange(3.0))
+    with pytest.raises(ValueError):
+        store.append('prices', np.ones((2, 2)))
+    with pytest.raises(ValueError):
+        store.reduce('prices', 'median')
+    with pytest.raises(ValueError):
+        reduce_blocks(np.empty(0), 'max')
+    with pytest.raises(ValueError):
+        reduce_blocks(np.ones((2, 2)), axis=-3)
+    store.delete('prices')
+    with pytest.raises(KeyError):
+        store.open('prices')
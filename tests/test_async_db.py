@@ -0,0 +1,75 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from datatools.async_db import AsyncDatabase
+
+
+def frame(n):
+    return pd.DataFrame({'customer_id': range(n), 'sales': [10.0] * n})
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_writes_are_ordered_and_readable(tmp_path):
+    async def main():
+        async with AsyncDatabase(f'sqlite:///{tmp_path / "t.db"}') as db:
+            for _ in range(3):
+                db.submit_write(frame(2), 'sales')
+            await db.flush()
+            return await db.read_sql('SELECT COUNT(*) AS n FROM sales')
+
+    assert run(main())['n'].iloc[0] == 6
+
+
+def test_failed_write_is_raised_by_flush_even_after_it_finished(tmp_path):
+    async def main():
+        db = AsyncDatabase(f'sqlite:///{tmp_path / "t.db"}')
+        await db.write_frame(frame(1), 'sales')
+        failing = db.submit_write(frame(1), 'sales', if_exists='fail')  # the table exists: ValueError
+        await asyncio.wait([failing])  # finished (and out of the pending set) before flush()
+        with pytest.raises(ValueError):
+            await db.flush()
+        await db.flush()  # raised once only
+        await db.close()
+
+    run(main())
+
+
+def test_close_raises_unawaited_write_error(tmp_path):
+    async def main():
+        async with AsyncDatabase(f'sqlite:///{tmp_path / "t.db"}') as db:
+            await db.write_frame(frame(1), 'sales')
+            db.submit_write(frame(1), 'sales', if_exists='fail')
+
+    with pytest.raises(ValueError):
+        run(main())
+
+
+def test_awaited_write_error_is_not_raised_again(tmp_path):
+    async def main():
+        async with AsyncDatabase(f'sqlite:///{tmp_path / "t.db"}') as db:
+            await db.write_frame(frame(1), 'sales')
+            with pytest.raises(ValueError):
+                await db.write_frame(frame(1), 'sales', if_exists='fail')
+            await db.flush()
+
+    run(main())
+
+
+def test_error_taken_from_the_submitted_future_is_not_raised_again(tmp_path):
+    async def main():
+        async with AsyncDatabase(f'sqlite:///{tmp_path / "t.db"}') as db:
+            await db.write_frame(frame(1), 'sales')
+            with pytest.raises(ValueError):
+                await db.submit_write(frame(1), 'sales', if_exists='fail')
+            failing = db.submit_write(frame(1), 'sales', if_exists='fail')
+            await asyncio.wait([failing])
+            assert isinstance(failing.exception(), ValueError)
+            await db.flush()
+            assert await db.submit_write(frame(2), 'sales') == 2
+
+    run(main())
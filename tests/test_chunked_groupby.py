@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.chunked_groupby import chunked_agg, iter_chunks
+
+EXACT = dict(total=('sales', 'sum'), average=('sales', 'mean'), spread=('sales', 'std'), low=('sales', 'min'),
+             median=('sales', 'median'), customers=('customer_id', 'nunique'), orders=('customer_id', 'count'),
+             rows=('sales', 'size'), first=('sales', 'first'))
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(0)
+    n = 5_000
+    sales = rng.gamma(2.0, 100.0, size=n).round(2)
+    sales[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({'region': rng.choice(['North', 'South', 'East'], size=n),
+                         'channel': rng.choice(['web', 'store'], size=n),
+                         'customer_id': rng.integers(1, 500, size=n), 'sales': sales})
+
+
+@pytest.mark.parametrize('by', ['region', ['region', 'channel']])
+def test_exact_aggregations_match_groupby(sales, by):
+    expected = sales.groupby(by).agg(**EXACT).reset_index()
+    result = chunked_agg(sales, by=by, chunksize=700, **EXACT)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-9)
+
+
+def test_files_and_worker_processes(sales, tmp_path):
+    sales.to_csv(tmp_path / 'sales.csv', index=False)
+    sales.to_json(tmp_path / 'sales.jsonl', orient='records', lines=True)
+    expected = sales.groupby('region').agg(total=('sales', 'sum'), orders=('sales', 'count')).reset_index()
+    for source in (tmp_path / 'sales.csv', tmp_path / 'sales.jsonl'):
+        result = chunked_agg(source, by='region', chunksize=1_000, workers=2,
+                             total=('sales', 'sum'), orders=('sales', 'count'))
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_approximate_sketches_are_close(sales):
+    expected = sales.groupby('region').agg(median=('sales', 'median'), customers=('customer_id', 'nunique'))
+    result = chunked_agg(sales, by='region', approximate=True, chunksize=700, median=('sales', 'median'),
+                         customers=('customer_id', 'nunique')).set_index('region')
+    np.testing.assert_allclose(result['median'], expected['median'], rtol=0.02)
+    np.testing.assert_allclose(result['customers'], expected['customers'], rtol=0.05)
+
+
+def test_errors_and_unknown_file_types(sales, tmp_path):
+    with pytest.raises(ValueError):
+        chunked_agg(sales, by='region')
+    with pytest.raises(ValueError):
+        chunked_agg(sales, by='region', middle=('sales', 'mode'))
+    with pytest.raises(ValueError):
+        next(iter_chunks(tmp_path / 'sales.txt'))
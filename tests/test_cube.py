@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.cube import PivotCube
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    return pd.DataFrame({'region': rng.choice(['North', 'South', 'East'], size=n),
+                         'month': rng.integers(1, 5, size=n),
+                         'customer_id': rng.integers(1, 20, size=n),
+                         'sales': rng.uniform(50, 500, size=n).round(2),
+                         'quantity': rng.integers(1, 10, size=n)})
+
+
+@pytest.fixture
+def cube(sales):
+    return PivotCube.build(sales, dimensions=['region', 'month', 'customer_id'], measures=['sales', 'quantity'],
+                           chunksize=300)
+
+
+@pytest.mark.parametrize('shape', [
+    dict(index=['region', 'month'], values='sales', aggfunc=['sum', 'mean', 'count'], fill_value=0),
+    dict(index='region', columns='month', values='sales', aggfunc='sum'),
+    dict(index='customer_id', columns='region', values=['sales', 'quantity'], aggfunc='max'),
+    dict(index='month', values='quantity', aggfunc='min'),
+])
+def test_pivot_matches_pivot_table(sales, cube, shape):
+    pd.testing.assert_frame_equal(cube.pivot(**shape), pd.pivot_table(sales, **shape), check_dtype=False)
+
+
+def test_values_are_required(cube):
+    with pytest.raises(ValueError, match='values'):
+        cube.pivot(index='region')
+
+
+def test_slice_and_rollup(sales, cube):
+    north = sales[sales['region'] == 'North']
+    expected = north.groupby('month')['sales'].agg(['sum', 'count'])
+    result = cube.slice(region='North').rollup('month', values='sales')
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+    with pytest.raises(KeyError):
+        cube.slice(store='A')
+    with pytest.raises(ValueError):
+        cube.rollup('month', aggfunc='median')
+
+
+def test_save_and_load(cube, tmp_path):
+    cube.save(tmp_path / 'cube.pkl')
+    pd.testing.assert_frame_equal(PivotCube.load(tmp_path / 'cube.pkl').cells, cube.cells)
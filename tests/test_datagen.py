@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from datatools.datagen import DataGenerator
+
+
+@pytest.fixture
+def generator():
+    return DataGenerator(seed=7, customers=500, null_rate=0.05, block_rows=300)
+
+
+def test_same_seed_same_rows_whatever_the_workers(generator):
+    single = generator.frame('sales', rows=1_000)
+    parallel = DataGenerator(seed=7, customers=500, null_rate=0.05, block_rows=300).frame('sales', rows=1_000,
+                                                                                           workers=2)
+    pd.testing.assert_frame_equal(single, parallel)
+    assert not single.equals(DataGenerator(seed=8, customers=500, block_rows=300).frame('sales', rows=1_000))
+
+
+def test_tables_are_consistent(generator):
+    customers = generator.frame('customers')
+    sales = generator.frame('sales', rows=1_000)
+    assert len(customers) == 500 and customers['customer_id'].is_unique
+    assert sales['order_id'].tolist() == list(range(1, 1_001))
+    assert sales['customer_id'].between(1, 500).all()
+    assert sales['order_date'].is_monotonic_increasing
+    # The denormalised name/region columns come from the customers table
+    looked_up = customers.set_index('customer_id').loc[sales['customer_id'], ['name', 'region']]
+    pd.testing.assert_frame_equal(sales[['name', 'region']], looked_up.reset_index(drop=True))
+    assert 0 < sales['sales'].isna().mean() < 0.15
+
+
+def test_written_files_hold_the_generated_rows(generator, tmp_path):
+    expected = generator.frame('orders', rows=700)
+    assert generator.write('orders', tmp_path / 'orders.csv', rows=700) == 700
+    pd.testing.assert_frame_equal(pd.read_csv(tmp_path / 'orders.csv', parse_dates=['order_date']), expected)
+    generator.write('orders', tmp_path / 'orders.jsonl', rows=700)
+    assert len(pd.read_json(tmp_path / 'orders.jsonl', lines=True)) == 700
+    generator.write('orders', tmp_path / 'orders.db', rows=700)
+    stored = pd.read_sql('SELECT COUNT(*) AS n FROM orders', create_engine(f'sqlite:///{tmp_path / "orders.db"}'))
+    assert stored['n'].iloc[0] == 700
+
+
+def test_parquet_output(generator, tmp_path):
+    pytest.importorskip('pyarrow')
+    generator.write('sales', tmp_path / 'sales.parquet', rows=700)
+    pd.testing.assert_frame_equal(pd.read_parquet(tmp_path / 'sales.parquet'), generator.frame('sales', rows=700),
+                                  check_dtype=False)
+
+
+def test_errors(generator, tmp_path):
+    with pytest.raises(ValueError):
+        generator.frame('products', rows=10)
+    with pytest.raises(ValueError):
+        generator.frame('sales')
+    with pytest.raises(ValueError):
+        generator.write('sales', tmp_path / 'sales.txt', rows=10)
+    assert np.issubdtype(generator.frame('orders', rows=10)['order_date'].dtype, np.datetime64)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.expressions import assign_columns, compile_expression, filter_frame
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    n = 1_000
+    return pd.DataFrame({
+        'sales': rng.uniform(0, 500, size=n).round(2),
+        'quantity': rng.integers(1, 20, size=n),
+        'region': pd.Categorical(rng.choice(['North', 'South', 'East'], size=n)),
+        'email': rng.choice(['a@x.com', 'b@y.com'], size=n),
+    })
+
+
+@pytest.mark.parametrize('text', [
+    "sales > 200 and region == 'North'",
+    "100 < sales <= 200 or quantity in [1, 2, 3]",
+    "not (region != 'South') and quantity * 2 > 10",
+    "region in ['East', 'Nowhere']",
+])
+def test_filter_matches_query(frame, text):
+    expected = frame.query(text)
+    pd.testing.assert_frame_equal(filter_frame(frame, text, block_rows=100), expected)
+
+
+def test_variables_are_replaced_outside_string_literals(frame):
+    limit = 250
+    text = "email == 'a@x.com' and sales > @limit"
+    expected = frame.query(text)
+    assert len(expected)
+    pd.testing.assert_frame_equal(filter_frame(frame, text, {'limit': limit}), expected)
+
+
+def test_assign_matches_eval(frame):
+    result = assign_columns(frame, block_rows=64, total='sales * quantity', half='sales / 2')
+    np.testing.assert_allclose(result['total'], frame.eval('sales * quantity'))
+    np.testing.assert_allclose(result['half'], frame['sales'] / 2)
+
+
+def test_columns_and_errors(frame):
+    assert compile_expression("sales > 1 and region == 'x'").columns == ['sales', 'region']
+    with pytest.raises(KeyError):
+        filter_frame(frame, 'missing > 1')
+    with pytest.raises(ValueError):
+        compile_expression('sales.mean() > 1')
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.frame_builder import FrameBuilder, build_frame, replicate_frame
+
+
+def batch(start, n):
+    return pd.DataFrame({
+        'name': pd.array([f'c{i}' for i in range(n)], dtype='string'),
+        'region': pd.Categorical(['North', 'South'] * (n // 2)),
+        'id': np.arange(start, start + n),
+        'sales': np.linspace(0, 1, n),
+    })
+
+
+def test_build_matches_concat():
+    batches = [batch(0, 4), batch(4, 6), batch(10, 2)]
+    expected = pd.concat(batches, ignore_index=True)
+    pd.testing.assert_frame_equal(build_frame(batches, capacity=2), expected)
+
+
+def test_new_categories_are_merged():
+    first = pd.DataFrame({'region': pd.Categorical(['North'])})
+    second = pd.DataFrame({'region': pd.Categorical(['East', 'North'])})
+    built = build_frame([first, second])
+    assert built['region'].tolist() == ['North', 'East', 'North']
+    assert list(built['region'].cat.categories) == ['North', 'East']
+
+
+@pytest.mark.parametrize('backend', ['numpy', 'arrow'])
+def test_rejected_batch_leaves_no_trace(backend):
+    if backend == 'arrow':
+        pytest.importorskip('pyarrow')
+    builder = FrameBuilder(backend=backend).append(batch(0, 4))
+    bad = batch(4, 2).assign(sales=['x', 'y'])  # the last column has the wrong dtype
+    bad['region'] = pd.Categorical(['West', 'East'])
+    with pytest.raises(TypeError):
+        builder.append(bad)
+    builder.append(batch(4, 2))
+    pd.testing.assert_frame_equal(builder.build(), pd.concat([batch(0, 4), batch(4, 2)], ignore_index=True))
+
+
+def test_ordered_categories_must_match():
+    builder = FrameBuilder().append(pd.DataFrame({'size': pd.Categorical(['S'], categories=['S', 'M'], ordered=True),
+                                                  'n': [1]}))
+    other = pd.DataFrame({'size': pd.Categorical(['L'], categories=['L'], ordered=True), 'n': [2]})
+    with pytest.raises(TypeError):
+        builder.append(other)
+    assert builder.build()['n'].tolist() == [1]
+
+
+def test_reserve_fills_in_place():
+    builder = FrameBuilder.from_schema({'a': np.float64, 'b': np.int64})
+    views = builder.reserve(3)
+    views['a'][:] = [1.0, 2.0, 3.0]
+    views['b'][:] = 7
+    assert builder.build().to_dict('list') == {'a': [1.0, 2.0, 3.0], 'b': [7, 7, 7]}
+
+
+def test_replicate_frame_matches_concat():
+    df = batch(0, 4)
+    pd.testing.assert_frame_equal(replicate_frame(df, 3), pd.concat([df] * 3, ignore_index=True))
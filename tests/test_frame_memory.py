@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.frame_memory import memory_summary, optimize_frame, restore_frame
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    return pd.DataFrame({
+        'customer_id': rng.integers(1, 50_000, size=n).astype(str).astype(object),
+        'sales': rng.integers(50, 500, size=n).astype(float),
+        'precise': rng.uniform(0, 1, size=n),
+        'region': rng.choice(['North', 'South', 'East'], size=n).astype(object),
+        'order_date': pd.Series(pd.date_range('2025-01-01', periods=30)).dt.strftime('%Y-%m-%d')
+                        .sample(n, replace=True, random_state=1).to_numpy().astype(object),
+        'quantity': rng.integers(1, 20, size=n),
+    })
+
+
+def test_conversions_and_round_trip(sales):
+    optimized, report = optimize_frame(sales)
+    conversions = dict(zip(report['column'], report['conversion']))
+    assert conversions == {'customer_id': 'numeric string', 'sales': 'float', 'precise': 'unchanged',
+                           'region': 'category', 'order_date': 'date string', 'quantity': 'integer'}
+    assert optimized['quantity'].dtype == np.int8 and optimized['sales'].dtype == np.float32
+    assert optimized['order_date'].dtype.kind == 'M'
+    assert optimized.memory_usage(deep=True).sum() < sales.memory_usage(deep=True).sum()
+    pd.testing.assert_frame_equal(restore_frame(optimized, report), sales)
+    assert 'saved' in memory_summary(report)
+
+
+def test_lossy_conversions_are_skipped():
+    frame = pd.DataFrame({'ids': ['001', '002', '003'], 'mixed': ['a', 1, None], 'big': [2**40, 1, 2]})
+    optimized, report = optimize_frame(frame)
+    assert list(report['conversion']) == ['string', 'unchanged', 'unchanged']  # '001' -> 1 would lose the zeros
+    assert optimized['big'].dtype == np.int64
+    pd.testing.assert_frame_equal(restore_frame(optimized, report), frame)
+
+
+def test_missing_values_survive_the_round_trip():
+    # restore_frame gives NaN for missing values, like a freshly loaded object column
+    frame = pd.DataFrame({'region': pd.Series(['North', np.nan, 'North', 'South'] * 10, dtype=object),
+                          'value': [1.5, np.nan, 2.5, 3.5] * 10})
+    optimized, report = optimize_frame(frame)
+    assert isinstance(optimized['region'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(restore_frame(optimized, report), frame)
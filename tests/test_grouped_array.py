@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.grouped_array import GroupedArray
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(42)
+    keys = rng.integers(0, 50, 2_000)
+    features = rng.normal(size=(2_000, 3))
+    return keys, features, pd.DataFrame(features).groupby(keys)
+
+
+@pytest.mark.parametrize('how', ['sum', 'mean', 'count', 'min', 'max', 'prod', 'var', 'std', 'first', 'last'])
+def test_reduce_matches_pandas(data, how):
+    keys, features, grouped = data
+    expected = getattr(grouped, how)().to_numpy()
+    np.testing.assert_allclose(GroupedArray(keys).reduce(features, how), expected)
+
+
+def test_transform_and_normalize_match_pandas(data):
+    keys, features, grouped = data
+    groups = GroupedArray(keys)
+    np.testing.assert_allclose(groups.transform(features, 'mean'), grouped.transform('mean').to_numpy())
+    zscore = (pd.DataFrame(features) - grouped.transform('mean')) / grouped.transform('std')
+    np.testing.assert_allclose(groups.normalize(features, 'zscore'), zscore.to_numpy())
+
+
+def test_cumsum_matches_pandas(data):
+    keys, features, grouped = data
+    np.testing.assert_allclose(GroupedArray(keys).cumsum(features), grouped.cumsum().to_numpy())
+
+
+def test_cumsum_keeps_groups_apart():
+    keys = np.array([0, 0, 1, 1, 2, 2])
+    with_nan = np.array([1, np.nan, 1, 2, 3, 4])
+    expected = pd.Series(with_nan).groupby(keys).cumsum().to_numpy()
+    np.testing.assert_array_equal(GroupedArray(keys).cumsum(with_nan), expected)  # [1, nan, 1, 3, 3, 7]
+    huge = np.array([1e17, 1, 1, 2, 3, 4])
+    np.testing.assert_array_equal(GroupedArray(keys).cumsum(huge)[2:], [1, 3, 3, 7])
+
+
+def test_several_keys_and_missing_keys():
+    region = np.array(['N', 'S', None, 'N', 'S', None], dtype=object)
+    year = np.array([1, 1, 1, 2, 1, 1])
+    values = np.arange(6.0)
+    groups = GroupedArray([region, year])
+    expected = pd.Series(values).groupby([region, year], dropna=False).sum()
+    assert groups.ngroups == len(expected)
+    assert sorted(groups.reduce(values, 'sum').tolist()) == sorted(expected.tolist())
+
+
+def test_cov_matches_numpy(data):
+    keys, features, _ = data
+    covariances = GroupedArray(keys).cov(features)
+    np.testing.assert_allclose(covariances[0], np.cov(features[keys == 0].T))
+
+
+def test_rejects_bad_input(data):
+    keys, features, _ = data
+    with pytest.raises(ValueError):
+        GroupedArray(keys).reduce(features[:-1])
+    with pytest.raises(ValueError):
+        GroupedArray(keys).reduce(features, 'median')
+    with pytest.raises(ValueError):
+        GroupedArray([keys, keys[:-1]])
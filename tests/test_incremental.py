@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.incremental import IncrementalStats, OrderStatistics
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(0)
+    n = 600
+    sales = rng.integers(1, 100, size=n).astype(float)
+    sales[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({'customer_id': rng.integers(1, 6, size=n), 'sales': sales})
+
+
+def batches(frame, size=97):
+    return [frame.iloc[start:start + size] for start in range(0, len(frame), size)]
+
+
+def test_rolling_and_cumulative_columns_match_full_history(history):
+    stats = IncrementalStats(by='customer_id', mean_3=('sales', 'rolling_mean', 3), max_5=('sales', 'rolling_max', 5),
+                             total=('sales', 'cumsum'), best=('sales', 'cummax'), worst=('sales', 'cummin'))
+    result = pd.concat([stats.update(batch) for batch in batches(history)])
+    grouped = history.groupby('customer_id')['sales']
+    np.testing.assert_allclose(result['mean_3'], grouped.rolling(3).mean().droplevel(0).sort_index())
+    np.testing.assert_allclose(result['max_5'], grouped.rolling(5).max().droplevel(0).sort_index())
+    np.testing.assert_allclose(result['total'], grouped.cumsum())
+    np.testing.assert_allclose(result['best'], grouped.cummax())
+    np.testing.assert_allclose(result['worst'], grouped.cummin())
+    assert list(result.columns[-5:]) == ['mean_3', 'max_5', 'total', 'best', 'worst']
+    assert stats.rows_seen == len(history)
+
+
+@pytest.mark.parametrize('options', [{}, {'ascending': False, 'method': 'min'}, {'method': 'max'}])
+def test_ranks_equal_pandas_over_the_history_so_far(history, options):
+    stats = IncrementalStats(by='customer_id', rank=('sales', 'rank', options))
+    seen = 0
+    for batch in batches(history):
+        ranked = stats.update(batch)
+        seen += len(batch)
+        expected = history.iloc[:seen].groupby('customer_id')['sales'].rank(**options).iloc[-len(batch):]
+        np.testing.assert_allclose(ranked['rank'], expected)
+
+
+def test_state_survives_save_and_load(history, tmp_path):
+    stats = IncrementalStats(total=('sales', 'cumsum'), mean_3=('sales', 'rolling_mean', 3))
+    first, second = history.iloc[:300], history.iloc[300:]
+    stats.update(first)
+    stats.save(tmp_path / 'stats.pkl')
+    result = IncrementalStats.load(tmp_path / 'stats.pkl').update(second)
+    np.testing.assert_allclose(result['total'], history['sales'].cumsum().iloc[300:])
+    np.testing.assert_allclose(result['mean_3'], history['sales'].rolling(3).mean().iloc[300:])
+
+
+def test_order_statistics():
+    structure = OrderStatistics(block_size=4)
+    values = np.random.default_rng(1).integers(0, 20, size=50).astype(float)
+    structure.insert(values[:30])
+    structure.insert(values[30:])
+    assert [structure.kth(k) for k in range(len(values))] == sorted(values)
+    np.testing.assert_allclose(structure.rank(values), pd.Series(values).rank())
+
+
+@pytest.mark.parametrize('spec', [('sales', 'rolling_mean'), ('sales', 'rolling_mode', 3), ('sales', 'cumsum', 2),
+                                  ('sales', 'rank', {'method': 'dense'})])
+def test_bad_specifications(spec):
+    with pytest.raises(ValueError):
+        IncrementalStats(stat=spec)
+    with pytest.raises(ValueError):
+        IncrementalStats()
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from datatools.ingest import IngestionError, IngestionService
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "ingest.db"}')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE orders (id INTEGER PRIMARY KEY, amount REAL NOT NULL)'))
+    return engine
+
+
+def count(engine):
+    with engine.connect() as conn:
+        return conn.execute(text('SELECT COUNT(*) FROM orders')).scalar()
+
+
+def test_batches_from_many_threads_are_coalesced(engine):
+    def produce(worker):
+        return [service.submit([(worker * 100 + i, 1.0)]) for i in range(50)]
+
+    with IngestionService(engine=engine, table='orders', max_delay=0.05) as service:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [future for batch in pool.map(produce, range(4)) for future in batch]
+        assert sum(future.result() for future in futures) == 200
+    assert count(engine) == 200
+    assert service.stats['rows'] == 200 and service.stats['transactions'] < 200
+
+
+def test_failed_batch_does_not_fail_the_others(engine):
+    with IngestionService(engine=engine, table='orders', max_delay=0.2) as service:
+        good = service.submit(pd.DataFrame({'id': [1, 2], 'amount': [1.0, 2.0]}))
+        bad = service.submit([{'id': 3, 'amount': None}])
+        other = service.submit([{'id': 4, 'amount': 4.0}])
+        assert good.result() == 2 and other.result() == 1
+        with pytest.raises(IngestionError):
+            bad.result()
+    assert count(engine) == 3 and service.stats['failed_batches'] == 1
+
+
+def test_process_client_acknowledges_writes(engine):
+    with IngestionService(engine=engine, table='orders') as service:
+        client = service.client()
+        assert client.write([(1, 1.0), (2, 2.0)], timeout=10) == 2
+        with pytest.raises(IngestionError):
+            client.write([(1, 5.0)], timeout=10)  # duplicate primary key
+        with pytest.raises(IngestionError, match='TypeError'):
+            client.write([3.0], timeout=10)  # a row that is neither a dict nor a tuple
+        with pytest.raises(IngestionError, match='ValueError'):
+            client.write([{'id': 3, 'price': 1.0}], timeout=10)
+        assert client.write([(3, 3.0)], timeout=10) == 1  # the bridge is still running
+    assert count(engine) == 3
+
+
+def test_unknown_columns_and_stopped_service(engine):
+    service = IngestionService(engine=engine, table='orders')
+    with pytest.raises(RuntimeError):
+        service.submit([(1, 1.0)])
+    with service, pytest.raises(ValueError):
+        service.submit([{'id': 1, 'price': 1.0}])
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.joins import choose_join_strategy, join_frames
+from datatools.query_builder import read_file
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    customers = pd.DataFrame({'customer_id': rng.permutation(np.arange(0, 60)),
+                              'region': rng.choice(['North', 'South'], size=60)})
+    orders = pd.DataFrame({'customer_id': rng.integers(30, 90, size=400),
+                           'amount': rng.uniform(10, 500, size=400).round(2)})
+    return customers, orders
+
+
+def write(frame, path):
+    if path.suffix == '.csv':
+        frame.to_csv(path, index=False)
+    else:
+        frame.to_json(path, orient='records', lines=True)
+    return path
+
+
+@pytest.mark.parametrize('how', ['inner', 'left', 'right', 'outer'])
+@pytest.mark.parametrize('strategy', ['hash', 'spill'])
+def test_frames_match_merge(frames, how, strategy):
+    customers, orders = frames
+    result = join_frames(customers, orders, on='customer_id', how=how, strategy=strategy, chunksize=50)
+    pd.testing.assert_frame_equal(result, pd.merge(customers, orders, on='customer_id', how=how))
+
+
+@pytest.mark.parametrize('how', ['inner', 'left', 'right', 'outer'])
+@pytest.mark.parametrize('larger', ['left', 'right'])
+@pytest.mark.parametrize('suffix', ['.csv', '.jsonl'])
+def test_larger_file_is_streamed_against_the_build_side(frames, tmp_path, how, larger, suffix, monkeypatch):
+    customers, orders = frames
+    left, right = (orders, customers) if larger == 'left' else (customers, orders)
+    left_path, right_path = write(left, tmp_path / f'left{suffix}'), write(right, tmp_path / f'right{suffix}')
+    read = []
+    monkeypatch.setattr('datatools.joins.read_file', lambda path: read.append(path) or read_file(path))
+
+    assert choose_join_strategy(left_path, right_path, on='customer_id') == 'hash'
+    result = join_frames(left_path, right_path, on='customer_id', how=how, chunksize=64)
+    pd.testing.assert_frame_equal(result, pd.merge(left, right, on='customer_id', how=how))
+    assert read == [right_path if larger == 'left' else left_path]  # only the smaller side is loaded
+
+
+def test_sort_merge_reads_jsonl(tmp_path):
+    left = pd.DataFrame({'id': [1, 2, 3], 'a': [1.5, 2.5, 3.5]})
+    right = pd.DataFrame({'id': [2, 3, 4], 'b': ['x', 'y', 'z']})
+    result = join_frames(write(left, tmp_path / 'l.jsonl'), write(right, tmp_path / 'r.jsonl'), on='id',
+                         strategy='sort_merge')
+    pd.testing.assert_frame_equal(result, pd.merge(left, right, on='id'))
+
+
+@pytest.mark.parametrize('how', ['inner', 'left', 'right', 'outer'])
+@pytest.mark.parametrize('strategy', ['hash', 'spill', 'streamed'])
+def test_multi_key_joins_keep_merge_order(tmp_path, how, strategy):
+    rng = np.random.default_rng(1)
+    first = rng.integers(0, 5, size=300).astype(float)
+    first[::17] = np.nan
+    left = pd.DataFrame({'store': first, 'region': rng.choice(['North', 'South', 'East'], size=300),
+                         'amount': np.arange(300)})
+    right = pd.DataFrame({'region': rng.choice(['North', 'South', 'East'], size=40),
+                          'store': rng.integers(0, 6, size=40).astype(float), 'target': np.arange(40)})
+    if strategy == 'streamed':
+        left, right = read_file(write(left, tmp_path / 'left.csv')), read_file(write(right, tmp_path / 'right.csv'))
+        result = join_frames(tmp_path / 'left.csv', tmp_path / 'right.csv', on=['region', 'store'], how=how,
+                             chunksize=64)
+    else:
+        result = join_frames(left, right, on=['region', 'store'], how=how, strategy=strategy, chunksize=64)
+    pd.testing.assert_frame_equal(result, pd.merge(left, right, on=['region', 'store'], how=how))
+
+
+def test_key_dtype_mismatch_and_bad_arguments(frames):
+    customers, orders = frames
+    with pytest.raises(TypeError, match='customer_id'):
+        join_frames(customers, orders.astype({'customer_id': str}), on='customer_id')
+    with pytest.raises(ValueError):
+        join_frames(customers, orders, on='customer_id', how='cross')
+    with pytest.raises(ValueError):
+        join_frames(customers, orders, on='customer_id', how='outer', strategy='sort_merge')
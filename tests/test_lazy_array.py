@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from datatools.lazy_array import BufferPool, lazy
+
+
+@pytest.fixture
+def arrays():
+    rng = np.random.default_rng(0)
+    return rng.random((1_000, 3)) + 0.5, rng.integers(1, 50, size=(1_000, 3)), rng.random(3)
+
+
+@pytest.mark.parametrize('build', [
+    lambda a, i, w: ((a + 5) ** 2) / 100,
+    lambda a, i, w: np.sqrt(a) * w - 1 / a,
+    lambda a, i, w: np.maximum(a, 0.8) + abs(-a) ** 3,
+    lambda a, i, w: (i // 3) % 7 + i * 2,
+    lambda a, i, w: (a > 1) & (i < 20),
+    lambda a, i, w: i / 2 + w,
+])
+def test_results_and_dtypes_match_numpy(arrays, build):
+    a, i, w = arrays
+    expected = build(a, i, w)
+    result = build(lazy(a), lazy(i), w).evaluate(pool=BufferPool(), chunk_elements=100)
+    assert result.dtype == expected.dtype
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_out_may_be_an_input(arrays):
+    a = arrays[0].copy()
+    expected = np.sqrt(a) * 2 + a
+    result = (np.sqrt(lazy(a)) * 2 + a).evaluate(out=a, chunk_elements=64)
+    assert result is a
+    np.testing.assert_array_equal(a, expected)
+
+
+def test_buffers_are_reused(arrays):
+    pool = BufferPool()
+    expression = (lazy(arrays[0]) + 1) * 3 - 2
+    expression.evaluate(pool=pool, chunk_elements=300)
+    allocated = pool.stats['allocated']
+    expression.evaluate(pool=pool, chunk_elements=300)
+    assert pool.stats['allocated'] == allocated and pool.stats['reused'] > 0
+    assert np.asarray(expression).shape == arrays[0].shape
+
+
+def test_shape_errors(arrays):
+    a = arrays[0]
+    with pytest.raises(ValueError):
+        lazy(a) + np.ones(4)
+    with pytest.raises(ValueError):
+        (lazy(a) + 1).evaluate(out=np.empty(3))
@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.parallel_writer import write_parallel
+from datatools.worker_pool import WorkerPool
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with WorkerPool(2) as pool:
+        yield pool
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'id': np.arange(1_000), 'sales': rng.uniform(0, 500, size=1_000).round(2),
+                         'region': rng.choice(['North', 'South'], size=1_000)})
+
+
+@pytest.mark.parametrize('name', ['out.csv', 'out.jsonl'])
+def test_single_file_is_identical_to_pandas(frame, tmp_path, pool, name):
+    path = tmp_path / name
+    assert write_parallel(frame, path, part_rows=300, pool=pool) == [str(path)]
+    expected = frame.to_csv(index=False) if name.endswith('.csv') else frame.to_json(orient='records', lines=True)
+    assert path.read_text() == expected
+
+
+@pytest.mark.parametrize('encoding', ['utf-8-sig', 'utf-16'])
+def test_byte_order_mark_starts_the_file_only(frame, tmp_path, pool, encoding):
+    write_parallel(frame, tmp_path / 'out.csv', part_rows=300, pool=pool, encoding=encoding)
+    frame.to_csv(tmp_path / 'expected.csv', index=False, encoding=encoding)
+    assert (tmp_path / 'out.csv').read_bytes() == (tmp_path / 'expected.csv').read_bytes()
+    write_parallel(frame, tmp_path / 'out.json', format='json', part_rows=300, pool=pool, encoding=encoding)
+    assert json.loads((tmp_path / 'out.json').read_text(encoding)) == json.loads(frame.to_json(orient='records'))
+
+
+def test_empty_frame(frame, tmp_path, pool):
+    empty = frame.head(0)
+    write_parallel(empty, tmp_path / 'out.jsonl', pool=pool)
+    assert (tmp_path / 'out.jsonl').read_text() == empty.to_json(orient='records', lines=True)
+    write_parallel(empty, tmp_path / 'out.csv', pool=pool)
+    assert (tmp_path / 'out.csv').read_text() == empty.to_csv(index=False)
+
+
+def test_json_array_and_gzip(frame, tmp_path, pool):
+    write_parallel(frame, tmp_path / 'out.json', format='json', part_rows=300, pool=pool)
+    assert json.loads((tmp_path / 'out.json').read_text()) == json.loads(frame.to_json(orient='records'))
+    write_parallel(frame, tmp_path / 'out.csv.gz', part_rows=300, pool=pool)
+    assert gzip.decompress((tmp_path / 'out.csv.gz').read_bytes()).decode() == frame.to_csv(index=False)
+
+
+def test_partitions_replace_the_parts_of_an_earlier_write(frame, tmp_path, pool):
+    directory = tmp_path / 'parts'
+    write_parallel(frame, directory, partitioned=True, part_rows=100, pool=pool)
+    paths = write_parallel(frame.head(250), directory, partitioned=True, part_rows=100, pool=pool)
+    assert sorted(str(path) for path in directory.iterdir()) == sorted(paths)
+    pd.testing.assert_frame_equal(pd.concat(map(pd.read_csv, paths), ignore_index=True), frame.head(250))
+
+
+def test_bad_format_and_compression(frame, tmp_path):
+    with pytest.raises(ValueError):
+        write_parallel(frame, tmp_path / 'out.txt')
+    with pytest.raises(ValueError):
+        write_parallel(frame, tmp_path / 'out.csv', compression='bz2')
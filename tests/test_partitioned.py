@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.partitioned import PartitionedExecutor, clean_sales, partition_frame
+
+
+def dedupe(df):
+    return df.drop_duplicates('customer_id')
+
+
+def broken(df):
+    raise KeyError('no such column')
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(0)
+    n = 3_000
+    sales = rng.uniform(50, 500, size=n).round(2)
+    sales[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({'customer_id': rng.integers(1, 400, size=n), 'sales': sales,
+                         'region': rng.choice(['North', 'South'], size=n)})
+
+
+@pytest.fixture(scope='module')
+def executor():
+    with PartitionedExecutor(workers=2) as executor:
+        yield executor
+
+
+def test_partitions_cover_every_row(sales):
+    ranges = partition_frame(sales, 4)
+    pd.testing.assert_frame_equal(pd.concat(ranges), sales)
+    hashed = partition_frame(sales, 4, by='customer_id')
+    assert sum(map(len, hashed)) == len(sales)
+    assert sum(part['customer_id'].nunique() for part in hashed) == sales['customer_id'].nunique()
+
+
+@pytest.mark.parametrize('transfer', ['shared_memory', 'arrow', 'pickle'])
+def test_row_range_run_matches_the_chain(sales, transfer):
+    with PartitionedExecutor(workers=2, transfer=transfer) as executor:
+        result = executor.run(sales, clean_sales, partitions=3)
+    expected = pd.concat([clean_sales(part) for part in partition_frame(sales, 3)])
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_hash_partitions_and_sorted_merge(sales, executor):
+    result = executor.run(sales, dedupe, by='customer_id', sort_by=['customer_id'], ignore_index=True)
+    expected = dedupe(sales).sort_values('customer_id', kind='stable', ignore_index=True)
+    pd.testing.assert_frame_equal(result.sort_values(['customer_id', 'sales'], ignore_index=True),
+                                  expected.sort_values(['customer_id', 'sales'], ignore_index=True))
+    assert result['customer_id'].is_monotonic_increasing
+
+
+def test_file_partitions(sales, tmp_path, executor):
+    paths = []
+    for number, part in enumerate(partition_frame(sales, 2)):
+        paths.append(str(tmp_path / f'part{number}.csv'))
+        part.to_csv(paths[-1], index=False)
+    result = executor.run(paths, clean_sales, ignore_index=True)
+    expected = pd.concat([clean_sales(pd.read_csv(path)) for path in paths], ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_worker_error_is_raised(sales, executor):
+    with pytest.raises(KeyError):
+        executor.run(sales, broken)
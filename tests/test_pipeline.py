@@ -0,0 +1,70 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from datatools.pipeline import Pipeline, PipelineError, Stage
+
+
+def double_all(rows):
+    return [2 * row for row in rows]
+
+
+async def fetch(page):
+    await asyncio.sleep(0)
+    return [page * 10 + i for i in range(3)]
+
+
+def test_thread_async_and_process_stages():
+    pipeline = Pipeline(Stage(fetch, workers=4, expand=True),
+                        Stage(double_all, kind='process', workers=2, batch_size=7, batch_wait=0.01),
+                        Stage(lambda n: n if n % 4 == 0 else None, workers=3))
+    result = pipeline.run(range(20))
+    assert sorted(result) == sorted(2 * (page * 10 + i) for page in range(20) for i in range(3)
+                                    if 2 * (page * 10 + i) % 4 == 0)
+    stats = pipeline.stats().set_index('stage')
+    assert stats.loc['fetch', 'items_in'] == 20 and stats.loc['fetch', 'items_out'] == 60
+    assert stats.loc['double_all', 'batches'] >= 60 // 7
+    assert pipeline.bottleneck() in stats.index
+
+
+def test_queues_bound_the_items_in_flight():
+    def slow(item):
+        time.sleep(0.001)
+        return item
+
+    pipeline = Pipeline(Stage(lambda n: n), Stage(slow), queue_size=5)
+    assert pipeline.run(range(200)) == list(range(200))
+    assert pipeline.stats()['queue_peak'].max() <= 5
+
+
+def test_failure_stops_every_stage():
+    def broken(n):
+        raise ValueError(f"bad row {n}")
+
+    start = time.perf_counter()
+    with pytest.raises(PipelineError, match='broken') as error:
+        Pipeline(Stage(lambda n: n, workers=2), Stage(broken), queue_size=10).run(itertools.count())
+    assert isinstance(error.value.__cause__, ValueError)
+    assert time.perf_counter() - start < 10
+
+
+def test_drain_finishes_the_items_already_read():
+    pipeline = Pipeline(Stage(lambda n: n + 1), queue_size=10).start(itertools.count())
+    time.sleep(0.05)
+    pipeline.stop(drain=True)
+    results = list(pipeline.results())
+    assert results == list(range(1, len(results) + 1))
+    assert pipeline.stats().loc[0, 'items_out'] == len(results)
+
+
+def test_bad_stages():
+    with pytest.raises(ValueError):
+        Stage(print, kind='fiber')
+    with pytest.raises(ValueError):
+        Stage(print, workers=0)
+    with pytest.raises(ValueError):
+        Pipeline()
+    with pytest.raises(RuntimeError):
+        Pipeline(print).stats()
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from datatools.query_builder import run_query
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(0)
+    n = 200
+    return pd.DataFrame({'customer_id': np.arange(n), 'region': rng.choice(['North', 'South', 'East'], size=n),
+                         'sales': rng.uniform(50, 500, size=n).round(2)})
+
+
+@pytest.fixture
+def sources(sales, tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "sales.db"}')
+    sales.to_sql('sales', engine, index=False)
+    sales.to_csv(tmp_path / 'sales.csv', index=False)
+    sales.to_json(tmp_path / 'sales.jsonl', orient='records', lines=True)
+    return [engine, str(tmp_path / 'sales.csv'), str(tmp_path / 'sales.jsonl')]
+
+
+def test_grouped_aggregation_matches_pandas(sales, sources):
+    spec = dict(filters=[('sales', '>', 200), ('region', 'in', ['North', 'South'])], groupby=['region'],
+                aggs={'total': ('sales', 'sum'), 'average': ('sales', 'mean'), 'orders': ('customer_id', 'count')})
+    selected = sales[(sales['sales'] > 200) & sales['region'].isin(['North', 'South'])]
+    expected = selected.groupby('region', as_index=False).agg(**spec['aggs'])
+    for source in sources:
+        pd.testing.assert_frame_equal(run_query(source, **spec), expected, check_dtype=False)
+
+
+def test_select_order_and_limit_match_pandas(sales, sources):
+    expected = sales[sales['region'] != 'East'].sort_values('sales', ascending=False)[['customer_id', 'sales']]
+    expected = expected.head(5).reset_index(drop=True)
+    for source in sources:
+        result = run_query(source, select=['customer_id', 'sales'], filters=[('region', '!=', 'East')],
+                           order_by=['-sales'], limit=5)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def test_order_by_a_column_that_is_not_selected(sales, sources):
+    expected = sales.sort_values('sales', ascending=False)[['customer_id']].head(10).reset_index(drop=True)
+    for source in sources:
+        pd.testing.assert_frame_equal(run_query(source, select=['customer_id'], order_by=['-sales'], limit=10),
+                                      expected)
+
+
+@pytest.mark.parametrize('spec', [dict(filters=[('sales', 'like', 1)]), dict(aggs={'x': ('sales', 'median')})])
+def test_unsupported_operators_and_aggregations(sources, spec):
+    for source in sources:
+        with pytest.raises(ValueError):
+            run_query(source, **spec)
+
+
+def test_unsupported_file_type(tmp_path):
+    with pytest.raises(ValueError):
+        run_query(str(tmp_path / 'sales.txt'))
@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+from datatools.db import TableVersions, get_engine
+from datatools.query_cache import QueryCache, normalize_sql, referenced_tables
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = get_engine(f'sqlite:///{tmp_path / "cache.db"}')
+    with engine.begin() as conn:
+        conn.execute(text('CREATE TABLE a (id INTEGER, value)'))
+        conn.execute(text('CREATE TABLE b (id INTEGER, label TEXT)'))
+        conn.execute(text("INSERT INTO a VALUES (1, 10), (2, 'twenty')"))  # SQLite: mixed-type column
+        conn.execute(text("INSERT INTO b VALUES (1, 'x'), (2, 'y')"))
+    yield engine
+    engine.dispose()
+
+
+def test_normalize_sql_keeps_literals():
+    assert normalize_sql("SELECT  *\n FROM a WHERE s = 'x  y' ;") == "SELECT * FROM a WHERE s = 'x  y'"
+    assert normalize_sql("SELECT '--' -- note\nFROM /* b, */ a") == "SELECT '--' FROM a"
+
+
+@pytest.mark.parametrize('sql, tables', [
+    ('SELECT * FROM a, b WHERE a.id = b.id', ['a', 'b']),
+    ('SELECT * FROM a AS x, b y JOIN c ON c.id = y.id', ['a', 'b', 'c']),
+    ('SELECT * FROM "main".a LEFT JOIN [b] USING (id)', ['a', 'b']),
+    ('SELECT * FROM (SELECT id FROM a) sub, b', ['a', 'b']),
+    ('SELECT * FROM a JOIN b ON a.id = b.id AND b.label IN (\'x\', \'y\'), c WHERE c.id = 1', ['a', 'b', 'c']),
+    ('SELECT * FROM (SELECT * FROM a JOIN b USING (id)) s, c', ['a', 'b', 'c']),
+    ('SELECT 1', []),
+])
+def test_referenced_tables(sql, tables):
+    assert referenced_tables(sql) == tables
+
+
+def test_hit_and_invalidation_through_second_table_of_a_list(engine):
+    cache = QueryCache(engine, versions=TableVersions())
+    query = 'SELECT a.id, b.label FROM a, b WHERE a.id = b.id'
+    first = cache.read_sql(query)
+    cache.read_sql(query)
+    assert cache.stats['hits'] == 1
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE b SET label = 'z' WHERE id = 1"))
+    cache.invalidate('b')
+    assert cache.read_sql(query)['label'].tolist() == ['z', 'y']
+    assert first['label'].tolist() == ['x', 'y']
+
+
+def test_comment_does_not_hide_the_rest_of_the_query(engine):
+    cache = QueryCache(engine, versions=TableVersions())
+    query = 'SELECT * FROM a -- only the first row\nWHERE id = 1'
+    assert len(cache.read_sql(query)) == 1
+    assert len(cache.read_sql(query)) == 1 and cache.stats['hits'] == 1
+    assert referenced_tables(normalize_sql('SELECT * FROM a -- , b\n')) == ['a']
+
+
+def test_spill_and_promote(engine, tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = QueryCache(engine, max_bytes=10_000, spill_dir=tmp_path / 'spill', versions=TableVersions())
+    labels = cache.read_sql('SELECT * FROM b')
+    cache.max_bytes = cache.memory_bytes + 1  # the next (smaller) result evicts the first one to disk
+    cache.read_sql('SELECT id FROM b')
+    pd.testing.assert_frame_equal(cache.read_sql('SELECT * FROM b'), labels)
+    assert cache.stats['spill_hits'] == 1
+
+
+def test_unspillable_result_stays_cached(engine, tmp_path):
+    pytest.importorskip('pyarrow')
+    cache = QueryCache(engine, max_bytes=10_000, spill_dir=tmp_path / 'spill', versions=TableVersions())
+    mixed = cache.read_sql('SELECT * FROM a')  # object column of int and str: Parquet rejects it
+    assert mixed['value'].tolist() == [10, 'twenty']
+    cache.max_bytes = cache.memory_bytes + 1
+    cache.read_sql('SELECT id FROM b')  # evicts the mixed result, whose spill fails
+    assert cache.stats['spill_errors'] == 1
+    cache.read_sql('SELECT * FROM a')
+    assert cache.stats['hits'] == 1
@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from datatools.rate_limit import (AdaptiveLimiter, KeyedLimiter, LeakyBucket, TokenBucket, bounded_gather,
+                                  host_key, rate_limited)
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=100, burst=5)
+    assert [bucket.try_acquire() for _ in range(6)] == [True] * 5 + [False]
+    assert bucket.reserve() == pytest.approx(0.01, abs=0.005)
+    assert bucket.reserve() == pytest.approx(0.02, abs=0.005)  # queued behind the first debt
+
+
+def test_leaky_bucket_spaces_requests_evenly():
+    bucket = LeakyBucket(rate=50)
+    delays = [bucket.reserve() for _ in range(4)]
+    assert delays[0] == pytest.approx(0, abs=0.005)
+    assert [round(b - a, 3) for a, b in zip(delays, delays[1:])] == [0.02, 0.02, 0.02]
+
+
+def test_pause_delays_waiters():
+    bucket = LeakyBucket(rate=1_000)
+    bucket.pause(0.1)
+    start = time.monotonic()
+    with bucket:
+        pass
+    assert time.monotonic() - start >= 0.09
+
+
+def test_acquire_paces_threads_and_coroutines():
+    bucket = TokenBucket(rate=200, burst=1)
+
+    @rate_limited(bucket)
+    def call():
+        return time.monotonic()
+
+    @rate_limited(bucket)
+    async def call_async():
+        return time.monotonic()
+
+    start = time.monotonic()
+    for _ in range(5):
+        call()
+    asyncio.run(bounded_gather((call_async() for _ in range(5)), limit=5))
+    assert time.monotonic() - start >= 9 / 200 - 0.005
+
+
+def test_adaptive_limiter_decreases_and_recovers():
+    limiter = AdaptiveLimiter(TokenBucket(rate=10), max_rate=12, increase=10, cooldown=60)
+    limiter.report(429)
+    limiter.report(503)  # within the cooldown: not halved twice
+    assert limiter.rate == 5 and limiter.stats == {'ok': 0, 'throttled': 2, 'decreases': 1}
+    for _ in range(100):
+        limiter.report(200)
+    assert limiter.rate == 12
+    limiter.report(429, retry_after='0.05')
+    assert limiter.limiter.paused_until > time.monotonic()
+    with pytest.raises(KeyError):
+        with limiter:
+            raise KeyError('boom')
+    assert limiter.stats['throttled'] == 4
+
+
+def test_keyed_limiter_is_per_host():
+    limits = KeyedLimiter(lambda: TokenBucket(rate=1))
+    assert limits.get('https://API.example.com/a?x=1') is limits.get('https://api.example.com/b')
+    assert limits.get('https://other.example.com/') is not limits.get('https://api.example.com/')
+    assert host_key('plain-key') == 'plain-key'
+
+
+def test_bounded_gather_limits_concurrency_and_keeps_order():
+    running = peak = 0
+
+    async def job(n):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.001 * (n % 3))
+        running -= 1
+        if n == 7:
+            raise ValueError(n)
+        return n
+
+    results = asyncio.run(bounded_gather((job(n) for n in range(20)), limit=4, return_exceptions=True))
+    assert peak <= 4
+    assert isinstance(results[7], ValueError) and results[:7] == list(range(7))
+    with pytest.raises(ValueError):
+        asyncio.run(bounded_gather([job(n) for n in range(10)], limit=2))
+    with pytest.raises(ValueError):
+        asyncio.run(bounded_gather([], limit=0))
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.resampler import StreamingResampler, resample_stream
+
+SPEC = dict(total=('sales', 'sum'), average=('sales', 'mean'), orders=('sales', 'count'), top=('sales', 'max'))
+
+
+@pytest.fixture
+def events():
+    # Roughly ordered: every event may be up to two days out of place
+    rng = np.random.default_rng(0)
+    n = 5_000
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 120 * 86400, n)), 's')
+    jitter = rng.integers(0, 2 * 86400 * 10**9, n)
+    frame = pd.DataFrame({'order_date': dates, 'sales': rng.uniform(50, 500, size=n).round(2)})
+    return frame.iloc[np.argsort(dates.to_numpy().astype('int64') + jitter, kind='stable')]
+
+
+def streamed(frame, freq, chunk_rows=700, **options):
+    resampler = StreamingResampler(freq, on='order_date', allowed_lateness='3D', late='raise', **SPEC, **options)
+    parts = [resampler.push(frame.iloc[start:start + chunk_rows]) for start in range(0, len(frame), chunk_rows)]
+    return pd.concat([part for part in parts + [resampler.close()] if len(part)])
+
+
+@pytest.mark.parametrize('freq, options', [('ME', {}), ('D', {}), ('6h', {}), ('7D', {'origin': 'epoch'}),
+                                           ('7D', {'origin': pd.Timestamp('2023-12-25')})])
+def test_roughly_ordered_stream_matches_resample(events, freq, options):
+    expected = events.resample(freq, on='order_date', **options).agg(**SPEC)
+    result = streamed(events, freq, **options)
+    pd.testing.assert_index_equal(result.index, expected.index)
+    np.testing.assert_allclose(result.astype(float), expected.astype(float))
+
+
+@pytest.mark.parametrize('freq, origin', [('7D', 'start_day'), ('h', 'start'), ('D', 'end')])
+def test_data_dependent_origin_is_rejected(freq, origin):
+    with pytest.raises(ValueError, match='origin'):
+        StreamingResampler(freq, on='order_date', origin=origin, total=('sales', 'sum'))
+
+
+def test_late_rows_are_dropped_or_raised():
+    first = pd.DataFrame({'order_date': pd.to_datetime(['2024-01-01', '2024-01-05']), 'sales': [1.0, 2.0]})
+    late = pd.DataFrame({'order_date': pd.to_datetime(['2024-01-02']), 'sales': [5.0]})
+    resampler = StreamingResampler('D', on='order_date', total=('sales', 'sum'))
+    assert list(resampler.push(first)['total']) == [1.0, 0.0, 0.0, 0.0]
+    assert resampler.push(late).empty and resampler.stats['late_rows'] == 1
+    strict = StreamingResampler('D', on='order_date', late='raise', total=('sales', 'sum'))
+    strict.push(first)
+    with pytest.raises(ValueError):
+        strict.push(late)
+
+
+def test_resample_stream_and_bad_aggregation(events):
+    ordered = events.sort_values('order_date')
+    result = pd.concat(resample_stream(ordered, 'ME', on='order_date', chunksize=1_000, total=('sales', 'sum')))
+    expected = ordered.resample('ME', on='order_date').agg(total=('sales', 'sum'))
+    pd.testing.assert_frame_equal(result, expected, check_freq=False)
+    with pytest.raises(ValueError):
+        StreamingResampler('D', on='order_date', middle=('sales', 'median'))
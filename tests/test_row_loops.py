@@ -0,0 +1,64 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from datatools.row_loops import (_same_result, check_row_loops, compare_on_sample, find_row_loops,
+                                 vectorize_function)
+
+
+def discount(df):
+    for i, row in df.iterrows():
+        df.at[i, 'discounted'] = row['sales'] * 0.9
+    return df
+
+
+def flag_big(df):
+    for i, row in df.iterrows():
+        if row['sales'] > 2:
+            df.at[i, 'big'] = row['sales'] * 2  # column only created by the loop
+    return df
+
+
+def test_vectorized_rewrite_matches_loop():
+    df = pd.DataFrame({'sales': np.arange(20, dtype=float)})
+    vectorized = vectorize_function(discount)
+    assert vectorized is not None
+    pd.testing.assert_frame_equal(vectorized(df.copy()), discount(df.copy()))
+
+
+def test_find_row_loops_reports_iterrows():
+    source = "for i, row in df.iterrows():\n    df.at[i, 'x'] = row['sales'] * 2\n"
+    loops = find_row_loops(source)
+    assert [(loop.line, loop.kind) for loop in loops] == [(1, 'iterrows'), (2, 'cell write in loop')]
+    assert loops[0].vectorized == "df['x'] = df['sales'] * 2"
+
+
+def test_check_runs_the_original_once():
+    calls = []
+
+    def logged_discount(df):
+        calls.append(len(df))  # stands in for a side effect such as a DB insert
+        return discount(df)
+
+    df = pd.DataFrame({'sales': np.arange(50, dtype=float)})
+    report = compare_on_sample(logged_discount, vectorize_function(discount), (df,), sample_rows=10, repeat=3)
+    assert report['same_result'] and calls == [10]
+
+
+def test_failing_check_keeps_original(caplog):
+    checked = check_row_loops(replace=True)(flag_big)
+    df = pd.DataFrame({'sales': [1.0, 3.0, 5.0]})
+    with caplog.at_level(logging.WARNING, logger='datatools.row_loops'):
+        result = checked(df.copy())
+    pd.testing.assert_frame_equal(result, flag_big(df.copy()))
+    assert 'could not check' in caplog.text
+    assert checked.row_loop_report is None
+
+
+def test_same_result_on_arrays():
+    assert _same_result(np.array([1, 2]), np.array([1, 2]))
+    assert _same_result(np.array([1.0, np.nan]), np.array([1.0, np.nan]))
+    assert not _same_result(np.array([1, 2]), np.array([1, 3]))
+    assert _same_result(np.array(['a', None], dtype=object), np.array(['a', None], dtype=object))
+    assert not _same_result((np.arange(2),), (np.arange(2),))  # ambiguous ==: treated as different
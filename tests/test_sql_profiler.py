@@ -0,0 +1,49 @@
+import logging
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from datatools.sql_profiler import QueryProfiler
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "profile.db"}')
+    pd.DataFrame({'id': range(100), 'sales': [float(i) for i in range(100)]}).to_sql('sales', engine, index=False)
+    return engine
+
+
+def test_read_sql_records_calls_rows_and_bytes(engine):
+    with QueryProfiler(engine, slow_threshold=60) as profiler:
+        for _ in range(3):
+            df = profiler.read_sql('SELECT * FROM   sales WHERE sales > :limit', params={'limit': 49})
+    pd.testing.assert_frame_equal(df, pd.read_sql('SELECT * FROM sales WHERE sales > 49', engine))
+    entry = profiler.stats['SELECT * FROM sales WHERE sales > ?']
+    assert entry['calls'] == 3 and entry['rows'] == 150
+    assert entry['bytes'] == 3 * df.memory_usage(index=True, deep=True).sum()
+    assert profiler.slow_queries == []
+
+
+def test_slow_queries_are_logged_with_a_plan(engine, caplog):
+    profiler = QueryProfiler(engine, slow_threshold=0).attach()
+    with caplog.at_level(logging.WARNING, logger='datatools.sql_profiler'):
+        profiler.read_sql('SELECT COUNT(*) FROM sales')
+        with engine.connect() as conn:
+            conn.execute(text('SELECT id FROM sales'))
+    profiler.detach()
+    assert [slow['rows'] for slow in profiler.slow_queries] == [1, None]
+    assert all(slow['plan'] for slow in profiler.slow_queries)
+    assert 'Slow query' in caplog.text
+
+
+def test_report_sorts_by_the_requested_column(engine):
+    profiler = QueryProfiler(engine, slow_threshold=60).attach()
+    profiler.read_sql('SELECT * FROM sales')
+    for _ in range(2):
+        profiler.read_sql('SELECT id FROM sales LIMIT 1')
+    report = profiler.report(by='calls')
+    assert list(report['calls']) == [2, 1]
+    assert list(report.columns) == ['statement', 'calls', 'total_time', 'avg_time', 'max_time', 'rows', 'bytes']
+    profiler.reset()
+    assert profiler.report().empty
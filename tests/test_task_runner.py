@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+import pytest
+
+from datatools.task_runner import TaskError, TaskRunner, _cpu_bound_sum, task
+
+
+def test_io_async_and_cpu_results():
+    async def double(x):
+        await asyncio.sleep(0)
+        return 2 * x
+
+    with TaskRunner(io_workers=2, cpu_workers=1) as runner:
+        io = runner.map(lambda x: x + 1, range(3))
+        coroutines = [runner.submit(double, x) for x in range(3)]
+        cpu = runner.submit(_cpu_bound_sum, 10, kind='cpu')
+    assert runner.gather(io) == [1, 2, 3]
+    assert runner.gather(coroutines) == [0, 2, 4]
+    assert cpu.result() == sum(i * i for i in range(10))
+    assert coroutines[0].kind == 'async'
+
+
+def test_queued_process_job_does_not_time_out_while_waiting():
+    # One worker: the second job waits ~0.4 s in the queue, but only its own 0.4 s run counts
+    with TaskRunner(cpu_workers=1) as runner:
+        runner.submit(_cpu_bound_sum, 1, kind='cpu').result()  # start the worker first
+        jobs = [runner.submit(time.sleep, 0.4, kind='cpu', timeout=0.6) for _ in range(2)]
+    assert runner.gather(jobs) == [None, None]
+
+
+def test_slow_thread_job_times_out():
+    with TaskRunner(fail_fast=False) as runner:
+        slow = runner.submit(time.sleep, 1, timeout=0.1)
+        assert isinstance(slow.exception(), TimeoutError)
+    with pytest.raises(TaskError):
+        slow.result()
+
+
+def test_slow_process_job_times_out():
+    with TaskRunner(cpu_workers=1, fail_fast=False) as runner:
+        slow = runner.submit(time.sleep, 1, kind='cpu', timeout=0.2)
+        assert isinstance(slow.exception(), TimeoutError)
+
+
+def test_unretrieved_failure_is_raised_on_exit_and_cancels_the_rest():
+    with pytest.raises(TaskError, match='broken'):
+        with TaskRunner() as runner:
+            other = runner.submit(time.sleep, 1)
+            runner.submit(lambda: 1 / 0, name='broken')
+    assert other.future.cancelled()
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        task('gpu')
+    with TaskRunner() as runner, pytest.raises(ValueError):
+        runner.submit(print, kind='gpu')
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from datatools.worker_pool import WorkerPool, _column_mean, _square, parallel_map
+
+
+def array_sum(array):
+    return float(array.sum())
+
+
+def fill(array):
+    array[0] = 1.0  # shared arrays arrive as read-only views
+
+
+def divide(n, array):
+    return array.size / n
+
+
+def shared_blocks():
+    return set(os.listdir('/dev/shm')) if os.path.isdir('/dev/shm') else set()
+
+
+@pytest.fixture(scope='module')
+def pool():
+    with WorkerPool(2) as pool:
+        yield pool
+
+
+def test_results_keep_input_order(pool):
+    assert pool.map(_square, range(100), batch_size=7) == [n ** 2 for n in range(100)]
+    assert list(pool.imap(_square, (n for n in range(50)))) == [n ** 2 for n in range(50)]
+    assert parallel_map(_square, [3, 4], workers=1) == [9, 16]
+
+
+def test_large_arguments_go_through_shared_memory(pool):
+    before = shared_blocks()
+    frame = pd.DataFrame(np.random.default_rng(0).normal(size=(100_000, 4)), columns=list('abcd'))  # 3.2 MB
+    np.testing.assert_allclose(pool.map(_column_mean, frame.columns, frame), frame.mean())
+    arrays = [np.full(200_000, float(i)) for i in range(3)]  # 1.6 MB items
+    assert pool.map(array_sum, arrays) == [float(array.sum()) for array in arrays]
+    assert shared_blocks() == before  # every block is released after the call
+
+
+def test_shared_arrays_are_read_only(pool):
+    with pytest.raises(ValueError):
+        pool.map(fill, [np.zeros(200_000)])
+
+
+def test_worker_errors_are_raised_and_blocks_released(pool):
+    before = shared_blocks()
+    with pytest.raises(ZeroDivisionError):
+        pool.map(divide, [1, 2, 0, 4], np.zeros(200_000), batch_size=1)
+    assert shared_blocks() == before
+    assert pool.map(_square, [5]) == [25]  # the pool is still usable